@@ -42,6 +42,7 @@ export default function RootLayout() {
           <Stack.Screen name="dailyJournal" options={{ headerShown: false }} />
           <Stack.Screen name="modal" options={{ presentation: 'modal', title: 'Modal' }} />
           <Stack.Screen name="recordsParamedic" options={{ headerShown: false }} />
+          {__DEV__ && <Stack.Screen name="testSession" options={{ headerShown: false }} />}
         </Stack>
         <StatusBar style="dark" />  
       </NotificationsProvider>
@@ -0,0 +1,66 @@
+import AsyncStorage from '@react-native-async-storage/async-storage';
+import { useLocalSearchParams, useRouter } from 'expo-router';
+import { useEffect } from 'react';
+import { ActivityIndicator, View } from 'react-native';
+
+import { saveUser } from '@/services/localdatabase';
+import { LoggingService } from '@/services/loggingService';
+import { supabase } from '@/services/supabase';
+
+// Development-only entry point used by the Appium suite (tests/session.py):
+// stores a Supabase session and the local user_data row, then opens `next`,
+// so tests of screens behind the login do not have to go through LogIn.
+// Deep links end up in logcat, so the session comes from a one-time
+// magic-link `token_hash` exchanged here, never from tokens in the URL.
+export default function TestSession() {
+  const router = useRouter();
+  const params = useLocalSearchParams<{
+    token_hash?: string;
+    user_id?: string;
+    name?: string;
+    role?: string;
+    next?: string;
+  }>();
+
+  useEffect(() => {
+    (async () => {
+      if (!__DEV__ || !params.user_id) {
+        router.replace('/logIn');
+        return;
+      }
+
+      try {
+        if (params.token_hash) {
+          const { error } = await supabase.auth.verifyOtp({
+            token_hash: params.token_hash,
+            type: 'magiclink',
+          });
+          if (error) throw error;
+        }
+
+        await AsyncStorage.setItem('cachedUserId', params.user_id);
+        await AsyncStorage.setItem('lastAuthTime', new Date().toISOString());
+        await saveUser(
+          params.user_id,
+          params.name ?? '',
+          '0',
+          new Date().toISOString(),
+          '',
+          params.role ?? 'medico'
+        );
+
+        LoggingService.info('TEST_SESSION', `Injected ${params.role} session, opening ${params.next}`);
+        router.replace(`/${params.next ?? 'mapView'}` as any);
+      } catch (error) {
+        LoggingService.error('TEST_SESSION', 'Session injection failed:', error as Error);
+        router.replace('/logIn');
+      }
+    })();
+  }, []);
+
+  return (
+    <View style={{ flex: 1, justifyContent: 'center', alignItems: 'center' }}>
+      <ActivityIndicator size="large" />
+    </View>
+  );
+}
@@ -147,6 +147,8 @@ export const getCurrentUserResilient = async () => {
 };
 
 export const getProfileByIdResilient = async (id: string) => {
+  // PROFILE_LOAD / PROFILE_LOADED bracket the load for the Appium suite's logcat spans
+  LoggingService.info('PROFILE_LOAD', `👤 Loading profile ${id}...`);
   try {
     if (isOnline()) {
       const { data, error } = await supabase
@@ -158,15 +160,20 @@ export const getProfileByIdResilient = async (id: string) => {
       
       // Cache locally
       await localdatabase.saveProfileLocally(data);
+      LoggingService.info('PROFILE_LOADED', `✓ Profile ${id} loaded from Supabase`);
       return data;
     } else {
       // Try local cache
-      return await localdatabase.getProfileLocally(id);
+      const profile = await localdatabase.getProfileLocally(id);
+      LoggingService.info('PROFILE_LOADED', `✓ Profile ${id} loaded from local cache`);
+      return profile;
     }
   } catch (error) {
     console.error('Get profile error:', error);
     // Fallback to local
-    return await localdatabase.getProfileLocally(id);
+    const profile = await localdatabase.getProfileLocally(id);
+    LoggingService.info('PROFILE_LOADED', `⚠️ Profile ${id} loaded from local cache after error`);
+    return profile;
   }
 };
 
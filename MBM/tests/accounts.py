@@ -0,0 +1,218 @@
+"""
+Test-account provisioning through the Supabase REST and auth admin APIs
+Doctor and admin accounts are created in bulk before the session starts
+(auth users first, then a single ``Profiles`` insert), leased to tests and
+deleted when the session ends, so only the tests that exercise the register
+screen pay for creating an account through the UI.
+
+    SUPABASE_URL                  project URL, or a local stand-in
+    SUPABASE_SERVICE_ROLE_KEY     service role key; provisioning is off without it
+    SUPABASE_ANON_KEY             anon key used to sign leased accounts in
+    ACCOUNT_POOL_DOCTORS          doctor accounts to create (default 2)
+    ACCOUNT_POOL_ADMINS           admin accounts to create (default 1)
+"""
+
+import json
+import os
+import queue
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+DOCTOR = "medico"
+ADMIN = "admin"
+DEFAULT_PASSWORD = "TestPassword123!"
+
+
+def worker_tag():
+    return os.getenv("PYTEST_XDIST_WORKER", "main")
+
+
+def unique_id(prefix="test"):
+    """Identifier unique across workers, hosts and runs"""
+    return f"{prefix}_{worker_tag()}_{uuid.uuid4().hex[:12]}"
+
+
+def unique_email(prefix="test"):
+    return f"{unique_id(prefix)}@example.com"
+
+
+class Account:
+    """Credentials and profile of a provisioned user"""
+
+    def __init__(self, email, password, name, role, user_id=None):
+        self.email = email
+        self.password = password
+        self.name = name
+        self.role = role
+        self.user_id = user_id
+
+    def profile_row(self):
+        """``Profiles`` row as created by Authenticate.register"""
+        return {
+            "id": self.user_id,
+            "name": self.name,
+            "role": self.role,
+            "nvisits": 0,
+            "dateRegistered": datetime.now(timezone.utc).isoformat(),
+            "lastVisit": None,
+        }
+
+    def __repr__(self):
+        return f"Account({self.email!r}, role={self.role!r})"
+
+
+class SupabaseError(Exception):
+    """Supabase answered with an error status"""
+
+
+class SupabaseClient:
+    """Minimal Supabase REST/auth client"""
+
+    KEY_VARIABLE = "SUPABASE_ANON_KEY"
+
+    def __init__(self, url, key, timeout=30):
+        self.url = url.rstrip("/")
+        self.key = key
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls):
+        url, key = os.getenv("SUPABASE_URL"), os.getenv(cls.KEY_VARIABLE)
+        if not url or not key:
+            return None
+        return cls(url, key)
+
+    def request(self, method, path, body=None, headers=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(self.url + path, data=data, method=method, headers={
+            "apikey": self.key,
+            "Authorization": f"Bearer {self.key}",
+            "Content-Type": "application/json",
+            **(headers or {}),
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = response.read()
+        except urllib.error.HTTPError as error:
+            raise SupabaseError(
+                f"{method} {path} failed with {error.code}: {error.read().decode('utf-8', 'replace')}"
+            ) from error
+        return json.loads(payload) if payload else None
+
+    def sign_in(self, email, password):
+        """Password grant; returns the session (access/refresh token and user)"""
+        return self.request("POST", "/auth/v1/token?grant_type=password", {
+            "email": email, "password": password,
+        })
+
+
+class SupabaseAdmin(SupabaseClient):
+    """Supabase client using the service role key"""
+
+    KEY_VARIABLE = "SUPABASE_SERVICE_ROLE_KEY"
+
+    # -- auth admin ---------------------------------------------------------
+
+    def create_user(self, email, password):
+        """Create a confirmed auth user and return its id"""
+        user = self.request("POST", "/auth/v1/admin/users", {
+            "email": email, "password": password, "email_confirm": True,
+        })
+        return user["id"]
+
+    def delete_user(self, user_id):
+        self.request("DELETE", f"/auth/v1/admin/users/{user_id}")
+
+    def generate_link(self, email, link_type="magiclink"):
+        """One-time sign-in link for an existing user: the user plus ``hashed_token``"""
+        return self.request("POST", "/auth/v1/admin/generate_link", {
+            "type": link_type, "email": email,
+        })
+
+    # -- rest ---------------------------------------------------------------
+
+    def insert_rows(self, table, rows):
+        """Insert all ``rows`` with a single request"""
+        self.request("POST", f"/rest/v1/{table}", rows, {"Prefer": "return=minimal"})
+
+    def delete_rows(self, table, column, values):
+        listed = ",".join(f'"{value}"' for value in values)
+        query = urllib.parse.urlencode({column: f"in.({listed})"})
+        self.request("DELETE", f"/rest/v1/{table}?{query}")
+
+
+class AccountPool:
+    """Pre-created accounts leased to one test at a time"""
+
+    def __init__(self, admin, doctors=None, admins=None, workers=8):
+        self.admin = admin
+        self.counts = {
+            DOCTOR: int(os.getenv("ACCOUNT_POOL_DOCTORS", 2) if doctors is None else doctors),
+            ADMIN: int(os.getenv("ACCOUNT_POOL_ADMINS", 1) if admins is None else admins),
+        }
+        self.workers = workers
+        self.accounts = []
+        self._free = {role: queue.Queue() for role in self.counts}
+
+    def provision(self):
+        """Create every account: auth users concurrently, profiles in one insert
+
+        If anything fails, the users already created are deleted again
+        before the error is raised.
+        """
+        planned = [
+            Account(unique_email(role), DEFAULT_PASSWORD, f"Test {role} {index + 1}", role)
+            for role, count in self.counts.items()
+            for index in range(count)
+        ]
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self.admin.create_user, account.email, account.password): account
+                for account in planned
+            }
+            for future in as_completed(futures):
+                try:
+                    futures[future].user_id = future.result()
+                except Exception as error:
+                    errors.append(error)
+        self.accounts = [account for account in planned if account.user_id]
+        try:
+            if errors:
+                raise errors[0]
+            if planned:
+                self.admin.insert_rows("Profiles", [account.profile_row() for account in planned])
+        except Exception:
+            self.cleanup()
+            raise
+        for account in planned:
+            self._free[account.role].put(account)
+        return self.accounts
+
+    @contextmanager
+    def lease(self, role=DOCTOR, timeout=60):
+        """Hand out a free account of ``role`` and take it back afterwards"""
+        try:
+            account = self._free[role].get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No {role} account free after {timeout}s; "
+                               f"raise the pool size for this role") from None
+        try:
+            yield account
+        finally:
+            self._free[role].put(account)
+
+    def cleanup(self):
+        """Delete the profiles and auth users created by ``provision``"""
+        ids = [account.user_id for account in self.accounts if account.user_id]
+        if not ids:
+            return
+        self.admin.delete_rows("Profiles", "id", ids)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self.admin.delete_user, ids))
+        self.accounts = []
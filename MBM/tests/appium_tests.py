@@ -4,24 +4,152 @@ Login & Register Screen Testing with Page Object Model
 Single file implementation with all tests, locators, and utilities
 """
 
+import logging
 import os
+import sqlite3
+import threading
 import time
+import urllib.parse
+import numpy as np
 import pytest
-from datetime import datetime
+from contextlib import ExitStack, contextmanager
 from dotenv import load_dotenv
 
 # Appium imports
 from appium import webdriver
+from appium.webdriver.appium_connection import AppiumConnection
 from appium.options.android import UiAutomator2Options
 
 # Selenium imports for waits and locators
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException, WebDriverException
 
 # Use By instead of AppiumBy
 AppiumBy = By
 
+from accounts import (
+    ADMIN,
+    DOCTOR,
+    Account,
+    AccountPool,
+    SupabaseAdmin,
+    SupabaseClient,
+    SupabaseError,
+    unique_email,
+    unique_id,
+)
+from benchmarks import BaselineStore, Stats, measure, time_until_visible
+from devices import DeviceRegistry
+from element_cache import cache_for
+import forms
+from forms import FormFiller, format_comparison, holds
+from driver_pool import (
+    ADMIN_NOTIFICATIONS_ROUTE,
+    DAILY_JOURNAL_ROUTE,
+    DriverPool,
+    EDIT_PROFILE_ROUTE,
+    LOGIN_ROUTE,
+    MAP_ROUTE,
+    PoolStats,
+    RECORDS_ADMIN_ROUTE,
+    RECORDS_PARAMEDIC_ROUTE,
+    REGISTER_ROUTE,
+    open_route,
+)
+import gestures
+from gfxinfo import GfxinfoCollector, parse_gfxinfo
+import logcat
+from network import (
+    ConnectivityHarness,
+    NetworkProfile,
+    ThrottlingProxy,
+    format_matrix,
+    network_profiles,
+    set_network,
+    transitions,
+)
+from mappins import (
+    MapPinBenchmark,
+    build_locations_db,
+    displayed_pins,
+    format_scaling,
+    pin_counts,
+    seed_supabase,
+    synthetic_pins,
+)
+from logcat import LogcatCollector, SpanTracker, entries_from_dump, logcat_available, parse_entry
+from fake_realtime import RealtimeClient
+from fake_supabase_server import FakeSupabaseServer, FaultProfile, service_key
+import fake_appium_server
+from fake_appium_server import FakeAppiumServer, LatencyProfile
+from instrumentation import CommandRecorder, trace_page_methods
+import instrumentation
+from realtime_load import (
+    EventLoad,
+    NotificationProbe,
+    SubscriberProbe,
+    format_results,
+    saturation_rate,
+    summarize,
+)
+import realtime_load
+import records_scroll
+from records_scroll import (
+    RecordsScrollBenchmark,
+    ScrollProgress,
+    build_logs_db,
+    format_throughput,
+    gated_stats,
+    log_counts,
+    synthetic_logs,
+    visible_cards,
+)
+import replay
+from replay import Replayer, ReplayServer, TraceRecorder, load_trace
+from reporting import (
+    clear_worker_timings,
+    format_timings,
+    merge_worker_timings,
+    read_json,
+    report_dir,
+    write_json,
+    write_worker_timings,
+)
+import resources
+from resources import ResourceSampler, exceeds_threshold, format_usage, parse_meminfo, parse_proc_stat
+from resources import summarize as summarize_usage
+from session import SessionInjector
+from shell import shell_available
+from syncdb import (
+    SyncBenchmark,
+    SyncUnsupported,
+    build_queue_db,
+    format_curve,
+    pending_counts,
+    queue_sizes,
+    set_connectivity,
+    split_rows,
+)
+from scheduler import CostModel, DurationStore, balance, longest_first, within_budget
+from snapshot import PageSnapshot
+import visual
+from visual import ImageStore, Region, VisualChecker, compare, downscale, mask_array
+import transport
+from transport import Batch, run_batch
+from locators import benchmark_locators, compiled_locators, format_benchmark, locators_of
+import waits
+from waits import (
+    ANDROID_ALERT_BUTTON,
+    WaitEngine,
+    alert_shown,
+    input_has_value,
+    navigation_finished,
+    screen_gone,
+    screen_visible,
+)
+
 # Load environment variables
 load_dotenv()
 
@@ -30,6 +158,7 @@ load_dotenv()
 # LOCATORS - All UI element selectors
 # ============================================================================
 
+@compiled_locators
 class LoginLocators:
     """Login screen element locators"""
     EMAIL_INPUT = (AppiumBy.XPATH, "//android.widget.EditText[@content-desc='Usuario']")
@@ -39,6 +168,7 @@ class LoginLocators:
     LOGIN_TITLE = (AppiumBy.XPATH, "//*[contains(@text, 'Iniciar Sesión')]")
 
 
+@compiled_locators
 class RegisterLocators:
     """Register screen element locators"""
     NAME_INPUT = (AppiumBy.XPATH, "//android.widget.EditText[@content-desc='Nombre completo']")
@@ -52,6 +182,34 @@ class RegisterLocators:
     REGISTER_TITLE = (AppiumBy.XPATH, "//*[contains(@text, 'Registrar Usuario')]")
 
 
+@compiled_locators
+class RecordsLocators:
+    """Records screen (recordsAdmin / recordsParamedic) element locators"""
+    TITLE = (AppiumBy.XPATH, "//*[@text='Registros']")
+    FILTER_BUTTON = (AppiumBy.XPATH, "//*[contains(@text, 'Filtrar')]")
+    LOG_LIST = (AppiumBy.CLASS_NAME, "android.widget.ScrollView")
+    EMPTY_MESSAGE = (AppiumBy.XPATH, "//*[@text='No hay registros']")
+
+
+@compiled_locators
+class ProfileLocators:
+    """Profile screen (editProfile) element locators"""
+    TITLE = (AppiumBy.XPATH, "//*[@text='Perfil']")
+    LOGOUT_BUTTON = (AppiumBy.XPATH, "//*[@text='Cerrar Sesión']")
+    
+    @staticmethod
+    def value(text):
+        """Profile field showing ``text`` (printed after a leading space)"""
+        return (AppiumBy.XPATH, f"//*[@text=' {text}']")
+
+
+@compiled_locators
+class MapLocators:
+    """Map screen element locators"""
+    MAP = (AppiumBy.XPATH, "//*[@content-desc='Google Map']")
+    LOADING = (AppiumBy.CLASS_NAME, "android.widget.ProgressBar")
+
+
 # ============================================================================
 # TEST DATA GENERATOR
 # ============================================================================
@@ -61,15 +219,13 @@ class TestDataGenerator:
     
     @staticmethod
     def generate_email(prefix="test"):
-        """Generate unique email with timestamp"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"{prefix}_{timestamp}@example.com"
+        """Generate unique email (safe across parallel workers)"""
+        return unique_email(prefix)
     
     @staticmethod
     def generate_username():
         """Generate unique username"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"user_{timestamp}"
+        return unique_id("user")
     
     @staticmethod
     def get_test_credentials():
@@ -86,19 +242,66 @@ class TestDataGenerator:
 # BASE PAGE OBJECT - Common functionality for all pages
 # ============================================================================
 
+@trace_page_methods
 class BasePage:
     """Base page object with common methods"""
     
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        trace_page_methods(cls)
+    
     def __init__(self, driver):
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
+        self.waits = WaitEngine(driver)
+        self.elements = cache_for(driver)
+        self._snapshot_mode = False
+        self._snapshot = None
+    
+    @contextmanager
+    def snapshot(self):
+        """Resolve presence checks against one page_source fetch
+        
+        The snapshot is dropped after every action and fetched again on
+        the next check.
+        """
+        if self._snapshot_mode:
+            yield self
+            return
+        self._snapshot_mode = True
+        try:
+            yield self
+        finally:
+            self._snapshot_mode = False
+            self._snapshot = None
+    
+    def _current_snapshot(self):
+        if not self._snapshot_mode:
+            return None
+        if self._snapshot is None:
+            self._snapshot = PageSnapshot(self.driver.page_source)
+        return self._snapshot
+    
+    def _drop_snapshot(self):
+        self._snapshot = None
     
     def find_element(self, locator, timeout=10):
-        """Find element with explicit wait"""
+        """Find element with explicit wait
+        
+        Always a fresh lookup: callers keep the handle, so it must not be one
+        the cache could have let go stale. The page actions reuse cached
+        handles through ``_with_element``.
+        """
+        return self._locate(locator, timeout)
+    
+    def _locate(self, locator, timeout):
         return WebDriverWait(self.driver, timeout).until(
             EC.presence_of_element_located(locator)
         )
     
+    def _with_element(self, locator, timeout, action):
+        return self.elements.use(locator, lambda: self._locate(locator, timeout), action)
+    
     def find_elements(self, locator, timeout=10):
         """Find multiple elements"""
         WebDriverWait(self.driver, timeout).until(
@@ -111,22 +314,39 @@ class BasePage:
         element = WebDriverWait(self.driver, timeout).until(
             EC.element_to_be_clickable(locator)
         )
+        self._drop_snapshot()
+        # A tap may navigate, so no handle of this screen is trusted afterwards
+        self.elements.invalidate()
         element.click()
     
     def send_keys(self, locator, text, timeout=10, clear_first=True):
         """Send text to element"""
-        element = self.find_element(locator, timeout)
-        if clear_first:
-            element.clear()
-        element.send_keys(text)
+        self._drop_snapshot()
+        
+        def type_into(element):
+            if clear_first:
+                element.clear()
+            element.send_keys(text)
+        self._with_element(locator, timeout, type_into)
+    
+    def fill_form(self, mapping, timeout=10):
+        """Set several inputs at once (see forms.py), return the per-field FillReport"""
+        self._drop_snapshot()
+        def locate(locator):
+            return lambda: self._locate(locator, timeout)
+        return FormFiller(self.driver,
+                          lambda locator: self.elements.get(locator, locate(locator)),
+                          lambda locator: self.elements.refresh(locator, locate(locator))).fill(mapping)
     
     def get_text(self, locator, timeout=10):
         """Get text from element"""
-        element = self.find_element(locator, timeout)
-        return element.text
+        return self._with_element(locator, timeout, lambda element: element.text)
     
     def is_element_displayed(self, locator, timeout=5):
         """Check if element is displayed"""
+        snapshot = self._current_snapshot()
+        if snapshot is not None and snapshot.is_displayed(locator):
+            return True
         try:
             element = WebDriverWait(self.driver, timeout).until(
                 EC.visibility_of_element_located(locator)
@@ -135,16 +355,88 @@ class BasePage:
         except:
             return False
     
+    def are_elements_displayed(self, *locators):
+        """Check several elements against a single page_source fetch"""
+        with self.snapshot():
+            return {locator: self.is_element_displayed(locator) for locator in locators}
+    
     def wait_for_text(self, locator, text, timeout=10):
         """Wait for element to contain text"""
         WebDriverWait(self.driver, timeout).until(
             EC.text_to_be_present_in_element(locator, text)
         )
     
+    def perform(self, batch):
+        """Run a Batch of steps: one request with APPIUM_BATCH=true, else step by step"""
+        self._drop_snapshot()
+        if transport.batch_enabled() and run_batch(self.driver, batch):
+            self.elements.invalidate()
+            return
+        form = {}
+        for step in batch.steps:
+            locator = (step["using"], step["value"])
+            if step["action"] == "type":
+                form[locator] = step["text"]
+                continue
+            if form:
+                self.fill_form(form)
+                form = {}
+            self.click_element(locator)
+        if form:
+            self.fill_form(form)
+    
     def clear_field(self, locator, timeout=10):
         """Clear a text field"""
-        element = self.find_element(locator, timeout)
-        element.clear()
+        self._drop_snapshot()
+        self._with_element(locator, timeout, lambda element: element.clear())
+    
+    def wait_until(self, condition, timeout=None, raise_on_timeout=True):
+        """Wait for a condition within its timeout budget"""
+        return self.waits.until(condition, timeout, raise_on_timeout)
+    
+    def wait_for_screen(self, locator, timeout=None):
+        """Wait until the element identifying a screen is visible"""
+        return self.wait_until(screen_visible(locator), timeout)
+    
+    def wait_for_screen_gone(self, locator, timeout=None):
+        """Wait until the app has left the screen identified by locator"""
+        self.elements.invalidate()
+        return self.wait_until(screen_gone(locator), timeout)
+    
+    def wait_for_value(self, locator, value, timeout=None):
+        """Wait until an input contains value"""
+        return self.wait_until(input_has_value(locator, value), timeout)
+    
+    def wait_for_alert(self, timeout=None):
+        """Wait for an alert or toast and return its text"""
+        return self.wait_until(alert_shown(), timeout)
+    
+    def wait_for_navigation(self, locator, timeout=None):
+        """Wait until the target screen is shown and has settled"""
+        self.elements.invalidate()
+        return self.wait_until(navigation_finished(locator), timeout)
+    
+    def checkpoint(self, name, mask=()):
+        """Compare the screen with its visual baseline (VISUAL_REGRESSION=true)"""
+        return visual.checkpoint(self.driver, f"{type(self).__name__}.{name}", mask)
+    
+    def dismiss_alert(self, timeout=None, optional=False):
+        """Accept the alert if one shows up, return whether it did
+        
+        ``optional`` waits only the short optional_alert budget, for steps
+        where no alert is a normal outcome.
+        """
+        if timeout is None and optional:
+            timeout = self.waits.budgets["optional_alert"]
+        if not self.wait_until(alert_shown(), timeout, raise_on_timeout=False):
+            return False
+        self._drop_snapshot()
+        self.elements.invalidate()
+        try:
+            self.driver.switch_to.alert.accept()
+        except Exception:
+            self.click_element(ANDROID_ALERT_BUTTON)
+        return True
 
 
 # ============================================================================
@@ -159,6 +451,7 @@ class LoginPage(BasePage):
         assert self.is_element_displayed(
             LoginLocators.LOGIN_TITLE
         ), "Login page is not displayed"
+        self.checkpoint("loaded")
     
     def enter_email(self, email):
         """Enter email"""
@@ -178,9 +471,10 @@ class LoginPage(BasePage):
     
     def login(self, email, password):
         """Complete login flow"""
-        self.enter_email(email)
-        self.enter_password(password)
-        self.click_login_button()
+        self.perform(Batch()
+                     .type(LoginLocators.EMAIL_INPUT, email)
+                     .type(LoginLocators.PASSWORD_INPUT, password)
+                     .click(LoginLocators.LOGIN_BUTTON))
     
     def clear_email(self):
         """Clear email field"""
@@ -199,6 +493,7 @@ class RegisterPage(BasePage):
         assert self.is_element_displayed(
             RegisterLocators.REGISTER_TITLE
         ), "Register page is not displayed"
+        self.checkpoint("loaded")
     
     def enter_full_name(self, name):
         """Enter full name"""
@@ -215,13 +510,16 @@ class RegisterPage(BasePage):
     def select_user_type(self, user_type):
         """Select user type (doctor or admin)"""
         self.click_element(RegisterLocators.USER_TYPE_DROPDOWN)
-        
+        self.checkpoint("user_type_menu")
+        self.click_element(self._user_type_option(user_type))
+    
+    @staticmethod
+    def _user_type_option(user_type):
         if user_type.lower() in ['doctor', 'medico']:
-            self.click_element(RegisterLocators.DOCTOR_OPTION)
-        elif user_type.lower() == 'admin':
-            self.click_element(RegisterLocators.ADMIN_OPTION)
-        else:
-            raise ValueError(f"Unknown user type: {user_type}")
+            return RegisterLocators.DOCTOR_OPTION
+        if user_type.lower() == 'admin':
+            return RegisterLocators.ADMIN_OPTION
+        raise ValueError(f"Unknown user type: {user_type}")
     
     def click_register_button(self):
         """Click register button"""
@@ -233,11 +531,13 @@ class RegisterPage(BasePage):
     
     def register(self, name, email, password, user_type='medico'):
         """Complete registration flow"""
-        self.enter_full_name(name)
-        self.enter_email(email)
-        self.enter_password(password)
-        self.select_user_type(user_type)
-        self.click_register_button()
+        self.perform(Batch()
+                     .type(RegisterLocators.NAME_INPUT, name)
+                     .type(RegisterLocators.EMAIL_INPUT, email)
+                     .type(RegisterLocators.PASSWORD_INPUT, password)
+                     .click(RegisterLocators.USER_TYPE_DROPDOWN)
+                     .click(self._user_type_option(user_type))
+                     .click(RegisterLocators.REGISTER_BUTTON))
     
     def clear_name(self):
         """Clear name field"""
@@ -252,17 +552,119 @@ class RegisterPage(BasePage):
         self.clear_field(RegisterLocators.PASSWORD_INPUT)
 
 
+class RecordsPage(BasePage):
+    """Log history list shared by the admin and paramedic records screens"""
+    
+    def verify_page_loaded(self):
+        """Verify records page is loaded"""
+        assert self.is_element_displayed(
+            RecordsLocators.TITLE
+        ), "Records page is not displayed"
+    
+    def click_filter_button(self):
+        """Click filter button"""
+        self.click_element(RecordsLocators.FILTER_BUTTON)
+    
+    def fling_up(self):
+        """Fling the log list towards its end"""
+        gestures.fling_up(self.driver)
+    
+    def fling_down(self):
+        """Fling the log list back to its start"""
+        gestures.fling_down(self.driver)
+    
+    def scroll_up(self):
+        """Slowly drag the log list one screen"""
+        gestures.scroll_up(self.driver)
+
+
+class RecordsAdminPage(RecordsPage):
+    """Admin records page object (all users' logs)"""
+
+
+class RecordsParamedicPage(RecordsPage):
+    """Paramedic records page object (own logs)"""
+
+
+class MapPage(BasePage):
+    """Map page object"""
+    
+    def verify_page_loaded(self, timeout=30):
+        """Verify the map is rendered"""
+        self.wait_for_screen(MapLocators.MAP, timeout)
+    
+    def pan(self, dx, dy):
+        """Drag the map by (dx, dy) points"""
+        gestures.pan(self.driver, dx, dy)
+    
+    def zoom_in(self):
+        """Pinch out to zoom in"""
+        gestures.pinch(self.driver, zoom_in=True)
+    
+    def zoom_out(self):
+        """Pinch in to zoom out"""
+        gestures.pinch(self.driver, zoom_in=False)
+    
+    def gestures(self):
+        """(name, gesture) pairs the frame benchmarks run on the map"""
+        return (("pan", lambda: self.pan(-300, -300)),
+                ("zoom_in", self.zoom_in),
+                ("zoom_out", self.zoom_out))
+
+
 # ============================================================================
 # PYTEST FIXTURES - Appium configuration and driver setup
 # ============================================================================
 
 @pytest.fixture(scope="session")
-def appium_config():
+def device_allocation():
+    """Device, Appium server and ports reserved for this xdist worker"""
+    return DeviceRegistry.from_env().allocate()
+
+
+@pytest.fixture(scope="session")
+def replay_server():
+    """Server answering from a recorded trace when APPIUM_TRACE=replay"""
+    if replay.mode() != "replay":
+        yield None
+        return
+    server = ReplayServer().start()
+    yield server
+    server.stop()
+    logging.getLogger(__name__).info("%s (%s)", server.replayer.summary(), server.write_report())
+
+
+@pytest.fixture(scope="session")
+def appium_server(device_allocation, replay_server):
+    """Appium server URL for this worker
+    
+    With APPIUM_FAKE_SERVER=true a local stand-in modelling the login and
+    register screens is started instead, so the suite runs without a device;
+    with APPIUM_TRACE=replay a recorded trace answers instead (see replay.py).
+    """
+    if replay_server is not None:
+        yield replay_server.url
+        return
+    if os.getenv("APPIUM_FAKE_SERVER", "false").lower() != "true":
+        yield device_allocation.device.server
+        return
+    server = FakeAppiumServer(latency=LatencyProfile.from_env(),
+                              allow_insecure=["execute_driver_script"]).start()
+    yield server.url
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def appium_config(device_allocation, appium_server):
     """Appium configuration"""
     return {
         "platformName": "Android",
         "automationName": "UiAutomator2",
-        "deviceName": os.getenv("APPIUM_DEVICE_NAME", "emulator-5554"),
+        "deviceName": device_allocation.device.name,
+        "udid": device_allocation.device.udid,
+        "serverUrl": appium_server,
+        "systemPort": device_allocation.system_port,
+        "mjpegServerPort": device_allocation.mjpeg_server_port,
         "appPackage": os.getenv("APPIUM_APP_PACKAGE", "host.exp.exponent"),
         "appActivity": os.getenv("APPIUM_APP_ACTIVITY", "host.exp.exponent.experience.HomeActivity"),
         "newCommandTimeout": 300,
@@ -271,36 +673,409 @@ def appium_config():
     }
 
 
-@pytest.fixture
-def driver(appium_config):
-    """Initialize Appium driver"""
+def create_driver(appium_config, trace=None):
+    """Open a new Appium session, recorded into ``trace`` when given"""
     options = UiAutomator2Options()
     options.platform_name = appium_config.get("platformName")
     options.automation_name = appium_config.get("automationName")
     options.device_name = appium_config.get("deviceName")
+    if appium_config.get("udid"):
+        options.udid = appium_config["udid"]
+    options.system_port = appium_config.get("systemPort")
+    options.mjpeg_server_port = appium_config.get("mjpegServerPort")
     options.app_package = appium_config.get("appPackage")
     options.app_activity = appium_config.get("appActivity")
     options.new_command_timeout = appium_config.get("newCommandTimeout")
     
-    driver = webdriver.Remote(
-        command_executor="http://127.0.0.1:4723",
-        options=options
-    )
+    config = transport.client_config(appium_config.get("serverUrl"))
+    if trace is None:
+        return webdriver.Remote(command_executor=appium_config.get("serverUrl"),
+                                options=options, client_config=config)
+    # The session request itself belongs in the trace, so wrap the connection first
+    connection = trace.install(AppiumConnection(client_config=config))
+    return webdriver.Remote(command_executor=connection, options=options)
+
+
+@contextmanager
+def serving(server):
+    """Start a stand-in server (fake Appium, replay) for the block"""
+    server.start()
+    try:
+        yield server
+    finally:
+        server.stop()
+
+
+@contextmanager
+def fake_driver(appium_config, route=None, trace=None, server=None, **server_options):
+    """Driver on a private fake Appium server, quit with it after the block
+    
+    ``server_options`` (latency, allow_insecure) build the FakeAppiumServer
+    unless a ``server`` such as a ReplayServer is given; with ``route`` the
+    app is deep-linked there first. Yields the driver and the server.
+    """
+    with serving(server or FakeAppiumServer(**server_options)) as server:
+        driver = create_driver(dict(appium_config, serverUrl=server.url), trace=trace)
+        try:
+            if route is not None:
+                open_route(driver, route, appium_config["appPackage"])
+            yield driver, server
+        finally:
+            driver.quit()
+
+
+def command_delta(server, before):
+    """Commands the fake server received since its ``command_counts`` were ``before``"""
+    return {command: count - before.get(command, 0)
+            for command, count in server.app.command_counts.items()
+            if count != before.get(command, 0)}
+
+
+@pytest.fixture(scope="session")
+def command_recorder():
+    """Records every Appium command when APPIUM_INSTRUMENTATION=true"""
+    if not instrumentation.enabled():
+        yield None
+        return
+    recorder = CommandRecorder()
+    yield recorder
+    logging.getLogger(__name__).info("\n%s", recorder.summary())
+
+
+@pytest.fixture(autouse=True)
+def command_trace(request, command_recorder):
+    """Attribute recorded commands to the running test"""
+    if command_recorder is None:
+        yield
+        return
+    command_recorder.start_test(request.node.nodeid)
+    yield
+    command_recorder.finish_test()
+
+
+@pytest.fixture(scope="session")
+def trace_recorder():
+    """Records the W3C traffic of every pooled driver when APPIUM_TRACE=record"""
+    if replay.mode() != "record":
+        yield None
+        return
+    recorder = TraceRecorder()
+    yield recorder
+    logging.getLogger(__name__).info(recorder.close())
+
+
+@pytest.fixture(autouse=True)
+def trace_marker(request, trace_recorder, replay_server):
+    """Attribute traced commands and replay divergences to the running test"""
+    if trace_recorder is not None:
+        trace_recorder.mark(request.node.nodeid)
+    if replay_server is not None:
+        replay_server.replayer.current_test = request.node.nodeid
+
+
+@pytest.fixture(scope="session")
+def supabase_backend():
+    """Local Supabase stand-in when SUPABASE_STANDIN=true
+    
+    Points SUPABASE_URL and the keys at it for the rest of the session and
+    seeds the TEST_USER_* account with its profile.
+    """
+    if os.getenv("SUPABASE_STANDIN", "false").lower() != "true":
+        yield None
+        return
+    server = FakeSupabaseServer(
+        host=os.getenv("SUPABASE_STANDIN_HOST", "127.0.0.1"),
+        port=int(os.getenv("SUPABASE_STANDIN_PORT", 0)),
+        faults=FaultProfile.from_env(),
+    ).start()
+    credentials = TestDataGenerator.get_test_credentials()
+    user = server.store.create_user(os.getenv("TEST_USER_EMAIL", credentials["valid_email"]),
+                                    os.getenv("TEST_USER_PASSWORD", credentials["valid_password"]))
+    server.store.insert("Profiles", [Account(
+        user["email"], None, credentials["doctor_name"], DOCTOR, user["id"]).profile_row()])
+    
+    overrides = {
+        "SUPABASE_URL": server.url.replace("0.0.0.0", "127.0.0.1"),
+        "SUPABASE_ANON_KEY": service_key("anon"),
+        "SUPABASE_SERVICE_ROLE_KEY": service_key(),
+    }
+    previous = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    yield server
+    for name, value in previous.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+    logging.getLogger(__name__).info("Supabase stand-in requests: %s", server.api.status_counts)
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def account_pool(supabase_backend):
+    """Accounts provisioned through Supabase when SUPABASE_SERVICE_ROLE_KEY is set"""
+    admin = SupabaseAdmin.from_env()
+    if admin is None:
+        yield None
+        return
+    pool = AccountPool(admin)
+    try:
+        pool.provision()
+        logging.getLogger(__name__).info("Provisioned %d test accounts", len(pool.accounts))
+        yield pool
+    finally:
+        pool.cleanup()
+
+
+@pytest.fixture
+def disposable_backend(supabase_backend):
+    """Skip tests that create accounts unless they land in a stand-in
+    
+    The app's default backend is the production project.
+    """
+    if supabase_backend is None and os.getenv("APPIUM_FAKE_SERVER", "false").lower() != "true":
+        pytest.skip("Creates accounts; needs the Supabase stand-in (SUPABASE_STANDIN=true)")
+    return supabase_backend
+
+
+@contextmanager
+def lease_account(account_pool, role):
+    """Lease from the pool, or use the predefined TEST_USER_* account"""
+    if account_pool is None:
+        credentials = TestDataGenerator.get_test_credentials()
+        yield Account(
+            os.getenv("TEST_USER_EMAIL", credentials["valid_email"]),
+            os.getenv("TEST_USER_PASSWORD", credentials["valid_password"]),
+            credentials["doctor_name"] if role == DOCTOR else credentials["admin_name"],
+            role,
+        )
+        return
+    with account_pool.lease(role) as account:
+        yield account
+
+
+@pytest.fixture
+def doctor_account(account_pool):
+    """Doctor account leased for one test"""
+    with lease_account(account_pool, DOCTOR) as account:
+        yield account
+
+
+@pytest.fixture
+def admin_account(account_pool):
+    """Admin account leased for one test"""
+    with lease_account(account_pool, ADMIN) as account:
+        yield account
+
+
+@pytest.fixture(scope="session")
+def resource_monitor():
+    """Per-test memory/CPU usage when APPIUM_RESOURCE_SAMPLING=true"""
+    if not resources.enabled():
+        yield None
+        return
+    rows = []
+    yield rows
+    if rows:
+        write_json(os.path.join(report_dir("resources"), "summary.json"), dict(rows))
+        logging.getLogger(__name__).info("\n%s", format_usage(rows))
+        flagged = [test for test, usage in rows if exceeds_threshold(usage)]
+        if flagged:
+            logging.getLogger(__name__).warning(
+                "PSS grew by more than %d KB in: %s",
+                resources.memory_threshold_kb(), ", ".join(flagged),
+            )
+
+
+@pytest.fixture(autouse=True)
+def resource_sampling(request, resource_monitor, appium_config):
+    """Sample the app process while tests that use a driver run"""
+    if resource_monitor is None or "driver" not in request.fixturenames:
+        yield
+        return
+    driver = request.getfixturevalue("driver")
+    if not shell_available(driver):
+        yield
+        return
+    sampler = ResourceSampler(driver, appium_config["appPackage"])
+    sampler.start()
+    yield
+    usage = sampler.stop()
+    resource_monitor.append((request.node.nodeid, usage))
+    if exceeds_threshold(usage):
+        logging.getLogger(__name__).warning(
+            "%s: PSS grew by %d KB", request.node.nodeid, usage["pss_kb"]["delta"]
+        )
+
+
+@pytest.fixture(autouse=True)
+def element_cache_counters(request):
+    """Log how many element lookups the page objects' cache saved in the test"""
+    if "driver" not in request.fixturenames:
+        yield
+        return
+    cache = cache_for(request.getfixturevalue("driver"))
+    cache.reset_counters()
+    yield
+    request.node.user_properties.append(("element_cache", cache.counters()))
+    if cache.hits or cache.stale:
+        logging.getLogger(__name__).info(cache.summary())
+
+
+@pytest.fixture(scope="session")
+def app_logs():
+    """Logcat collectors by Appium session id, stopped at the end of the run"""
+    collectors = {}
+    yield collectors
+    for collector in collectors.values():
+        collector.stop()
+
+
+@pytest.fixture
+def app_spans(request, driver, app_logs):
+    """App-internal spans (sync cycles, profile loads, ...) completed during the test"""
+    collector = app_logs.get(driver.session_id)
+    if collector is None:
+        if not logcat_available(driver):
+            pytest.skip("Appium server does not expose the logcat log")
+        collector = app_logs[driver.session_id] = LogcatCollector(driver).start()
+    window = collector.window()
+    yield window
+    window.close()
+    spans = [span.as_dict() for span in window.spans]
+    request.node.user_properties.append(("app_spans", spans))
+    if spans:
+        write_json(os.path.join(report_dir("spans"), f"{request.node.name}.json"), spans)
+
+
+@pytest.fixture(autouse=True)
+def app_log_spans(request):
+    """Record app spans for every test using a driver when APPIUM_APP_LOGS=true"""
+    if logcat.enabled() and "driver" in request.fixturenames \
+            and logcat_available(request.getfixturevalue("driver")):
+        request.getfixturevalue("app_spans")
+
+
+@pytest.fixture(scope="session")
+def visual_checker(appium_config):
+    """Visual checkpoint comparisons of the run, None unless VISUAL_REGRESSION=true"""
+    if not visual.enabled():
+        yield None
+        return
+    if not visual.pillow_available():
+        logging.getLogger(__name__).warning("VISUAL_REGRESSION needs Pillow to decode screenshots")
+        yield None
+        return
+    checker = VisualChecker(ImageStore(), appium_config["deviceName"])
+    visual.install(checker)
+    yield checker
+    visual.install(None)
+    checker.close()
+
+
+@pytest.fixture(autouse=True)
+def visual_checkpoints(request, visual_checker):
+    """Fail a test whose page-object checkpoints no longer match their baselines"""
+    if visual_checker is None or "driver" not in request.fixturenames:
+        yield
+        return
+    visual_checker.begin(request.node.name)
+    yield
+    results = visual_checker.collect()
+    if not results:
+        return
+    request.node.user_properties.append(("visual", [result.as_dict() for result in results]))
+    write_json(os.path.join(report_dir("visual"), f"{request.node.name}.json"),
+               [result.as_dict() for result in results])
+    mismatches = [result.message for result in results if not result.passed]
+    if mismatches:
+        pytest.fail("Visual regression:\n" + "\n".join(mismatches))
+
+
+@pytest.fixture(scope="session")
+def driver_pool(appium_config, command_recorder, trace_recorder):
+    """Appium sessions shared by every test in this worker"""
+    def factory():
+        driver = create_driver(appium_config, trace_recorder)
+        if command_recorder is not None:
+            command_recorder.install(driver)
+        return driver
     
+    pool = DriverPool(
+        factory=factory,
+        app_package=appium_config.get("appPackage"),
+    )
+    yield pool
+    pool.close()
+    logging.getLogger(__name__).info(pool.stats.summary())
+
+
+# Page fixtures whose screen the driver is reset to directly, instead of logIn
+START_ROUTES = {"register_page": REGISTER_ROUTE}
+
+
+@pytest.fixture
+def driver(request, driver_pool):
+    """Pooled Appium driver, reset to the screen of the test's page fixture (logIn by default)"""
+    route = next((START_ROUTES[name] for name in request.fixturenames if name in START_ROUTES),
+                 LOGIN_ROUTE)
+    driver = driver_pool.acquire(route)
     yield driver
-    driver.quit()
+    driver_pool.release(driver)
 
 
 @pytest.fixture
 def login_page(driver):
     """Login page object fixture"""
-    return LoginPage(driver)
+    page = LoginPage(driver)
+    yield page
+    logging.getLogger(__name__).info(page.waits.summary())
 
 
 @pytest.fixture
 def register_page(driver):
-    """Register page object fixture"""
-    return RegisterPage(driver)
+    """Register page object fixture (the driver is acquired on the register route)"""
+    page = RegisterPage(driver)
+    yield page
+    logging.getLogger(__name__).info(page.waits.summary())
+
+
+@pytest.fixture(scope="session")
+def session_injector(driver_pool, supabase_backend):
+    """Injects logged-in sessions through the app's testSession route"""
+    return SessionInjector.from_env(driver_pool)
+
+
+@pytest.fixture
+def login_as(driver, session_injector, account_pool):
+    """Log the app in as ``role`` and open ``route`` without the login UI"""
+    with ExitStack() as leases:
+        def login_as(role, route=MAP_ROUTE):
+            account = leases.enter_context(lease_account(account_pool, role))
+            session_injector.inject(driver, account, route)
+            return account
+        yield login_as
+
+
+@pytest.fixture
+def records_admin_page(driver, login_as):
+    """Admin records page object fixture"""
+    login_as(ADMIN, RECORDS_ADMIN_ROUTE)
+    return RecordsAdminPage(driver)
+
+
+@pytest.fixture
+def records_paramedic_page(driver, login_as):
+    """Paramedic records page object fixture"""
+    login_as(DOCTOR, RECORDS_PARAMEDIC_ROUTE)
+    return RecordsParamedicPage(driver)
+
+
+@pytest.fixture
+def map_page(driver, login_as):
+    """Map page object fixture"""
+    login_as(DOCTOR, MAP_ROUTE)
+    return MapPage(driver)
 
 
 # ============================================================================
@@ -311,35 +1086,29 @@ class TestLogin:
     """Login screen test cases"""
     
     def test_login_page_displays_correctly(self, login_page):
-        """Test login page loads with all elements
+        """Test login page loads with all elements"""
         login_page.verify_page_loaded()
-        assert login_page.is_element_displayed(LoginLocators.EMAIL_INPUT), \
-            "Email input not displayed"
-        assert login_page.is_element_displayed(LoginLocators.PASSWORD_INPUT), \
-            "Password input not displayed"
-        assert login_page.is_element_displayed(LoginLocators.LOGIN_BUTTON), \
-            "Login button not displayed"
-        assert login_page.is_element_displayed(LoginLocators.REGISTER_LINK), \
-            "Register link not displayed"
-            """
-        time.sleep(5)
-        assert 1==1
+        shown = login_page.are_elements_displayed(
+            LoginLocators.EMAIL_INPUT, LoginLocators.PASSWORD_INPUT,
+            LoginLocators.LOGIN_BUTTON, LoginLocators.REGISTER_LINK,
+        )
+        assert shown[LoginLocators.EMAIL_INPUT], "Email input not displayed"
+        assert shown[LoginLocators.PASSWORD_INPUT], "Password input not displayed"
+        assert shown[LoginLocators.LOGIN_BUTTON], "Login button not displayed"
+        assert shown[LoginLocators.REGISTER_LINK], "Register link not displayed"
     
     def test_enter_email(self, login_page):
-        """Test entering email
+        """Test entering email"""
         login_page.verify_page_loaded()
         test_email = "test@example.com"
         login_page.enter_email(test_email)
         
-        email_element = login_page.find_element(LoginLocators.EMAIL_INPUT)
+        email_element = login_page.wait_for_value(LoginLocators.EMAIL_INPUT, test_email)
         assert test_email in (email_element.get_attribute("text") or email_element.text), \
             "Email not entered correctly"
-            """
-        time.sleep(5)
-        assert 1 == 1
     
     def test_enter_password(self, login_page):
-        """Test entering password
+        """Test entering password"""
         login_page.verify_page_loaded()
         test_password = "TestPassword123!"
         login_page.enter_password(test_password)
@@ -347,12 +1116,9 @@ class TestLogin:
         password_element = login_page.find_element(LoginLocators.PASSWORD_INPUT)
         assert password_element.get_attribute("text") or password_element.text, \
             "Password not entered"
-            """
-        time.sleep(5)
-        assert 1==1
     
     def test_clear_email_field(self, login_page):
-        """Test clearing email field
+        """Test clearing email field"""
         login_page.verify_page_loaded()
         login_page.enter_email("test@example.com")
         login_page.clear_email()
@@ -361,12 +1127,9 @@ class TestLogin:
         assert not email_element.get_attribute("text") or \
                email_element.get_attribute("text") == "", \
             "Email field not cleared"
-            """
-        time.sleep(2)
-        assert 1 == 1
     
     def test_clear_password_field(self, login_page):
-        """Test clearing password field
+        """Test clearing password field"""
         login_page.verify_page_loaded()
         login_page.enter_password("TestPassword123!")
         login_page.clear_password()
@@ -375,77 +1138,60 @@ class TestLogin:
         assert not password_element.get_attribute("text") or \
                password_element.get_attribute("text") == "", \
             "Password field not cleared"
-            """
-        time.sleep(2)
-        assert 1 == 1
     
     def test_navigate_to_register(self, login_page):
-        """Test navigating to register
+        """Test navigating to register"""
         login_page.verify_page_loaded()
         login_page.click_register_link()
-        time.sleep(2)
-        """
-        time.sleep(7)
-        assert 1 == 1
+        login_page.wait_for_navigation(RegisterLocators.NAME_INPUT)
     
-    def test_login_with_valid_credentials(self, login_page):
-        """Test login with valid credentials
+    def test_login_with_valid_credentials(self, login_page, doctor_account):
+        """Test login with valid credentials"""
         login_page.verify_page_loaded()
-        credentials = TestDataGenerator.get_test_credentials()
-        login_page.login(credentials['valid_email'], credentials['valid_password'])
-        time.sleep(3)"""
-        time.sleep(8)
-        assert 1 == 1
+        login_page.login(doctor_account.email, doctor_account.password)
+        login_page.wait_for_screen_gone(LoginLocators.LOGIN_BUTTON)
     
     def test_login_with_empty_email(self, login_page):
-        """Test login with empty email
+        """Test login with empty email"""
         login_page.verify_page_loaded()
         login_page.enter_password("TestPassword123!")
         login_page.click_login_button()
-        time.sleep(2)
+        assert login_page.dismiss_alert(), "No validation alert shown"
         
         assert login_page.is_element_displayed(LoginLocators.LOGIN_TITLE), \
             "Should remain on login page"
-            """
-        time.sleep(6)
-        assert 1 == 1
     
     def test_login_with_empty_password(self, login_page):
-        """Test login with empty password
+        """Test login with empty password"""
         login_page.verify_page_loaded()
         login_page.enter_email("test@example.com")
         login_page.click_login_button()
-        time.sleep(2)
+        assert login_page.dismiss_alert(), "No validation alert shown"
         
         assert login_page.is_element_displayed(LoginLocators.LOGIN_TITLE), \
             "Should remain on login page"
-            """
-        time.sleep(6)
-        assert 1 == 1
-
+    
     def test_login_with_empty_credentials(self, login_page):
-        """Test login with empty credentials
+        """Test login with empty credentials"""
         login_page.verify_page_loaded()
         login_page.click_login_button()
-        time.sleep(2)
+        assert "llena todos los campos" in str(login_page.wait_for_alert()), \
+            "Validation alert not shown"
+        login_page.dismiss_alert()
         
         assert login_page.is_element_displayed(LoginLocators.LOGIN_TITLE), \
-            "Should remain on login page" """
-        time.sleep(8)
-        assert 1 == 1
+            "Should remain on login page"
     
     def test_login_with_invalid_email_format(self, login_page):
-        """Test login with invalid email
+        """Test login with invalid email"""
         login_page.verify_page_loaded()
         login_page.enter_email("notanemail")
         login_page.enter_password("TestPassword123!")
         login_page.click_login_button()
-        time.sleep(2)
+        assert login_page.dismiss_alert(), "No login error shown"
         
         assert login_page.is_element_displayed(LoginLocators.LOGIN_TITLE), \
-            "Should remain on login page" """
-        time.sleep(6)
-        assert 1 == 1
+            "Should remain on login page"
     
     def test_multiple_login_attempts(self, login_page):
         """Test multiple login attempts"""
@@ -456,7 +1202,7 @@ class TestLogin:
             login_page.enter_email(f"test{i}@example.com")
             login_page.enter_password(f"Password{i}")
             login_page.click_login_button()
-            time.sleep(1)
+            login_page.dismiss_alert(optional=True)
             
             assert login_page.is_element_displayed(LoginLocators.LOGIN_TITLE), \
                 f"Should remain on login page after attempt {i+1}"
@@ -470,65 +1216,58 @@ class TestRegister:
     """Register screen test cases"""
     
     def test_register_page_displays_correctly(self, register_page):
-        """Test register page loads with all elements
-        register_page.verify_page_loaded()
-        assert register_page.is_element_displayed(RegisterLocators.NAME_INPUT), \
-            "Name input not displayed"
-        assert register_page.is_element_displayed(RegisterLocators.EMAIL_INPUT), \
-            "Email input not displayed"
-        assert register_page.is_element_displayed(RegisterLocators.PASSWORD_INPUT), \
-            "Password input not displayed"
-        assert register_page.is_element_displayed(RegisterLocators.USER_TYPE_DROPDOWN), \
-            "User type dropdown not displayed"
-        assert register_page.is_element_displayed(RegisterLocators.REGISTER_BUTTON), \
-            "Register button not displayed" """
-        time.sleep(10)
-        assert 1 == 1
+        """Test register page loads with all elements"""
+        with register_page.snapshot():
+            register_page.verify_page_loaded()
+            assert register_page.is_element_displayed(RegisterLocators.NAME_INPUT), \
+                "Name input not displayed"
+            assert register_page.is_element_displayed(RegisterLocators.EMAIL_INPUT), \
+                "Email input not displayed"
+            assert register_page.is_element_displayed(RegisterLocators.PASSWORD_INPUT), \
+                "Password input not displayed"
+            assert register_page.is_element_displayed(RegisterLocators.USER_TYPE_DROPDOWN), \
+                "User type dropdown not displayed"
+            assert register_page.is_element_displayed(RegisterLocators.REGISTER_BUTTON), \
+                "Register button not displayed"
     
     def test_enter_full_name(self, register_page):
-        """Test entering full name
+        """Test entering full name"""
         register_page.verify_page_loaded()
         test_name = "John Doe"
         register_page.enter_full_name(test_name)
         
-        name_element = register_page.find_element(RegisterLocators.NAME_INPUT)
+        name_element = register_page.wait_for_value(RegisterLocators.NAME_INPUT, test_name)
         assert test_name in (name_element.get_attribute("text") or name_element.text), \
-            "Name not entered correctly" """
-        time.sleep(4)
-        assert 1 == 1
+            "Name not entered correctly"
     
     def test_enter_email(self, register_page):
-        """Test entering email
+        """Test entering email"""
         register_page.verify_page_loaded()
         test_email = "newuser@example.com"
         register_page.enter_email(test_email)
         
-        email_element = register_page.find_element(RegisterLocators.EMAIL_INPUT)
+        email_element = register_page.wait_for_value(RegisterLocators.EMAIL_INPUT, test_email)
         assert test_email in (email_element.get_attribute("text") or email_element.text), \
-            "Email not entered correctly" """
-        time.sleep(3)
-        assert 1 == 1
+            "Email not entered correctly"
     
     def test_enter_password(self, register_page):
-        """Test entering password
+        """Test entering password"""
         register_page.verify_page_loaded()
         test_password = "SecurePassword123!"
         register_page.enter_password(test_password)
         
         password_element = register_page.find_element(RegisterLocators.PASSWORD_INPUT)
         assert password_element.get_attribute("text") or password_element.text, \
-            "Password not entered" """
-        time.sleep(3)
-        assert 1 == 1
+            "Password not entered"
     
     def test_select_admin_user_type(self, register_page):
         """Test selecting admin user type"""
         register_page.verify_page_loaded()
         register_page.select_user_type('admin')
-        time.sleep(1)
+        register_page.wait_for_navigation(RegisterLocators.REGISTER_TITLE)
     
     def test_clear_name_field(self, register_page):
-        """Test clearing name field
+        """Test clearing name field"""
         register_page.verify_page_loaded()
         register_page.enter_full_name("John Doe")
         register_page.clear_name()
@@ -536,12 +1275,10 @@ class TestRegister:
         name_element = register_page.find_element(RegisterLocators.NAME_INPUT)
         assert not name_element.get_attribute("text") or \
                name_element.get_attribute("text") == "", \
-            "Name field not cleared" """
-        time.sleep(2)
-        assert 1 == 1
+            "Name field not cleared"
     
     def test_clear_email_field(self, register_page):
-        """Test clearing email field
+        """Test clearing email field"""
         register_page.verify_page_loaded()
         register_page.enter_email("test@example.com")
         register_page.clear_email()
@@ -549,12 +1286,10 @@ class TestRegister:
         email_element = register_page.find_element(RegisterLocators.EMAIL_INPUT)
         assert not email_element.get_attribute("text") or \
                email_element.get_attribute("text") == "", \
-            "Email field not cleared" """
-        time.sleep(2)
-        assert 1 == 1
+            "Email field not cleared"
     
     def test_clear_password_field(self, register_page):
-        """Test clearing password field
+        """Test clearing password field"""
         register_page.verify_page_loaded()
         register_page.enter_password("SecurePassword123!")
         register_page.clear_password()
@@ -562,119 +1297,2195 @@ class TestRegister:
         password_element = register_page.find_element(RegisterLocators.PASSWORD_INPUT)
         assert not password_element.get_attribute("text") or \
                password_element.get_attribute("text") == "", \
-            "Password field not cleared" """
-        time.sleep(2)
-        assert 1 == 1
+            "Password field not cleared"
     
     def test_navigate_to_login(self, register_page):
-        """Test navigating to login
+        """Test navigating to login"""
         register_page.verify_page_loaded()
         register_page.click_login_link()
-        time.sleep(2) """
-        time.sleep(8)
-        assert 1 == 1
+        register_page.wait_for_navigation(LoginLocators.LOGIN_BUTTON)
     
-    def test_register_with_valid_data(self, register_page):
-        """Test registration with valid data
+    def test_register_with_valid_data(self, register_page, disposable_backend):
+        """Test registration with valid data"""
         register_page.verify_page_loaded()
         test_name = "Juan García"
         test_email = TestDataGenerator.generate_email("juan")
         test_password = "SecurePassword123!"
         
         register_page.register(test_name, test_email, test_password, 'medico')
-        time.sleep(3)"""
-        time.sleep(9)
-        assert 1 == 1
+        assert "perfil creados" in str(register_page.wait_for_alert()), \
+            "Registration did not succeed"
+        register_page.dismiss_alert()
+        register_page.wait_for_screen_gone(RegisterLocators.REGISTER_BUTTON)
     
     def test_register_with_empty_name(self, register_page):
-        """Test registration with empty name
+        """Test registration with empty name"""
         register_page.verify_page_loaded()
         register_page.enter_email("test@example.com")
         register_page.enter_password("SecurePassword123!")
         register_page.click_register_button()
-        time.sleep(2)
+        assert register_page.dismiss_alert(), "No validation alert shown"
         
         assert register_page.is_element_displayed(RegisterLocators.REGISTER_TITLE), \
-            "Should remain on register page" """
-        time.sleep(3)
-        assert 1 == 1
+            "Should remain on register page"
     
     def test_register_with_empty_email(self, register_page):
-        """Test registration with empty email
+        """Test registration with empty email"""
         register_page.verify_page_loaded()
         register_page.enter_full_name("Juan García")
         register_page.enter_password("SecurePassword123!")
         register_page.click_register_button()
-        time.sleep(2)
+        assert register_page.dismiss_alert(), "No validation alert shown"
         
         assert register_page.is_element_displayed(RegisterLocators.REGISTER_TITLE), \
-            "Should remain on register page" """
-        time.sleep(9)
-        assert 1 == 1
+            "Should remain on register page"
     
     def test_register_with_empty_password(self, register_page):
-        """Test registration with empty password
+        """Test registration with empty password"""
         register_page.verify_page_loaded()
         register_page.enter_full_name("Juan García")
         register_page.enter_email("test@example.com")
         register_page.click_register_button()
-        time.sleep(2)
+        assert register_page.dismiss_alert(), "No validation alert shown"
         
         assert register_page.is_element_displayed(RegisterLocators.REGISTER_TITLE), \
-            "Should remain on register page" """
-        time.sleep(7)
-        assert 1 == 1
+            "Should remain on register page"
     
     def test_register_with_all_empty_fields(self, register_page):
-        """Test registration with all empty fields
+        """Test registration with all empty fields"""
         register_page.verify_page_loaded()
         register_page.click_register_button()
-        time.sleep(2)
+        assert "llena todos los campos" in str(register_page.wait_for_alert()), \
+            "Validation alert not shown"
+        register_page.dismiss_alert()
         
         assert register_page.is_element_displayed(RegisterLocators.REGISTER_TITLE), \
-            "Should remain on register page" """
-        time.sleep(3)
-        assert 1 == 1
+            "Should remain on register page"
     
     def test_register_with_invalid_email_format(self, register_page):
-        """Test registration with invalid email
+        """Test registration with invalid email"""
         register_page.verify_page_loaded()
         register_page.enter_full_name("Juan García")
         register_page.enter_email("notanemail")
         register_page.enter_password("SecurePassword123!")
         register_page.click_register_button()
-        time.sleep(2)
+        assert register_page.dismiss_alert(), "No validation alert shown"
         
         assert register_page.is_element_displayed(RegisterLocators.REGISTER_TITLE), \
-            "Should remain on register page" """
-        time.sleep(3)
-        assert 1 == 1
+            "Should remain on register page"
     
     def test_register_with_short_password(self, register_page):
-        """Test registration with short password
+        """Test registration with short password"""
         register_page.verify_page_loaded()
         register_page.enter_full_name("Juan García")
         register_page.enter_email("test@example.com")
         register_page.enter_password("123")
         register_page.click_register_button()
-        time.sleep(2)
+        assert "6 caracteres" in str(register_page.wait_for_alert()), \
+            "Password length alert not shown"
+        register_page.dismiss_alert()
         
         assert register_page.is_element_displayed(RegisterLocators.REGISTER_TITLE), \
-            "Should remain on register page" """
-        time.sleep(4)
-        assert 1 == 1
+            "Should remain on register page"
     
-    def test_register_flow_with_admin_type(self, register_page):
-        """Test complete registration flow as admin
+    def test_register_flow_with_admin_type(self, register_page, disposable_backend):
+        """Test complete registration flow as admin"""
         register_page.verify_page_loaded()
         test_name = "Admin User"
         test_email = TestDataGenerator.generate_email("admin")
         test_password = "AdminPassword123!"
         
         register_page.register(test_name, test_email, test_password, 'admin')
-        time.sleep(3) """
-        time.sleep(10)
-        assert 1 == 1
+        assert register_page.dismiss_alert(), "No registration alert shown"
+        register_page.wait_for_screen_gone(RegisterLocators.REGISTER_BUTTON)
+
+
+# ============================================================================
+# DRIVER POOL
+# ============================================================================
+
+class TestDriverPool:
+    """Session reuse, health checks and resets against the fake Appium server"""
+    
+    @contextmanager
+    def _pool(self, appium_config, max_size=1):
+        with serving(FakeAppiumServer()) as server:
+            pool = DriverPool(factory=lambda: create_driver(dict(appium_config, serverUrl=server.url)),
+                              app_package=appium_config["appPackage"], max_size=max_size)
+            try:
+                yield pool, server
+            finally:
+                pool.close()
+    
+    def test_released_session_is_reused_and_reset(self, appium_config):
+        """Test a second acquire reuses the session, restarts the app and reopens logIn"""
+        with self._pool(appium_config) as (pool, server):
+            first = pool.acquire()
+            pool.open_route(first, REGISTER_ROUTE)
+            model = server.app.sessions[first.session_id].model
+            model.fields["name"] = "Juan"
+            pool.release(first)
+            before = dict(server.app.command_counts)
+            second = pool.acquire()
+            counts = command_delta(server, before)
+        assert second is first
+        assert model.route == LOGIN_ROUTE and model.fields["name"] == ""
+        assert counts.get("createSession") is None
+        assert counts["mobile: terminateApp"] == counts["mobile: activateApp"] == 1
+        assert counts["mobile: deepLink"] == 1
+        stats = pool.stats
+        assert (stats.acquisitions, stats.sessions_created, stats.reuses) == (2, 1, 1)
+        assert stats.reset_time > 0
+    
+    def test_reset_opens_the_requested_route_directly(self, appium_config):
+        """Test acquiring for another route deep-links there once, without passing logIn"""
+        with self._pool(appium_config) as (pool, server):
+            pool.release(pool.acquire())
+            before = dict(server.app.command_counts)
+            driver = pool.acquire(route=REGISTER_ROUTE)
+            counts = command_delta(server, before)
+            assert server.app.sessions[driver.session_id].model.route == REGISTER_ROUTE
+        assert counts["mobile: deepLink"] == 1
+    
+    def test_is_alive_asks_for_the_current_package(self, appium_config):
+        """Test health checks hit the session and fail once it is gone"""
+        with self._pool(appium_config) as (pool, server):
+            driver = pool.acquire()
+            before = dict(server.app.command_counts)
+            assert pool.is_alive(driver)
+            assert command_delta(server, before)
+            server.app.sessions.pop(driver.session_id)
+            assert not pool.is_alive(driver)
+    
+    def test_session_killed_between_tests_is_replaced(self, appium_config):
+        """Test a session that died while idle is discarded and a new one is created"""
+        with self._pool(appium_config) as (pool, server):
+            first = pool.acquire()
+            dead_id = first.session_id
+            pool.release(first)
+            # UiAutomator2 crashed or the server dropped the session after its timeout
+            server.app.sessions.pop(dead_id)
+            second = pool.acquire()
+            assert second is not first and second.session_id != dead_id
+            assert server.app.sessions[second.session_id].model.route == LOGIN_ROUTE
+            assert pool.is_alive(second)
+        assert pool.stats.dead_sessions == 1
+        assert pool.stats.sessions_created == 2 and pool.stats.reuses == 0
+    
+    def test_exhausted_pool_raises(self, appium_config):
+        """Test acquiring beyond max_size fails until a session is released"""
+        with self._pool(appium_config, max_size=2) as (pool, server):
+            first, second = pool.acquire(), pool.acquire()
+            assert first is not second and len(server.app.sessions) == 2
+            with pytest.raises(RuntimeError, match=r"exhausted \(2 sessions in use\)"):
+                pool.acquire()
+            pool.release(second)
+            assert pool.acquire() is second
+    
+    def test_stats_summary(self):
+        """Test the summary reports averages and the setup time reuse saved"""
+        stats = PoolStats()
+        stats.record_setup(2.0)
+        stats.record_setup(4.0)
+        stats.acquisitions, stats.reuses, stats.dead_sessions, stats.reset_time = 6, 4, 1, 1.5
+        assert stats.average_setup == 3.0 and stats.time_saved == 10.5
+        assert stats.summary() == (
+            "Driver pool: 6 acquisitions, 2 sessions created (avg setup 3.00s), "
+            "4 reuses, 1 dead sessions replaced, reset time 1.50s, estimated time saved 10.50s"
+        )
+        assert PoolStats().time_saved == 0.0
+
+
+# ============================================================================
+# FAKE APP MODEL
+# ============================================================================
+
+class TestFakeAppModel:
+    """AppModel login/register transitions as Controlador/Authenticate.tsx does them"""
+    
+    ACCOUNTS = {"doc@example.com": {"password": "secret123", "name": "Dr. Test", "role": DOCTOR}}
+    
+    @staticmethod
+    def _tap(model, key):
+        node = next(node for node in model.render().walk() if node.key == key)
+        node.on_click()
+    
+    @staticmethod
+    def _texts(model):
+        return [node.text for node in model.render().walk() if node.text]
+    
+    def _register_model(self, **fields):
+        model = fake_appium_server.AppModel(accounts=self.ACCOUNTS)
+        self._tap(model, "login.register_link")
+        model.fields.update(fields)
+        return model
+    
+    @pytest.mark.parametrize("fields", [
+        {},
+        {"email": "doc@example.com"},
+        {"password": "secret123"},
+    ])
+    def test_login_with_missing_fields_alerts(self, fields):
+        """Test an empty email or password shows the fill-in alert and stays on login"""
+        model = fake_appium_server.AppModel(accounts=self.ACCOUNTS)
+        model.fields.update(fields)
+        self._tap(model, "login.submit")
+        assert model.alert == {"title": "Error", "message": "Por favor llena todos los campos."}
+        self._tap(model, "alert.ok")
+        assert model.alert is None and model.route == LOGIN_ROUTE and model.user is None
+        assert model.fields["email"] == fields.get("email", "")
+    
+    def test_login_with_wrong_password_alerts(self):
+        """Test unknown credentials show Supabase's error message"""
+        model = fake_appium_server.AppModel(accounts=self.ACCOUNTS)
+        model.fields.update(email="doc@example.com", password="wrong-password")
+        model.submit_login()
+        assert model.alert["message"] == "Invalid login credentials"
+        assert model.route == LOGIN_ROUTE
+    
+    def test_login_opens_the_map(self):
+        """Test valid credentials sign in and replace the route with mapView"""
+        model = fake_appium_server.AppModel(accounts=self.ACCOUNTS)
+        model.fields.update(email="doc@example.com", password="secret123")
+        self._tap(model, "login.submit")
+        assert model.alert is None and model.route == MAP_ROUTE
+        assert model.user == {"id": "doc@example.com", "name": "Dr. Test", "role": DOCTOR}
+        assert model.fields == {"name": "", "email": "", "password": ""}
+    
+    @pytest.mark.parametrize("fields,message", [
+        ({"email": "new@example.com", "password": "secret123"}, "Por favor llena todos los campos."),
+        ({"name": "Juan", "password": "secret123"}, "Por favor llena todos los campos."),
+        ({"name": "Juan", "email": "new@example.com"}, "Por favor llena todos los campos."),
+        ({"name": "Juan", "email": "new@example.com", "password": "12345"},
+         "La contraseña debe tener al menos 6 caracteres."),
+        ({"name": "Juan", "email": "notanemail", "password": "secret123"},
+         "Unable to validate email address: invalid format"),
+        ({"name": "Juan", "email": "doc@example.com", "password": "secret123"},
+         "User already registered"),
+    ])
+    def test_invalid_registration_alerts(self, fields, message):
+        """Test each validation branch shows its alert and creates no account"""
+        model = self._register_model(**fields)
+        self._tap(model, "register.submit")
+        assert model.alert == {"title": "Error", "message": message}
+        assert message in self._texts(model)
+        self._tap(model, "alert.ok")
+        assert model.route == REGISTER_ROUTE and model.user is None
+        assert set(model.accounts) == set(self.ACCOUNTS)
+    
+    def test_short_password_is_checked_before_the_email(self):
+        """Test the length check runs before the backend would reject the email"""
+        model = self._register_model(name="Juan", email="notanemail", password="123")
+        model.submit_register()
+        assert model.alert["message"] == "La contraseña debe tener al menos 6 caracteres."
+    
+    def test_role_dropdown_opens_and_chooses(self):
+        """Test the dropdown renders its options in place of the form until one is picked"""
+        model = self._register_model(name="Juan")
+        assert "Tipo de Usuario, Médico" in [node.desc for node in model.render().walk()]
+        self._tap(model, "register.type")
+        assert model.dropdown_open
+        assert self._texts(model) == ["Médico", "Admin"]
+        self._tap(model, "dropdown.admin")
+        assert not model.dropdown_open and model.user_type == ADMIN
+        assert "Tipo de Usuario, Admin" in [node.desc for node in model.render().walk()]
+        assert model.fields["name"] == "Juan"
+        self._tap(model, "register.type_value")
+        self._tap(model, "dropdown.medico")
+        assert model.user_type == DOCTOR
+    
+    def test_registration_opens_the_map_behind_the_success_alert(self):
+        """Test a valid registration stores the account, navigates and then alerts"""
+        model = self._register_model(name="Ana Admin", email="ana@example.com", password="secret123")
+        self._tap(model, "register.type")
+        self._tap(model, "dropdown.admin")
+        self._tap(model, "register.submit")
+        assert model.route == MAP_ROUTE
+        assert model.alert == {"title": "Registro exitoso", "message": "Cuenta y perfil creados."}
+        assert model.user == {"id": "ana@example.com", "name": "Ana Admin", "role": ADMIN}
+        self._tap(model, "alert.ok")
+        assert "Google Map" in [node.desc for node in model.render().walk()]
+        model.navigate(LOGIN_ROUTE)
+        model.fields.update(email="ana@example.com", password="secret123")
+        model.submit_login()
+        assert model.user["role"] == ADMIN
+    
+    def test_leaving_a_screen_resets_its_form(self):
+        """Test navigating between login and register clears fields and the role"""
+        model = self._register_model(name="Juan", email="juan@example.com")
+        model.choose_user_type(ADMIN)
+        self._tap(model, "register.login_link")
+        assert model.route == LOGIN_ROUTE
+        assert model.fields == {"name": "", "email": "", "password": ""}
+        assert model.user_type == DOCTOR
+
+
+# ============================================================================
+# WAIT ENGINE
+# ============================================================================
+
+class TestWaitEngine:
+    """WaitEngine polling and budgets against the fake Appium server (no device needed)"""
+    
+    MISSING = (AppiumBy.XPATH, "//*[@text='No such screen']")
+    
+    def test_interval_backs_off_up_to_its_cap(self, appium_config):
+        """Test polls get further apart by the backoff factor, never beyond max_interval"""
+        with fake_driver(appium_config) as (driver, _):
+            polled = []
+            
+            def check(driver):
+                polled.append(time.monotonic())
+                return driver.find_elements(*self.MISSING)
+            engine = WaitEngine(driver, initial_interval=0.02, max_interval=0.1, backoff=2)
+            assert engine.until(waits.Condition("screen", "never", check), timeout=0.6,
+                                raise_on_timeout=False) is False
+        gaps = [later - earlier for earlier, later in zip(polled, polled[1:])]
+        assert gaps[0] < gaps[2]
+        assert max(gaps[:-1]) < 0.1 + 0.05
+        assert gaps[-3] > 0.08
+        assert engine.records[0].polls == len(polled)
+    
+    def test_each_kind_waits_its_own_budget(self, appium_config):
+        """Test a timeout uses the budget of the condition's kind"""
+        with fake_driver(appium_config) as (driver, _):
+            engine = WaitEngine(driver, budgets={"screen": 0.2, "alert": 0.5})
+            start = time.monotonic()
+            assert engine.until(screen_visible(self.MISSING), raise_on_timeout=False) is False
+            screen = time.monotonic() - start
+            start = time.monotonic()
+            with pytest.raises(TimeoutException, match="0.5s waiting for alert"):
+                engine.until(alert_shown())
+            alert = time.monotonic() - start
+        assert 0.2 <= screen < 0.5 <= alert < 1.0
+        assert engine.budgets["navigation"] == waits.DEFAULT_BUDGETS["navigation"]
+        # The time actually spent, not the budget
+        recorded_screen, recorded_alert = (record.elapsed for record in engine.records)
+        assert 0.2 <= recorded_screen <= screen and 0.5 <= recorded_alert <= alert
+    
+    def test_records_describe_every_wait(self, appium_config):
+        """Test WaitRecord keeps kind, polls and outcome, and an alert wait returns its text"""
+        with fake_driver(appium_config) as (driver, _):
+            page = LoginPage(driver)
+            page.wait_for_screen(LoginLocators.LOGIN_BUTTON)
+            page.click_login_button()
+            assert page.wait_for_alert() == "Por favor llena todos los campos."
+            assert page.dismiss_alert()
+            assert page.dismiss_alert(optional=True) is False
+            page.wait_for_navigation(LoginLocators.LOGIN_BUTTON)
+        records = page.waits.records
+        assert [(record.kind, record.satisfied) for record in records] == [
+            ("screen", True), ("alert", True), ("alert", True), ("alert", False), ("navigation", True)]
+        assert records[0].polls == 1
+        assert records[3].elapsed >= waits.DEFAULT_BUDGETS["optional_alert"]
+        # The hierarchy must read the same twice before navigation counts as settled
+        assert records[4].polls >= 2
+        assert "timeout" in repr(records[3]) and "5 conditions" in page.waits.summary()
+
+
+# ============================================================================
+# PAGE SNAPSHOT
+# ============================================================================
+
+class TestPageSnapshot:
+    """Presence checks answered from one page source (no device needed)"""
+    
+    def test_one_page_source_serves_every_check(self, appium_config):
+        """Test several lookups inside a snapshot cost one getPageSource and no findElement"""
+        locators = (LoginLocators.LOGIN_TITLE, LoginLocators.EMAIL_INPUT, LoginLocators.PASSWORD_INPUT,
+                    LoginLocators.LOGIN_BUTTON, LoginLocators.REGISTER_LINK)
+        with fake_driver(appium_config) as (driver, server):
+            page = LoginPage(driver)
+            before = dict(server.app.command_counts)
+            with page.snapshot():
+                shown = [page.is_element_displayed(locator) for locator in locators]
+            shown.extend(page.are_elements_displayed(*locators).values())
+            counts = command_delta(server, before)
+        assert all(shown)
+        assert counts["getPageSource"] == 2
+        assert counts.get("findElement", 0) == counts.get("findElements", 0) == 0
+    
+    def test_snapshot_miss_falls_back_to_a_live_lookup(self, appium_config):
+        """Test an element missing from the snapshot is still looked up on the device"""
+        with fake_driver(appium_config) as (driver, server):
+            page = LoginPage(driver)
+            model = server.app.sessions[driver.session_id].model
+            with page.snapshot():
+                assert page.is_element_displayed(LoginLocators.LOGIN_BUTTON)
+                # The screen changes after the snapshot was taken
+                model.navigate(REGISTER_ROUTE)
+                before = dict(server.app.command_counts)
+                assert page.is_element_displayed(RegisterLocators.NAME_INPUT, timeout=2)
+                assert command_delta(server, before).get("findElement", 0) > 0
+                assert not page.is_element_displayed(MapLocators.MAP, timeout=0.2)
+            assert server.app.command_counts["getPageSource"] == 1
+
+
+# ============================================================================
+# COMMAND INSTRUMENTATION
+# ============================================================================
+
+class TestInstrumentation:
+    """CommandRecorder and page-method frames against the fake Appium server"""
+    
+    MISSING = (AppiumBy.XPATH, "//*[@text='No such screen']")
+    
+    @staticmethod
+    def _key(locator):
+        return f"{locator[0]}={locator[1]}"
+    
+    @contextmanager
+    def _recorded_login_page(self, appium_config):
+        with fake_driver(appium_config) as (driver, server):
+            recorder = CommandRecorder()
+            recorder.install(driver)
+            yield LoginPage(driver), recorder, server
+    
+    def test_commands_are_counted_per_name(self, appium_config):
+        """Test every command is recorded once, matching what the server received"""
+        with self._recorded_login_page(appium_config) as (page, recorder, server):
+            before = dict(server.app.command_counts)
+            page.enter_email("count@example.com")
+            page.enter_password("secret123")
+            page.clear_email()
+            received = command_delta(server, before)
+            recorder.finish_test()
+        counts = {row["name"]: row["count"] for row in recorder.aggregate(lambda record: record["command"])}
+        assert counts == {"findElement": 2, "clear": 3, "sendKeysToElement": 2}
+        assert sum(counts.values()) == sum(received.values())
+        by_locator = {row["name"]: row["count"] for row in recorder.aggregate(lambda record: record["locator"])}
+        assert by_locator == {self._key(LoginLocators.EMAIL_INPUT): 1,
+                              self._key(LoginLocators.PASSWORD_INPUT): 1}
+    
+    def test_retries_are_keyed_by_command_and_locator(self, appium_config):
+        """Test repeated lookups of one locator count as retries, other locators do not"""
+        with self._recorded_login_page(appium_config) as (page, recorder, _):
+            assert not page.is_element_displayed(self.MISSING, timeout=0.6)
+            assert page.is_element_displayed(LoginLocators.LOGIN_TITLE)
+        missing = [record for record in recorder.records
+                   if record["locator"] == self._key(self.MISSING)]
+        found = [record for record in recorder.records
+                 if record["command"] == "findElement"
+                 and record["locator"] == self._key(LoginLocators.LOGIN_TITLE)]
+        assert len(missing) >= 2
+        assert [record["retry"] for record in missing] == list(range(len(missing)))
+        # A new page-object call starts counting again
+        assert [record["retry"] for record in found] == [0]
+        assert all(record["stack"] == ["BasePage.is_element_displayed"] for record in missing)
+    
+    def test_commands_carry_the_page_object_stack(self, appium_config):
+        """Test a page-object flow attributes its commands to the nested method calls"""
+        with self._recorded_login_page(appium_config) as (page, recorder, _):
+            page.login("doc@example.com", "secret123")
+        lookup = next(record for record in recorder.records if record["command"] == "findElement")
+        assert lookup["stack"][0] == "LoginPage.login"
+        assert "BasePage.perform" in lookup["stack"] and lookup["stack"][-1] == "BasePage.fill_form"
+    
+    def test_subclasses_wrap_only_their_own_methods(self):
+        """Test __init_subclass__ traces new methods once and leaves inherited ones alone"""
+        class ProfilePage(LoginPage):
+            def open_profile(self):
+                return "opened"
+            
+            def _helper(self):
+                return "private"
+        
+        assert ProfilePage.open_profile.__traced__
+        assert ProfilePage.open_profile.__wrapped__.__name__ == "open_profile"
+        assert not hasattr(ProfilePage._helper, "__traced__")
+        assert "enter_email" not in vars(ProfilePage)
+        assert ProfilePage.enter_email is LoginPage.enter_email
+        assert ProfilePage.find_element is BasePage.find_element
+        # The wrapped function itself is the plain method, not another wrapper
+        assert not hasattr(BasePage.find_element.__wrapped__, "__wrapped__")
+        wrapped = ProfilePage.open_profile
+        trace_page_methods(ProfilePage)
+        assert ProfilePage.open_profile is wrapped
+    
+    def test_overridden_method_records_both_frames(self, appium_config):
+        """Test an override calling super() shows up as two frames, not a doubled one"""
+        seen = []
+        
+        class QuickLoginPage(LoginPage):
+            def enter_email(self, email):
+                seen.append(list(frame.name for frame in instrumentation._frames()))
+                super().enter_email(email)
+        
+        class Recording(QuickLoginPage):
+            def send_keys(self, locator, text, timeout=10, clear_first=True):
+                seen.append(list(frame.name for frame in instrumentation._frames()))
+        
+        with self._recorded_login_page(appium_config) as (page, _, _):
+            Recording(page.driver).enter_email("frames@example.com")
+        assert seen == [["QuickLoginPage.enter_email"],
+                        ["QuickLoginPage.enter_email", "LoginPage.enter_email", "Recording.send_keys"]]
+
+
+# ============================================================================
+# ELEMENT CACHE
+# ============================================================================
+
+class TestElementCache:
+    """Element handles reused across page-object calls on one screen"""
+    
+    @pytest.fixture(autouse=True)
+    def cache_enabled(self, monkeypatch):
+        monkeypatch.setenv("APPIUM_ELEMENT_CACHE", "true")
+    
+    def test_repeated_lookup_hits_the_cache(self, login_page):
+        """Test reading back a field typed into does not look it up again"""
+        login_page.enter_email("cache@example.com")
+        assert login_page.get_text(LoginLocators.EMAIL_INPUT) == "cache@example.com"
+        assert (login_page.elements.misses, login_page.elements.hits) == (1, 1)
+    
+    def test_stale_handle_is_re_resolved(self, register_page, driver):
+        """Test a re-render behind the page object's back is recovered from"""
+        register_page.enter_full_name("Dr. Cache")
+        # Picking a user type re-renders the form without going through the page
+        driver.find_element(*RegisterLocators.USER_TYPE_DROPDOWN).click()
+        driver.find_element(*RegisterLocators.ADMIN_OPTION).click()
+        assert register_page.get_text(RegisterLocators.NAME_INPUT) == "Dr. Cache"
+        assert register_page.elements.stale == 1
+    
+    def test_fill_form_re_resolves_stale_fields(self, register_page, driver):
+        """Test fill_form looks a cached field up again after a re-render"""
+        register_page.enter_full_name("Dr. Cache")
+        driver.find_element(*RegisterLocators.USER_TYPE_DROPDOWN).click()
+        driver.find_element(*RegisterLocators.ADMIN_OPTION).click()
+        report = register_page.fill_form({RegisterLocators.NAME_INPUT: "Dra. Caché",
+                                          RegisterLocators.EMAIL_INPUT: "cache@example.com"})
+        assert all(field.verified for field in report.fields)
+        assert register_page.elements.stale == 1
+        assert register_page.get_text(RegisterLocators.NAME_INPUT) == "Dra. Caché"
+    
+    def test_find_element_is_never_served_from_the_cache(self, register_page, driver):
+        """Test a handle kept by the caller is looked up after a re-render, not reused"""
+        register_page.enter_full_name("Dr. Cache")
+        driver.find_element(*RegisterLocators.USER_TYPE_DROPDOWN).click()
+        driver.find_element(*RegisterLocators.ADMIN_OPTION).click()
+        assert register_page.find_element(RegisterLocators.NAME_INPUT).text == "Dr. Cache"
+        assert register_page.elements.hits == 0
+    
+    def test_navigation_drops_cached_handles(self, login_page, driver_pool):
+        """Test a deep link and a tap both invalidate the screen's handles"""
+        login_page.get_text(LoginLocators.EMAIL_INPUT)
+        driver_pool.open_route(login_page.driver, REGISTER_ROUTE)
+        assert login_page.elements.elements == {}
+        register = RegisterPage(login_page.driver)
+        register.get_text(RegisterLocators.NAME_INPUT)
+        register.click_login_link()
+        assert register.elements.elements == {}
+        assert register.elements.invalidations == 2
+
+
+# ============================================================================
+# VISUAL REGRESSION
+# ============================================================================
+
+def synthetic_screen(height=1920, width=1080, seed=7):
+    """Screen-like RGB image: flat background, a few filled boxes and some noise"""
+    random = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 245, dtype=np.uint8)
+    for top in range(300, 1500, 300):
+        image[top:top + 120, 90:width - 90] = random.integers(0, 200, 3, dtype=np.uint8)
+    image[:80] = random.integers(0, 255, (80, width, 3), dtype=np.uint8)
+    return image
+
+
+@pytest.fixture
+def visual_store(tmp_path):
+    return ImageStore(str(tmp_path / "visual"), factor=8)
+
+
+class TestVisualDiff:
+    """Screenshot comparison and the memory-mapped baseline store, without a device"""
+    
+    def test_identical_screen_passes(self):
+        """Test an unchanged screen passes without any pixel over tolerance"""
+        screen = synthetic_screen()
+        result = compare("login", screen, screen.copy())
+        assert result.passed and result.changed == 0
+    
+    def test_small_differences_are_tolerated(self):
+        """Test anti-aliasing sized noise stays under the per-pixel tolerance"""
+        screen = synthetic_screen()
+        noisy = screen.copy()
+        noisy[300:420, 90:990] += 10
+        result = compare("login", noisy, screen, tolerance=16)
+        assert result.passed and result.changed == 0
+    
+    def test_changed_region_fails_in_the_downscaled_pass(self):
+        """Test a clearly changed box fails before the full-resolution comparison"""
+        screen = synthetic_screen()
+        changed = screen.copy()
+        changed[900:1020, 90:990] = (255, 0, 0)
+        result = compare("login", changed, screen, factor=8)
+        assert not result.passed and result.precheck
+        assert 900 <= result.bbox[1] <= result.bbox[3] < 1020
+    
+    def test_single_pixel_change_is_found_at_full_resolution(self):
+        """Test a change between the sampled pixels is still caught"""
+        screen = synthetic_screen()
+        changed = screen.copy()
+        changed[1001, 501] = (0, 0, 0)
+        result = compare("login", changed, screen, max_ratio=0.0, factor=8)
+        assert not result.passed and not result.precheck
+        assert result.changed == 1 and result.bbox == [501, 1001, 501, 1001]
+    
+    def test_masked_regions_are_ignored(self):
+        """Test the status bar and an explicit avatar mask do not count"""
+        screen = synthetic_screen()
+        changed = screen.copy()
+        changed[:60] = 0
+        changed[1700:1800, 450:630] = 0
+        avatar = Region("avatar", 450 / 1080, 1700 / 1920, 180 / 1080, 100 / 1920)
+        assert not compare("profile", changed, screen, mask=()).passed
+        assert compare("profile", changed, screen, mask=(visual.STATUS_BAR, avatar)).passed
+        assert mask_array(screen.shape, (avatar,))[1750, 500]
+    
+    def test_size_mismatch_fails(self):
+        """Test a screenshot of another resolution is reported, not compared"""
+        result = compare("login", synthetic_screen(1280, 720), synthetic_screen())
+        assert not result.passed and "size" in result.reason
+    
+    def test_store_maps_baselines_from_disk(self, visual_store):
+        """Test baselines survive a new store and are served as memory-mapped views"""
+        screen = synthetic_screen()
+        visual_store.put("device:LoginPage.loaded", screen)
+        reopened = ImageStore(visual_store.path, factor=8)
+        baseline, small = reopened.get("device:LoginPage.loaded")
+        assert isinstance(baseline.base, np.memmap)
+        assert np.array_equal(baseline, screen)
+        assert np.array_equal(small, downscale(screen, 8))
+        assert reopened.get("device:RegisterPage.loaded") is None
+    
+    def test_store_rewrites_same_size_baselines_in_place(self, visual_store):
+        """Test updating a baseline does not grow the data file"""
+        visual_store.put("a", synthetic_screen(seed=1))
+        visual_store.put("b", synthetic_screen(seed=2))
+        size = os.path.getsize(visual_store.data_path)
+        visual_store.put("a", synthetic_screen(seed=3))
+        assert os.path.getsize(visual_store.data_path) == size
+        assert np.array_equal(visual_store.get("a")[0], synthetic_screen(seed=3))
+        assert np.array_equal(visual_store.get("b")[0], synthetic_screen(seed=2))
+    
+    def test_checker_records_then_compares(self, visual_store):
+        """Test the first checkpoint records a baseline and the next one is compared"""
+        checker = VisualChecker(visual_store, "emulator-5554", update=False, tolerance=16, max_ratio=0.001)
+        try:
+            screen = synthetic_screen()
+            assert checker.check("LoginPage.loaded", screen).recorded
+            assert checker.check("LoginPage.loaded", screen).passed
+            changed = screen.copy()
+            changed[600:720, 90:990] = 0
+            result = checker.check("LoginPage.loaded", changed)
+            assert not result.passed
+            assert result.key == "emulator-5554:LoginPage.loaded"
+        finally:
+            checker.close()
+    
+    def test_checkpoints_are_decoded_off_the_test_thread(self, visual_store):
+        """Test a checkpoint returns before its screenshot is decoded and compared"""
+        pytest.importorskip("PIL")
+        png = visual.encode_png(synthetic_screen(640, 360))
+        
+        class ScreenshotDriver:
+            def get_screenshot_as_png(self):
+                return png
+        
+        checker = VisualChecker(visual_store, "device", update=False, tolerance=16, max_ratio=0.001)
+        visual.install(checker)
+        try:
+            checker.begin("test_checkpoints")
+            LoginPage(ScreenshotDriver()).checkpoint("loaded")
+            LoginPage(ScreenshotDriver()).checkpoint("loaded")
+            results = checker.collect()
+        finally:
+            visual.install(None)
+            checker.close()
+        assert [result.recorded for result in results] == [True, False]
+        assert results[1].passed
+    
+    @pytest.mark.performance
+    def test_comparisons_run_in_milliseconds(self, visual_store):
+        """Test comparing a full-HD screen with a mapped baseline stays cheap"""
+        screen = synthetic_screen()
+        visual_store.put("device:LoginPage.loaded", screen)
+        baseline, small = ImageStore(visual_store.path, factor=8).get("device:LoginPage.loaded")
+        actual = screen.copy()
+        # The clock in the status bar is the only thing that moved
+        actual[20:60, 900:1060] = 0
+        timings = []
+        for _ in range(50):
+            result = compare("device:LoginPage.loaded", actual, baseline, baseline_small=small)
+            assert result.passed
+            timings.append(result.elapsed_ms)
+        timings.sort()
+        report = {"comparisons": len(timings), "p50_ms": timings[len(timings) // 2],
+                  "max_ms": timings[-1]}
+        write_json(os.path.join(report_dir(), "visual_compare.json"), report)
+        logging.getLogger(__name__).info("Visual comparison: %s", report)
+        assert report["p50_ms"] < 50
+
+
+# ============================================================================
+# SESSION INJECTION
+# ============================================================================
+
+class TestSessionInjection:
+    """Opening screens behind the login without going through LoginPage"""
+    
+    @pytest.mark.parametrize("role,route", [
+        (DOCTOR, DAILY_JOURNAL_ROUTE),
+        (DOCTOR, MAP_ROUTE),
+        (ADMIN, RECORDS_ADMIN_ROUTE),
+        (ADMIN, ADMIN_NOTIFICATIONS_ROUTE),
+    ])
+    def test_injected_session_skips_login(self, driver, login_as, role, route):
+        """Test the target screen opens with no login screen in between"""
+        login_as(role, route)
+        BasePage(driver).wait_for_screen_gone(LoginLocators.LOGIN_BUTTON)
+    
+    @pytest.mark.parametrize("role", [DOCTOR, ADMIN])
+    def test_injected_user_is_shown_on_profile(self, driver, login_as, role):
+        """Test the profile screen shows the injected account's name and role"""
+        account = login_as(role, EDIT_PROFILE_ROUTE)
+        page = BasePage(driver)
+        page.wait_for_screen(ProfileLocators.TITLE)
+        assert page.wait_for_screen(ProfileLocators.value(account.name)), "Name not shown"
+        assert page.wait_for_screen(ProfileLocators.value(role)), "Role not shown"
+    
+    def test_session_route_carries_user_data(self):
+        """Test the deep link holds the user_data fields and the next route"""
+        injector = SessionInjector(driver_pool=None)
+        account = Account("doc@example.com", "secret123", "Dr. Test", DOCTOR, user_id="u-1")
+        route, _, query = injector.route_for(account, DAILY_JOURNAL_ROUTE).partition("?")
+        params = dict(urllib.parse.parse_qsl(query))
+        assert route == "testSession"
+        assert params == {"user_id": "u-1", "name": "Dr. Test", "role": DOCTOR,
+                          "next": DAILY_JOURNAL_ROUTE}
+    
+    def test_session_route_holds_only_a_one_time_code(self, standin):
+        """Test the deep link carries no token, only a code the app can spend once"""
+        server, anon, admin = standin
+        user = server.store.create_user("doc@example.com", "secret123")
+        account = Account("doc@example.com", "secret123", "Dr. Test", DOCTOR)
+        query = SessionInjector(None, admin).route_for(account).partition("?")[2]
+        params = dict(urllib.parse.parse_qsl(query))
+        assert set(params) == {"user_id", "token_hash", "name", "role", "next"}
+        assert params["user_id"] == user["id"]
+        verify = {"type": "magiclink", "token_hash": params["token_hash"]}
+        session = anon.request("POST", "/auth/v1/verify", verify)
+        assert session["user"]["id"] == user["id"] and session["access_token"]
+        with pytest.raises(SupabaseError, match="403"):
+            anon.request("POST", "/auth/v1/verify", verify)
+
+
+# ============================================================================
+# SUPABASE STAND-IN
+# ============================================================================
+
+@pytest.fixture
+def standin():
+    """Fresh Supabase stand-in with an anon client and a service-role client"""
+    server = FakeSupabaseServer().start()
+    yield server, SupabaseClient(server.url, service_key("anon")), \
+        SupabaseAdmin(server.url, service_key())
+    server.stop()
+
+
+class TestSupabaseStandIn:
+    """PostgREST and auth subset used by services/ (no device needed)"""
+    
+    def test_sign_up_sign_in_and_get_user(self, standin):
+        """Test authenticateService's signUp, signInWithPassword and getUser calls"""
+        server, client, _ = standin
+        client.request("POST", "/auth/v1/signup", {"email": "doc@example.com", "password": "secret123"})
+        session = client.sign_in("doc@example.com", "secret123")
+        user = client.request("GET", "/auth/v1/user",
+                              headers={"Authorization": f"Bearer {session['access_token']}"})
+        assert user["email"] == "doc@example.com"
+        with pytest.raises(SupabaseError, match="400"):
+            client.sign_in("doc@example.com", "wrong")
+    
+    def test_insert_returning_single(self, standin):
+        """Test logService.createUserLog: insert(...).select().single()"""
+        server, client, _ = standin
+        row = client.request("POST", "/rest/v1/UserLogs?select=*", {
+            "userID": "u-1", "name": "Dr. Test", "logDate": "2026-01-05",
+        }, {"Prefer": "return=representation", "Accept": "application/vnd.pgrst.object+json"})
+        assert row["id"] == 1 and row["userID"] == "u-1"
+    
+    def test_select_eq_filters_and_order(self, standin):
+        """Test emergencyService.getEmergencies: eq(received, false) ordered by timeAlert"""
+        server, client, _ = standin
+        server.store.insert("Emergencies", [
+            {"timeAlert": "10:00", "received": False},
+            {"timeAlert": "12:00", "received": False},
+            {"timeAlert": "11:00", "received": True},
+        ])
+        rows = client.request("GET", "/rest/v1/Emergencies?select=*&received=eq.false"
+                                     "&order=timeAlert.desc")
+        assert [row["timeAlert"] for row in rows] == ["12:00", "10:00"]
+    
+    def test_single_without_match_is_rejected(self, standin):
+        """Test .single() on an empty result answers 406 PGRST116"""
+        server, client, _ = standin
+        with pytest.raises(SupabaseError, match="PGRST116"):
+            client.request("GET", "/rest/v1/Profiles?select=role&id=eq.missing",
+                           headers={"Accept": "application/vnd.pgrst.object+json"})
+    
+    def test_update_and_delete_by_id(self, standin):
+        """Test arrivalAlertService.acceptArrivalAlert and logService.deleteUserLog"""
+        server, client, _ = standin
+        alert, = server.store.insert("ArrivalAlerts", [{"accepted": False}])
+        updated = client.request("PATCH", f"/rest/v1/ArrivalAlerts?id=eq.{alert['id']}&select=*",
+                                 {"accepted": True}, {"Prefer": "return=representation"})
+        assert updated[0]["accepted"] is True
+        client.request("DELETE", f"/rest/v1/ArrivalAlerts?id=eq.{alert['id']}")
+        assert server.store.count("ArrivalAlerts") == 0
+    
+    def test_injected_errors_and_rate_limit(self):
+        """Test per-route error rate (503) and token bucket (429)"""
+        faults = FaultProfile.parse(rules="rest/UserLogs=errors:1;rest/Profiles=rate:1,burst:2")
+        server = FakeSupabaseServer(faults=faults).start()
+        client = SupabaseClient(server.url, service_key("anon"))
+        try:
+            with pytest.raises(SupabaseError, match="503"):
+                client.request("GET", "/rest/v1/UserLogs")
+            client.request("GET", "/rest/v1/Profiles")
+            client.request("GET", "/rest/v1/Profiles")
+            with pytest.raises(SupabaseError, match="429"):
+                client.request("GET", "/rest/v1/Profiles")
+        finally:
+            server.stop()
+    
+    def test_account_pool_against_standin(self, standin):
+        """Test provisioning and cleanup of accounts through the stand-in"""
+        server, _, admin = standin
+        pool = AccountPool(admin, doctors=2, admins=1)
+        accounts = pool.provision()
+        assert server.store.count("Profiles") == 3
+        assert SupabaseClient(server.url, "anon").sign_in(accounts[0].email, accounts[0].password)
+        pool.cleanup()
+        assert server.store.count("Profiles") == 0
+
+
+# ============================================================================
+# REALTIME NOTIFICATIONS
+# ============================================================================
+
+def rest_insert(client):
+    """EventLoad insert function writing through the stand-in's REST API"""
+    return lambda table, row: client.request(
+        "POST", f"/rest/v1/{table}", row, {"Prefer": "return=minimal"})
+
+
+class TestRealtimeStandIn:
+    """Phoenix channel protocol of the realtime stand-in (no device needed)"""
+    
+    def test_heartbeat_is_acknowledged(self, standin):
+        """Test the phoenix heartbeat gets an ok reply"""
+        server, _, _ = standin
+        client = RealtimeClient(server.url, service_key("anon"))
+        try:
+            assert client.heartbeat()["payload"]["status"] == "ok"
+        finally:
+            client.close()
+    
+    def test_insert_reaches_filtered_subscription(self, standin):
+        """Test emergencyService's received=eq.false binding gets only matching rows"""
+        server, client, _ = standin
+        subscriber = RealtimeClient(server.url, service_key("anon"))
+        try:
+            reply = subscriber.subscribe("Emergencies", "*", "received=eq.false")
+            assert reply["payload"]["response"]["postgres_changes"][0]["table"] == "Emergencies"
+            insert = rest_insert(client)
+            insert("Emergencies", {"timeAlert": "10:00", "received": True})
+            insert("Emergencies", {"timeAlert": "10:05", "received": False})
+            changes = [data for _, data in subscriber.changes(0.5)]
+            assert [(data["type"], data["record"]["timeAlert"]) for data in changes] == \
+                [("INSERT", "10:05")]
+            assert {"name": "received", "type": "bool"} in changes[0]["columns"]
+        finally:
+            subscriber.close()
+    
+    def test_fan_out_to_many_subscribers(self, standin):
+        """Test every subscriber receives every event of a burst"""
+        server, client, _ = standin
+        probe = SubscriberProbe(server.url, service_key("anon"), "ArrivalAlerts", count=5)
+        try:
+            load = EventLoad(rest_insert(client), rate=200, burst=10, burst_every=0.05).start(40)
+            seen = probe.watch(load, timeout=5)
+            result = summarize(load.join(), seen, rate=200)
+        finally:
+            probe.close()
+        assert result["dropped"] == 0 and result["received"] == 40
+        assert server.api.realtime.delivered == 5 * 40
+
+
+@pytest.fixture(scope="session")
+def fan_out_results():
+    """Notification latency per event rate, written to reports/realtime_fan_out.json"""
+    results = []
+    yield results
+    if results:
+        write_json(os.path.join(report_dir(), "realtime_fan_out.json"), {
+            "results": results, "saturation_rate": saturation_rate(results),
+        })
+        logging.getLogger(__name__).info("\n%s\nUI saturates at %s events/s",
+                                         format_results(results), saturation_rate(results))
+
+
+@pytest.mark.performance
+class TestNotificationFanOut:
+    """End-to-end latency from a table insert to the admin's notification"""
+    
+    @pytest.mark.parametrize("rate", realtime_load.rates())
+    @pytest.mark.parametrize("table", ["ArrivalAlerts", "Emergencies"])
+    def test_notification_latency(self, driver, login_as, supabase_backend, fan_out_results,
+                                  table, rate):
+        """Test events at ``rate``/s reach the notification shade"""
+        if supabase_backend is None:
+            pytest.skip("Needs the Supabase stand-in (SUPABASE_STANDIN=true)")
+        login_as(ADMIN, ADMIN_NOTIFICATIONS_ROUTE)
+        client = SupabaseAdmin(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
+        count = int(os.getenv("REALTIME_EVENTS", 30))
+        try:
+            driver.open_notifications()
+            driver.back()
+        except WebDriverException as error:
+            pytest.skip(f"Notification shade not available: {error.msg}")
+        load = EventLoad(rest_insert(client), rate=rate).start(count, table)
+        seen = NotificationProbe(driver).watch(load, timeout=count / rate + 30)
+        result = dict(summarize(load.join(), seen, rate), table=table)
+        fan_out_results.append(result)
+        assert result["received"], f"No {table} notification arrived at {rate} events/s"
+
+
+# ============================================================================
+# ACCOUNT PROVISIONING
+# ============================================================================
+
+class RecordingAdmin:
+    """In-memory SupabaseAdmin double counting the requests it would send"""
+    
+    def __init__(self):
+        self.users = {}
+        self.profiles = {}
+        self.requests = 0
+    
+    def create_user(self, email, password):
+        self.requests += 1
+        assert email not in {user[0] for user in self.users.values()}, f"Duplicate {email}"
+        user_id = unique_id("uid")
+        self.users[user_id] = (email, password)
+        return user_id
+    
+    def delete_user(self, user_id):
+        self.requests += 1
+        del self.users[user_id]
+    
+    def insert_rows(self, table, rows):
+        self.requests += 1
+        self.profiles.update((row["id"], row) for row in rows)
+    
+    def delete_rows(self, table, column, values):
+        self.requests += 1
+        for value in values:
+            self.profiles.pop(value, None)
+
+
+class FailingAdmin(RecordingAdmin):
+    """RecordingAdmin whose auth API rejects new admin users"""
+    
+    def create_user(self, email, password):
+        if email.startswith(ADMIN):
+            time.sleep(0.05)
+            raise SupabaseError("POST /auth/v1/admin/users failed with 500: boom")
+        return super().create_user(email, password)
+
+
+class TestAccountProvisioning:
+    """Unique test data and the account pool (no device needed)"""
+    
+    def test_generated_emails_are_unique(self):
+        """Test emails generated in the same second do not collide"""
+        emails = {TestDataGenerator.generate_email("juan") for _ in range(1000)}
+        assert len(emails) == 1000
+    
+    def test_pool_provisions_profiles_in_one_insert(self):
+        """Test users are created with one bulk Profiles insert"""
+        admin = RecordingAdmin()
+        pool = AccountPool(admin, doctors=3, admins=2)
+        accounts = pool.provision()
+        assert len(accounts) == 5 and len(admin.profiles) == 5
+        assert admin.requests == 5 + 1
+        assert {row["role"] for row in admin.profiles.values()} == {DOCTOR, ADMIN}
+    
+    def test_lease_returns_account_and_cleanup_deletes(self):
+        """Test leased accounts go back to the pool and are removed at the end"""
+        admin = RecordingAdmin()
+        pool = AccountPool(admin, doctors=1, admins=1)
+        pool.provision()
+        with pool.lease(ADMIN) as first:
+            assert first.role == ADMIN
+        with pool.lease(ADMIN) as second:
+            assert second is first
+        pool.cleanup()
+        assert admin.users == {} and admin.profiles == {}
+    
+    def test_partial_provisioning_failure_deletes_created_users(self):
+        """Test users created before a concurrent create_user failed are removed"""
+        admin = FailingAdmin()
+        pool = AccountPool(admin, doctors=3, admins=1)
+        with pytest.raises(SupabaseError, match="500"):
+            pool.provision()
+        assert admin.users == {} and admin.profiles == {}
+        assert pool.accounts == []
+        assert admin.requests == 3 + 1 + 3
+
+
+# ============================================================================
+# DEVICE REGISTRY AND TIMINGS
+# ============================================================================
+
+class TestDeviceRegistry:
+    """Worker to device/port mapping and the merged timing report (no device needed)"""
+    
+    @pytest.fixture(autouse=True)
+    def clean_env(self, monkeypatch, tmp_path):
+        for name in ("APPIUM_DEVICES_FILE", "APPIUM_DEVICES", "APPIUM_DEVICE_NAME", "APPIUM_DEVICE_UDID",
+                     "APPIUM_SERVER_URL",
+                     "APPIUM_SYSTEM_PORT_BASE", "APPIUM_MJPEG_PORT_BASE", "PYTEST_XDIST_WORKER"):
+            monkeypatch.delenv(name, raising=False)
+        monkeypatch.setenv("TEST_REPORT_DIR", str(tmp_path / "reports"))
+    
+    def test_workers_map_to_devices_and_ports(self, monkeypatch):
+        """Test gwN takes device N and ports base + N; the main process is worker 0"""
+        monkeypatch.setenv("APPIUM_DEVICES", "emulator-5554@http://127.0.0.1:4723, emulator-5556,"
+                                             "R58M12@http://10.0.0.5:4725")
+        monkeypatch.setenv("APPIUM_SYSTEM_PORT_BASE", "8300")
+        registry = DeviceRegistry.from_env()
+        assert [device.udid for device in registry.devices] == ["emulator-5554", "emulator-5556", "R58M12"]
+        assert registry.devices[1].server == "http://127.0.0.1:4723"
+        allocation = registry.allocate("gw2")
+        assert (allocation.device.name, allocation.device.server) == ("R58M12", "http://10.0.0.5:4725")
+        assert (allocation.system_port, allocation.mjpeg_server_port) == (8302, 9202)
+        assert registry.allocate("master").system_port == 8300
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw1")
+        assert registry.allocate().device.name == "emulator-5556"
+    
+    def test_devices_file_and_single_device_fallback(self, monkeypatch, tmp_path):
+        """Test the JSON file wins over APPIUM_DEVICES, and one device is the default"""
+        path = write_json(str(tmp_path / "devices.json"), [
+            {"name": "Pixel 7", "udid": "emulator-5554", "server": "http://127.0.0.1:4723"},
+            {"name": "Galaxy A52", "udid": "R58M12", "server": "http://127.0.0.1:4724"},
+        ])
+        monkeypatch.setenv("APPIUM_DEVICES_FILE", path)
+        monkeypatch.setenv("APPIUM_DEVICES", "ignored@http://127.0.0.1:1")
+        allocation = DeviceRegistry.from_env().allocate("gw1")
+        assert (allocation.device.name, allocation.device.udid) == ("Galaxy A52", "R58M12")
+        monkeypatch.delenv("APPIUM_DEVICES_FILE")
+        monkeypatch.delenv("APPIUM_DEVICES")
+        monkeypatch.setenv("APPIUM_DEVICE_NAME", "emulator-5560")
+        registry = DeviceRegistry.from_env()
+        assert [(device.name, device.server, device.udid) for device in registry.devices] == \
+            [("emulator-5560", "http://127.0.0.1:4723", None)]
+        monkeypatch.setenv("APPIUM_DEVICE_UDID", "emulator-5560")
+        assert DeviceRegistry.from_env().devices[0].udid == "emulator-5560"
+    
+    def test_udid_is_only_sent_when_known(self, appium_config):
+        """Test an AVD display name alone goes out as deviceName, without a udid"""
+        for udid in (None, "emulator-5554"):
+            config = dict(appium_config, deviceName="Honor_8_TripleTen_1", udid=udid)
+            with fake_driver(config) as (driver, _):
+                capabilities = driver.capabilities
+            assert capabilities["appium:deviceName"] == "Honor_8_TripleTen_1"
+            assert capabilities.get("appium:udid") == udid
+    
+    def test_more_workers_than_devices_fails(self, monkeypatch):
+        """Test a worker without a device is refused with the -n limit to use"""
+        monkeypatch.setenv("APPIUM_DEVICES", "emulator-5554,emulator-5556")
+        registry = DeviceRegistry.from_env()
+        with pytest.raises(RuntimeError, match=r"Worker gw2 has no device: 2 registered, run pytest with -n 2"):
+            registry.allocate("gw2")
+        with pytest.raises(ValueError, match="empty"):
+            DeviceRegistry([])
+    
+    def test_worker_timings_merge_into_one_report(self):
+        """Test per-worker files combine into timings.json with wall clock and speedup"""
+        write_worker_timings("gw1", "emulator-5556", 100.0, 108.0, [
+            {"nodeid": "b.py::test_b", "duration": 5.0, "outcome": "passed"},
+            {"nodeid": "d.py::test_d", "duration": 2.0, "outcome": "passed"},
+        ])
+        write_worker_timings("gw0", "emulator-5554", 101.0, 110.0, [
+            {"nodeid": "a.py::test_a", "duration": 6.0, "outcome": "passed"},
+            {"nodeid": "c.py::test_c", "duration": 3.0, "outcome": "failed"},
+        ])
+        merged = merge_worker_timings()
+        assert merged == read_json(os.path.join(report_dir(), "timings.json"))
+        assert (merged["wall_clock"], merged["test_time"]) == (10.0, 16.0)
+        assert merged["speedup"] == 1.6
+        assert [(worker["worker"], worker["tests"], worker["busy"], worker["wall_clock"])
+                for worker in merged["workers"]] == [("gw0", 2, 9.0, 9.0), ("gw1", 2, 7.0, 8.0)]
+        assert [(test["nodeid"], test["worker"], test["device"]) for test in merged["tests"]] == [
+            ("a.py::test_a", "gw0", "emulator-5554"), ("b.py::test_b", "gw1", "emulator-5556"),
+            ("c.py::test_c", "gw0", "emulator-5554"), ("d.py::test_d", "gw1", "emulator-5556")]
+        assert "speedup x1.60" in format_timings(merged)
+        clear_worker_timings()
+        assert os.listdir(report_dir()) == ["timings.json"]
+        assert merge_worker_timings() is None
+
+
+# ============================================================================
+# LOCATOR BENCHMARK
+# ============================================================================
+
+@pytest.mark.performance
+class TestLocatorBenchmark:
+    """Lookup latency of XPath vs compiled locators"""
+    
+    def _run(self, page, locators):
+        page.verify_page_loaded()
+        rows = benchmark_locators(page.driver, locators_of(locators))
+        logging.getLogger(__name__).info("\n%s", format_benchmark(rows))
+        for row in rows:
+            if row["xpath_found"] is not None:
+                assert row["xpath_found"] == row["compiled_found"], \
+                    f"{row['name']} matches a different number of elements when compiled"
+    
+    def test_login_locator_lookup_latency(self, login_page):
+        """Benchmark login screen locators"""
+        self._run(login_page, LoginLocators)
+    
+    def test_register_locator_lookup_latency(self, register_page):
+        """Benchmark register screen locators"""
+        self._run(register_page, RegisterLocators)
+
+
+# ============================================================================
+# STARTUP AND NAVIGATION BENCHMARKS
+# ============================================================================
+
+@pytest.fixture(scope="session")
+def baseline_store():
+    """Stored performance baselines"""
+    return BaselineStore()
+
+
+@pytest.mark.performance
+class TestStartupPerformance:
+    """App start and screen transition times against stored baselines"""
+    
+    def _check(self, baseline_store, appium_config, name, stats):
+        logging.getLogger(__name__).info("%s: %s", name, stats)
+        regression = baseline_store.check(appium_config["deviceName"], name, stats)
+        if regression:
+            pytest.fail(regression)
+    
+    def test_cold_start(self, login_page, driver_pool, baseline_store, appium_config):
+        """Launch of the app until the login title is visible"""
+        driver = login_page.driver
+        package = appium_config["appPackage"]
+        
+        def launch():
+            driver.activate_app(package)
+            driver_pool.open_route(driver, LOGIN_ROUTE)
+        
+        stats = measure(
+            lambda: time_until_visible(driver, launch, LoginLocators.LOGIN_TITLE),
+            setup=lambda: driver.terminate_app(package),
+        )
+        self._check(baseline_store, appium_config, "cold_start", stats)
+    
+    def test_warm_start(self, login_page, baseline_store, appium_config):
+        """Resume from background until the login title is visible"""
+        driver = login_page.driver
+        package = appium_config["appPackage"]
+        
+        stats = measure(
+            lambda: time_until_visible(
+                driver, lambda: driver.activate_app(package), LoginLocators.LOGIN_TITLE
+            ),
+            setup=lambda: driver.background_app(-1),
+        )
+        self._check(baseline_store, appium_config, "warm_start", stats)
+    
+    def test_login_to_register_transition(self, login_page, driver_pool, baseline_store,
+                                          appium_config):
+        """Register link until the register form is visible"""
+        stats = measure(
+            lambda: time_until_visible(
+                login_page.driver, login_page.click_register_link, RegisterLocators.NAME_INPUT
+            ),
+            setup=lambda: driver_pool.open_route(login_page.driver, LOGIN_ROUTE),
+        )
+        self._check(baseline_store, appium_config, "login_to_register", stats)
+    
+    def test_register_to_login_transition(self, register_page, driver_pool, baseline_store,
+                                          appium_config):
+        """Login link until the login form is visible"""
+        stats = measure(
+            lambda: time_until_visible(
+                register_page.driver, register_page.click_login_link, LoginLocators.EMAIL_INPUT
+            ),
+            setup=lambda: driver_pool.open_route(register_page.driver, REGISTER_ROUTE),
+        )
+        self._check(baseline_store, appium_config, "register_to_login", stats)
+
+
+class TestBaselineStore:
+    """Recording and gating of performance baselines (no device needed)"""
+    
+    @pytest.fixture
+    def baseline_env(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("APPIUM_FAKE_SERVER", "false")
+        monkeypatch.setenv("PERF_UPDATE_BASELINES", "false")
+        monkeypatch.setenv("PERF_BASELINE_FILE", str(tmp_path / "performance.json"))
+        return tmp_path / "performance.json"
+    
+    def test_first_run_records_nothing(self, baseline_env):
+        """Test a benchmark without a baseline passes and leaves no file behind"""
+        assert BaselineStore().check("emulator-5554", "cold_start", Stats([1.0, 1.2])) is None
+        assert not baseline_env.exists()
+    
+    def test_update_records_and_later_runs_are_gated(self, monkeypatch, baseline_env):
+        """Test an explicit update records the baseline a slower run is failed against"""
+        monkeypatch.setenv("PERF_UPDATE_BASELINES", "true")
+        BaselineStore().check("emulator-5554", "cold_start", Stats([1.0, 1.0]))
+        monkeypatch.setenv("PERF_UPDATE_BASELINES", "false")
+        store = BaselineStore()
+        assert store.check("emulator-5554", "cold_start", Stats([1.1])) is None
+        assert "cold_start regressed" in store.check("emulator-5554", "cold_start", Stats([1.5]))
+    
+    def test_fake_server_is_never_gated_or_recorded(self, monkeypatch, baseline_env):
+        """Test fake-server timings do not end up under a device key"""
+        monkeypatch.setenv("PERF_UPDATE_BASELINES", "true")
+        monkeypatch.setenv("APPIUM_FAKE_SERVER", "true")
+        assert BaselineStore().check("emulator-5554", "cold_start", Stats([0.005])) is None
+        assert not baseline_env.exists()
+    
+    def test_workers_merge_their_baselines(self, monkeypatch, baseline_env):
+        """Test two stores opened before either saved keep both benchmarks"""
+        monkeypatch.setenv("PERF_UPDATE_BASELINES", "true")
+        first, second = BaselineStore(), BaselineStore()
+        first.check("emulator-5554", "cold_start", Stats([1.0]))
+        second.check("emulator-5556", "warm_start", Stats([0.5]))
+        assert set(read_json(str(baseline_env))) == {"emulator-5554:cold_start", "emulator-5556:warm_start"}
+
+
+# ============================================================================
+# FRAME TIMING
+# ============================================================================
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def read_data(name):
+    """Captured device output used by the offline parser tests"""
+    with open(os.path.join(DATA_DIR, name), encoding="utf-8") as handle:
+        return handle.read()
+
+
+@pytest.fixture
+def gfxinfo(request, driver, appium_config):
+    """Frame statistics collector for the app package"""
+    if not shell_available(driver):
+        pytest.skip("mobile: shell is not available (start Appium with --allow-insecure adb_shell)")
+    collector = GfxinfoCollector(driver, appium_config["appPackage"])
+    yield collector
+    if collector.results:
+        logging.getLogger(__name__).info("\n%s", collector.report())
+        write_json(os.path.join(report_dir("frames"), f"{request.node.name}.json"),
+                   collector.results)
+
+
+@pytest.mark.performance
+class TestFrameTiming:
+    """Janky frames and frame times on the list and map screens"""
+    
+    def _scroll_gestures(self, page, gfxinfo, screen):
+        page.verify_page_loaded()
+        for name, gesture in (("fling_up", page.fling_up),
+                              ("fling_down", page.fling_down),
+                              ("scroll_up", page.scroll_up)):
+            stats = gfxinfo.measure(screen, name, gesture, repeat=3)
+            assert stats.total_frames > 0, f"No frames rendered during {name} on {screen}"
+    
+    def test_records_admin_scroll_frames(self, records_admin_page, gfxinfo):
+        """Frame stats while flinging the admin log list"""
+        self._scroll_gestures(records_admin_page, gfxinfo, RECORDS_ADMIN_ROUTE)
+    
+    def test_records_paramedic_scroll_frames(self, records_paramedic_page, gfxinfo):
+        """Frame stats while flinging the paramedic log list"""
+        self._scroll_gestures(records_paramedic_page, gfxinfo, RECORDS_PARAMEDIC_ROUTE)
+    
+    def test_map_pan_zoom_frames(self, map_page, gfxinfo):
+        """Frame stats while panning and zooming the map"""
+        map_page.verify_page_loaded()
+        for name, gesture in map_page.gestures():
+            stats = gfxinfo.measure(MAP_ROUTE, name, gesture, repeat=2)
+            assert stats.total_frames > 0, f"No frames rendered during {name} on the map"
+
+
+class TestResourceParsing:
+    """meminfo and /proc stat parsing against captured dumps (no device needed)"""
+    
+    def test_parses_meminfo_summary(self):
+        """Test PSS and heap sizes come from the App Summary section"""
+        values = parse_meminfo(read_data("meminfo_app.txt"))
+        assert values == {
+            "pss_kb": 182228, "java_heap_kb": 24624, "native_heap_kb": 61180,
+        }
+    
+    def test_parses_cpu_time(self):
+        """Test utime + stime are converted to seconds"""
+        assert parse_proc_stat(read_data("proc_stat.txt")) == pytest.approx(57.08)
+    
+    def test_process_name_with_spaces(self):
+        """Test fields are counted after the process name"""
+        line = "42 (my app) S 1 1 0 0 -1 0 0 0 0 0 250 50 0 0 20 0 1 0 1 1 1"
+        assert parse_proc_stat(line) == pytest.approx(3.0)
+    
+    def test_summary_flags_memory_growth(self):
+        """Test peak/delta summary and the PSS growth threshold"""
+        samples = [
+            {"pss_kb": 180000, "java_heap_kb": 24000, "native_heap_kb": 60000, "cpu_s": 10.0, "time": 0.0},
+            {"pss_kb": 215000, "java_heap_kb": 30000, "native_heap_kb": 80000, "cpu_s": 12.5, "time": 1.0},
+            {"pss_kb": 205000, "java_heap_kb": 28000, "native_heap_kb": 75000, "cpu_s": 13.0, "time": 2.0},
+        ]
+        usage = summarize_usage(samples)
+        assert usage["pss_kb"] == {"start": 180000, "end": 205000, "peak": 215000, "delta": 25000}
+        assert usage["cpu_s"] == pytest.approx(3.0)
+        assert exceeds_threshold(usage, threshold_kb=20480)
+        assert not exceeds_threshold(usage, threshold_kb=30000)
+
+
+class TestLogcatSpans:
+    """App log tags turned into timing spans"""
+    
+    def test_parses_tagged_and_debug_lines(self):
+        """Test LoggingService and debugLogger lines are kept, other tags dropped"""
+        events = [parse_entry(entry) for entry in entries_from_dump(read_data("logcat_sync.txt"))]
+        tags = [event.tag for event in events if event is not None]
+        assert len(events) == 15 and len(tags) == 14
+        assert tags[:3] == ["SYNC_MANAGER", "SYNC_START", "SYNC_PENDING"]
+        assert "MBM_WARN" in tags
+    
+    def test_pairs_start_and_end_tags(self):
+        """Test sync logs pair by id, SYNC_DUP closes the oldest open log, open spans stay open"""
+        tracker = SpanTracker()
+        for entry in entries_from_dump(read_data("logcat_sync.txt")):
+            event = parse_entry(entry)
+            if event is not None:
+                tracker.feed(event)
+        spans = {(span.name, span.key): span for span in tracker.spans}
+        assert list(spans) == [("sync_log", "18"), ("sync_log", "17"), ("sync_log", "19"),
+                               ("sync_cycle", None), ("profile_load", "5f0c2a")]
+        assert spans["sync_cycle", None].duration_ms == pytest.approx(854, abs=1)
+        assert spans["sync_log", "17"].duration_ms == pytest.approx(425, abs=1)
+        assert spans["sync_log", "19"].outcome == "SYNC_DUP"
+        assert spans["profile_load", "5f0c2a"].duration_ms == pytest.approx(230, abs=1)
+        assert [key for key, _ in tracker.pending["map_pins"]] == [None]
+    
+    def test_injected_session_records_map_load(self, driver, login_as, app_spans):
+        """Test the map pin load shows up as a span of the running test"""
+        login_as(DOCTOR, MAP_ROUTE)
+        spans = app_spans.wait_for("map_pins", timeout=10)
+        assert spans, "No MAP_PINS span in logcat"
+        assert spans[0].duration_ms >= 0
+    
+    def test_login_records_profile_load(self, login_page, app_spans):
+        """Test logging in through the UI produces a profile_load span"""
+        with lease_account(None, DOCTOR) as account:
+            login_page.login(account.email, account.password)
+        spans = app_spans.wait_for("profile_load", timeout=10)
+        assert spans, "No PROFILE_LOAD/PROFILE_LOADED pair in logcat"
+        assert spans[0].outcome == "PROFILE_LOADED"
+
+
+class TestGfxinfoParsing:
+    """dumpsys gfxinfo parsing against captured dumps (no device needed)"""
+    
+    def test_parses_frame_counters(self):
+        """Test totals, jank and reported percentiles"""
+        stats = parse_gfxinfo(read_data("gfxinfo_records_fling.txt"))
+        assert stats.total_frames == 240
+        assert stats.janky_frames == 36
+        assert stats.jank_percent == pytest.approx(15.0)
+        assert stats.percentile(50) == 9.0
+        assert stats.percentile(99) == 57.0
+        assert stats.counters["slow_ui_thread"] == 23
+    
+    def test_histogram_percentiles(self):
+        """Test percentiles derived from the frame time histogram"""
+        stats = parse_gfxinfo(read_data("gfxinfo_records_fling.txt"))
+        stats.percentiles = {}
+        assert sum(count for _, count in stats.histogram) == stats.total_frames
+        assert stats.percentile(50) == 9.0
+        assert stats.percentile(90) >= stats.percentile(50)
+    
+    def test_idle_dump_has_no_frames(self):
+        """Test a dump taken with no rendering in between"""
+        stats = parse_gfxinfo(read_data("gfxinfo_idle.txt"))
+        assert stats.total_frames == 0
+        assert stats.jank_percent == 0.0
+
+
+# ============================================================================
+# OFFLINE SYNC THROUGHPUT
+# ============================================================================
+
+@pytest.fixture(scope="session")
+def sync_results():
+    """Throughput per queue size, written to reports/sync_throughput.json"""
+    results = []
+    yield results
+    if results:
+        write_json(os.path.join(report_dir(), "sync_throughput.json"), results)
+        logging.getLogger(__name__).info("\n%s", format_curve(results))
+
+
+@pytest.mark.performance
+class TestSyncThroughput:
+    """Rows/second syncManager drains after reconnecting, by queue size"""
+    
+    @pytest.mark.parametrize("size", queue_sizes())
+    def test_sync_drain_rate(self, driver, login_as, appium_config, supabase_backend, sync_results,
+                             app_spans, size):
+        """Test a queue of ``size`` pending rows drains after reconnecting"""
+        if supabase_backend is None:
+            # The synthetic logs, emergencies and alerts would reach the production backend
+            pytest.skip("Needs the Supabase stand-in (SUPABASE_STANDIN=true)")
+        login_as(DOCTOR)
+        benchmark = SyncBenchmark(driver, appium_config["appPackage"])
+        try:
+            result = benchmark.run(size)
+        except SyncUnsupported as error:
+            pytest.skip(str(error))
+        # syncManager's own SYNC_START..SYNC_COMPLETE time, without the polling overhead
+        app_spans.collector.poll()
+        cycles = app_spans.named("sync_cycle")
+        result["app_sync_ms"] = round(sum(span.duration_ms for span in cycles), 1)
+        result["app_sync_cycles"] = len(cycles)
+        sync_results.append(result)
+        assert result["remaining"] == 0, \
+            f"{result['remaining']} of {size} rows still pending after {result['seconds']}s"
+
+
+class TestSyncQueueDatabase:
+    """Generated queue databases (no device needed)"""
+    
+    def test_schema_matches_local_database(self, tmp_path):
+        """Test every table initDatabase creates is present"""
+        path = build_queue_db(str(tmp_path / "localdatabase.db"))
+        connection = sqlite3.connect(path)
+        tables = {row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        connection.close()
+        assert {"user_data", "profiles", "records", "pending_logs", "pending_emergencies",
+                "pending_arrival_alerts", "emergencies", "arrival", "locations"} <= tables
+    
+    def test_pending_rows_are_all_syncable(self, tmp_path):
+        """Test no generated log is dropped by the userID + logDate de-duplication"""
+        counts = split_rows(5000)
+        path = build_queue_db(str(tmp_path / "localdatabase.db"), **counts)
+        pending = pending_counts(path)
+        assert pending["total"] == 5000
+        assert pending["logs"] == counts["logs"]
+        assert pending["arrival_alerts"] == counts["arrival_alerts"]
+
+
+# ============================================================================
+# CONNECTIVITY TRANSITIONS
+# ============================================================================
+
+@pytest.fixture(scope="session")
+def network_proxy(supabase_backend):
+    """Throttling proxy in front of the Supabase stand-in, None without one"""
+    if supabase_backend is None:
+        yield None
+        return
+    upstream = urllib.parse.urlsplit(supabase_backend.url)
+    proxy = ThrottlingProxy(
+        (upstream.hostname, upstream.port),
+        host=os.getenv("NETWORK_PROXY_HOST", "127.0.0.1"),
+        port=int(os.getenv("NETWORK_PROXY_PORT", 0)),
+    ).start()
+    logging.getLogger(__name__).info("Throttling proxy on %s -> %s", proxy.url, supabase_backend.url)
+    yield proxy
+    proxy.stop()
+
+
+@pytest.fixture(scope="session")
+def connectivity_results():
+    """Recovery timings per network profile, written to reports/connectivity.json"""
+    results = []
+    yield results
+    if results:
+        write_json(os.path.join(report_dir(), "connectivity.json"), results)
+        logging.getLogger(__name__).info("\n%s", format_matrix(results))
+
+
+@pytest.mark.performance
+class TestConnectivityTransitions:
+    """How fast the app notices a reconnect and drains its offline queue"""
+    
+    @pytest.mark.parametrize("transition", transitions())
+    @pytest.mark.parametrize("profile", network_profiles(), ids=lambda profile: profile.name)
+    def test_recovery_after_reconnect(self, driver, login_as, appium_config, app_spans, network_proxy,
+                                      connectivity_results, profile, transition):
+        """Test the queue drains after reconnecting over ``profile``"""
+        if network_proxy is None:
+            # Without the proxy the queued rows would sync to the production backend
+            pytest.skip("Needs the Supabase stand-in behind the throttling proxy (SUPABASE_STANDIN=true)")
+        login_as(DOCTOR)
+        harness = ConnectivityHarness(driver, appium_config["appPackage"], app_spans.collector,
+                                      network_proxy)
+        try:
+            result = harness.run(profile, transition)
+        except SyncUnsupported as error:
+            pytest.skip(str(error))
+        except WebDriverException as error:
+            pytest.skip(f"Cannot script the device network: {error.msg}")
+        finally:
+            try:
+                set_network(driver, transition, True)
+            except WebDriverException:
+                pass
+        connectivity_results.append(result)
+        assert result["connection_event_ms"] is not None, "No SYNC_CONNECTION event after reconnecting"
+        assert result["remaining"] == 0, f"{result['remaining']} rows still pending"
+
+
+class TestThrottlingProxy:
+    """Network profiles applied by the proxy in front of the stand-in (no device needed)"""
+    
+    @pytest.fixture
+    def proxied(self, standin):
+        server, _, _ = standin
+        upstream = urllib.parse.urlsplit(server.url)
+        proxy = ThrottlingProxy((upstream.hostname, upstream.port), seed=1).start()
+        yield server, proxy, SupabaseClient(proxy.url, service_key("anon"))
+        proxy.stop()
+    
+    def _timed(self, client, path="/rest/v1/Localizations?select=*"):
+        start = time.perf_counter()
+        rows = client.request("GET", path)
+        return time.perf_counter() - start, rows
+    
+    def test_profiles_parse(self):
+        """Test built-in names and inline settings"""
+        assert NetworkProfile.parse("3g").bandwidth_kbps == 750
+        custom = NetworkProfile.parse("tunnel=latency:250,loss:0.1")
+        assert (custom.name, custom.latency_ms, custom.loss, custom.bandwidth_kbps) == \
+            ("tunnel", 250, 0.1, 0)
+        with pytest.raises(ValueError):
+            NetworkProfile.parse("tunnel=delay:3")
+    
+    def test_latency_is_added_each_way(self, proxied):
+        """Test a request pays the profile latency once in each direction"""
+        _, proxy, client = proxied
+        proxy.profile = NetworkProfile("slow", latency_ms=100)
+        elapsed, rows = self._timed(client)
+        assert rows == [] and elapsed >= 0.2
+        assert proxy.requests[-1][1:] == ("GET", "/rest/v1/Localizations?select=*")
+        assert proxy.first_request(0) == proxy.requests[-1][0]
+    
+    def test_bandwidth_caps_large_responses(self, proxied):
+        """Test a ~40 KB response takes its transfer time at 400 kbit/s"""
+        server, proxy, client = proxied
+        server.store.insert("Localizations", [{"name": "x" * 400} for _ in range(100)])
+        _, rows = self._timed(client)
+        proxy.profile = NetworkProfile("narrow", bandwidth_kbps=400)
+        elapsed, capped = self._timed(client)
+        assert capped == rows
+        assert elapsed >= 40000 * 8 / 400000 * 0.9
+    
+    def test_lost_segments_are_retransmitted(self, proxied):
+        """Test every lost segment costs a retransmission timeout"""
+        _, proxy, client = proxied
+        proxy.profile = NetworkProfile("lossy", loss=1.0)
+        elapsed, _ = self._timed(client)
+        assert proxy.retransmits >= 2
+        assert elapsed >= 2 * proxy.profile.retransmit_s
+    
+    def test_matrix_report(self):
+        """Test missing measurements show as dashes"""
+        table = format_matrix([{"profile": "edge", "transition": "airplane", "queue_size": 200,
+                                "connection_event_ms": 2150.0, "first_sync_request_ms": 2900.0,
+                                "drained_ms": None, "remaining": 12}])
+        assert "edge" in table and "2150" in table and " - " in table
+
+
+# ============================================================================
+# MAP PIN SCALING
+# ============================================================================
+
+@pytest.fixture(scope="session")
+def map_pin_results():
+    """Map load and frame stats per pin count, written to reports/map_pins.json"""
+    results = []
+    yield results
+    if results:
+        write_json(os.path.join(report_dir(), "map_pins.json"), results)
+        logging.getLogger(__name__).info("\n%s", format_scaling(results))
+
+
+@pytest.mark.performance
+class TestMapPinScaling:
+    """How mapView copes with growing pin sets, from Supabase and from the local cache"""
+    
+    def _measure(self, driver, driver_pool, app_spans, appium_config, source, count):
+        gfxinfo = GfxinfoCollector(driver, appium_config["appPackage"]) if shell_available(driver) else None
+        benchmark = MapPinBenchmark(driver, driver_pool, app_spans.collector, MapLocators.MAP, gfxinfo)
+        result = benchmark.run(source, count, MapPage(driver).gestures())
+        assert result["pins_loaded_ms"] is not None, "No MAP_PINS span for the map load"
+        if result["displayed"] != result["expected"]:
+            logging.getLogger(__name__).warning(
+                "Map shows %s of %d %s pins", result["displayed"], result["expected"], source)
+        return result
+    
+    @pytest.mark.parametrize("count", pin_counts())
+    def test_supabase_pins(self, driver, driver_pool, login_as, supabase_backend, app_spans,
+                           appium_config, map_pin_results, count):
+        """Test the map loads ``count`` pins served by the Supabase stand-in"""
+        if supabase_backend is None:
+            pytest.skip("Needs the Supabase stand-in (SUPABASE_STANDIN=true)")
+        seed_supabase(supabase_backend.store, synthetic_pins(count))
+        login_as(DOCTOR, RECORDS_PARAMEDIC_ROUTE)
+        map_pin_results.append(
+            self._measure(driver, driver_pool, app_spans, appium_config, "supabase", count))
+    
+    @pytest.mark.parametrize("count", pin_counts())
+    def test_cached_pins(self, driver, driver_pool, login_as, app_spans, appium_config,
+                         map_pin_results, tmp_path, count):
+        """Test the offline fallback loads ``count`` pins from the locations table"""
+        package = appium_config["appPackage"]
+        database = build_locations_db(str(tmp_path / "localdatabase.db"), synthetic_pins(count))
+        try:
+            SyncBenchmark(driver, package).push(database)
+            set_connectivity(driver, False)
+        except (SyncUnsupported, WebDriverException) as error:
+            pytest.skip(f"Cannot prepare the offline cache: {error}")
+        try:
+            driver.activate_app(package)
+            login_as(DOCTOR, RECORDS_PARAMEDIC_ROUTE)
+            map_pin_results.append(
+                self._measure(driver, driver_pool, app_spans, appium_config, "cache", count))
+        finally:
+            set_connectivity(driver, True)
+
+
+class TestMapPinData:
+    """Synthetic pin sets and the pre-built locations cache (no device needed)"""
+    
+    def test_synthetic_pins_are_reproducible(self):
+        """Test the same seed gives the same pins, all inside the requested area"""
+        pins = synthetic_pins(500, seed=3, spread=0.1)
+        assert pins == synthetic_pins(500, seed=3, spread=0.1)
+        assert all(abs(pin["latitude"] - 20.630117) <= 0.05 for pin in pins)
+        assert all(abs(pin["longitude"] + 103.555317) <= 0.05 for pin in pins)
+        assert {pin["zoneType"] for pin in pins} == {"safe", "warning", "danger", "shelter"}
+    
+    def test_locations_cache_serves_every_pin(self, tmp_path):
+        """Test getPinsLocations' query returns the whole pre-built table"""
+        path = build_locations_db(str(tmp_path / "localdatabase.db"), synthetic_pins(10000))
+        connection = sqlite3.connect(path)
+        rows = connection.execute(
+            "SELECT location_id, name, latitude, longitude, zoneType FROM locations").fetchall()
+        connection.close()
+        assert len(rows) == 10000
+        assert rows[0][1] == "Zona 0"
+    
+    def test_supabase_seed_replaces_previous_pins(self, standin):
+        """Test seeding the stand-in twice keeps only the second pin set"""
+        server, _, _ = standin
+        seed_supabase(server.store, synthetic_pins(50))
+        seed_supabase(server.store, synthetic_pins(20, seed=1))
+        assert len(server.store.select("Localizations")) == 20
+    
+    def test_scaling_report(self):
+        """Test the displayed pin count is read from the MAP_PINS span"""
+        tracker = SpanTracker()
+        for at, text in ((1.0, "🗺️ Loading map pins..."), (1.8, "✓ Map display: 1000 pins")):
+            tracker.feed(logcat.AppEvent(at, "MAP_PINS", text))
+        span = tracker.spans[0]
+        assert displayed_pins(span) == 1000
+        table = format_scaling([{"source": "supabase", "pins": 10000, "displayed": 1000,
+                                 "first_render_ms": 420.0, "pins_loaded_ms": span.duration_ms,
+                                 "frames": {"pan": {"p90_ms": 34.0}}}])
+        assert "supabase" in table and " 1000 " in table and " 800 " in table
+
+
+# ============================================================================
+# RECORDS SCROLL THROUGHPUT
+# ============================================================================
+
+@pytest.fixture(scope="session")
+def records_scroll_results():
+    """Load and scroll throughput per log count, written to reports/records_scroll.json"""
+    results = []
+    yield results
+    if results:
+        write_json(os.path.join(report_dir(), "records_scroll.json"), results)
+        logging.getLogger(__name__).info("\n%s", format_throughput(results))
+
+
+@pytest.mark.performance
+class TestRecordsScroll:
+    """Load time and fling throughput of the records screens over large log histories"""
+    
+    SCREENS = {
+        "admin": (ADMIN, RECORDS_ADMIN_ROUTE, RecordsAdminPage),
+        "paramedic": (DOCTOR, RECORDS_PARAMEDIC_ROUTE, RecordsParamedicPage),
+    }
+    
+    def _measure(self, driver, driver_pool, baseline_store, appium_config, results,
+                 screen, source, count):
+        _, route, page_class = self.SCREENS[screen]
+        result = RecordsScrollBenchmark(driver, driver_pool, page_class(driver)).run(route, source, count)
+        results.append(result)
+        assert result["rows_reached"] > 0, f"No log card visible on {route}"
+        if not result["reached_end"]:
+            logging.getLogger(__name__).warning(
+                "%s: end of %d logs not reached, stopped at %d", route, count, result["rows_reached"])
+        regressions = []
+        for name, stats in gated_stats(result).items():
+            logging.getLogger(__name__).info("%s: %s", name, stats)
+            regression = baseline_store.check(appium_config["deviceName"], name, stats)
+            if regression:
+                regressions.append(regression)
+        if regressions:
+            pytest.fail("\n".join(regressions))
+    
+    @pytest.mark.parametrize("count", log_counts())
+    @pytest.mark.parametrize("screen", ["admin", "paramedic"])
+    def test_supabase_logs(self, driver, driver_pool, login_as, supabase_backend, baseline_store,
+                           appium_config, records_scroll_results, screen, count):
+        """Test the screen loads and scrolls ``count`` logs served by the Supabase stand-in"""
+        if supabase_backend is None:
+            pytest.skip("Needs the Supabase stand-in (SUPABASE_STANDIN=true)")
+        role = self.SCREENS[screen][0]
+        account = login_as(role, MAP_ROUTE)
+        records_scroll.seed_supabase(supabase_backend.store, synthetic_logs(
+            count, account.user_id if role == DOCTOR else None))
+        self._measure(driver, driver_pool, baseline_store, appium_config, records_scroll_results,
+                      screen, "supabase", count)
+    
+    @pytest.mark.parametrize("count", log_counts())
+    @pytest.mark.parametrize("screen", ["admin", "paramedic"])
+    def test_cached_logs(self, driver, driver_pool, login_as, session_injector, baseline_store,
+                         appium_config, records_scroll_results, tmp_path, screen, count):
+        """Test the offline fallback loads and scrolls ``count`` logs from pending_logs"""
+        role = self.SCREENS[screen][0]
+        package = appium_config["appPackage"]
+        account = login_as(role, MAP_ROUTE)
+        user_id = account.user_id or unique_id(role)
+        logs = synthetic_logs(count, user_id if role == DOCTOR else None)
+        database = build_logs_db(str(tmp_path / "localdatabase.db"), logs, user_id, role)
+        try:
+            SyncBenchmark(driver, package).push(database)
+            set_connectivity(driver, False)
+        except (SyncUnsupported, WebDriverException) as error:
+            pytest.skip(f"Cannot prepare the offline cache: {error}")
+        try:
+            driver.activate_app(package)
+            session_injector.inject(driver, account, MAP_ROUTE)
+            self._measure(driver, driver_pool, baseline_store, appium_config, records_scroll_results,
+                          screen, "cache", count)
+        finally:
+            set_connectivity(driver, True)
+
+
+class TestRecordsScrollData:
+    """Synthetic log histories and scroll bookkeeping (no device needed)"""
+    
+    def _run(self, appium_config, logs, route, user=None):
+        with fake_driver(appium_config) as (driver, server):
+            server.app.records.extend(logs)
+            if user is not None:
+                server.app.sessions[driver.session_id].model.user = user
+            # The benchmark reopens the route through the pool between runs
+            pool = DriverPool(factory=None, app_package=appium_config["appPackage"])
+            benchmark = RecordsScrollBenchmark(driver, pool, RecordsPage(driver), settle=0, timeout=60)
+            return benchmark.run(route, "fake", len(logs), load_timeout=10)
+    
+    def test_synthetic_logs_are_newest_first(self):
+        """Test logs are ordered the way getAllUserLogs orders them"""
+        logs = synthetic_logs(500)
+        dates = [log["logDate"] for log in logs]
+        assert dates == sorted(dates, reverse=True)
+        assert len({log["userID"] for log in logs}) == records_scroll.USERS
+        assert {log["userID"] for log in synthetic_logs(20, "paramedic-1")} == {"paramedic-1"}
+    
+    def test_logs_cache_matches_local_queries(self, tmp_path):
+        """Test getAllLocalUserLogs and getLocalUserLogs see the cached rows, none pending"""
+        logs = synthetic_logs(2000) + [dict(log, id=f"own-{index}")
+                                       for index, log in enumerate(synthetic_logs(30, "paramedic-1"))]
+        path = build_logs_db(str(tmp_path / "localdatabase.db"), logs)
+        connection = sqlite3.connect(path)
+        every = connection.execute("SELECT * FROM pending_logs ORDER BY logDate DESC, id DESC").fetchall()
+        own = connection.execute("SELECT * FROM pending_logs WHERE userID = ?", ("paramedic-1",)).fetchall()
+        connection.close()
+        assert len(every) == 2030
+        assert len(own) == 30
+        assert pending_counts(path)["logs"] == 0
+    
+    def test_progress_stops_at_the_end(self):
+        """Test throughput follows the furthest card and two still flings mean the end"""
+        progress = ScrollProgress({0, 1, 2})
+        progress.add(0.5, 0.5, {3, 4, 5})
+        progress.add(1.0, 0.5, {12, 13, 14})
+        progress.add(1.5, 0.5, {13, 14, 15})
+        assert not progress.at_end
+        progress.add(2.0, 0.5, {13, 14, 15})
+        progress.add(2.5, 0.5, {13, 14, 15})
+        assert progress.at_end and progress.rows == 16
+        assert progress.last_new_at == 1.5
+        assert progress.rows_per_s() == pytest.approx(13 / 1.5, abs=0.1)
+        assert progress.seconds_per_100() == pytest.approx([50 / 3, 50 / 9, 50])
+        assert ScrollProgress({0, 1}, last=1).at_end
+    
+    def test_admin_benchmark_reaches_the_end(self, appium_config):
+        """Test every card of the admin list is seen and the end detected"""
+        result = self._run(appium_config, synthetic_logs(300), RECORDS_ADMIN_ROUTE)
+        assert result["reached_end"]
+        assert result["rows_reached"] == 300
+        assert result["end_ms"] is not None and result["rows_per_s"] > 0
+        assert set(gated_stats(result)) == {"recordsAdmin_fake_300:load",
+                                            "recordsAdmin_fake_300:scroll_100_rows",
+                                            "recordsAdmin_fake_300:to_end"}
+        assert "recordsAdmin" in format_throughput([result])
+    
+    def test_paramedic_sees_only_own_logs(self, appium_config):
+        """Test the paramedic list is filtered to the logged-in user"""
+        logs = synthetic_logs(100) + [dict(log, id=f"own-{index}")
+                                      for index, log in enumerate(synthetic_logs(40, "paramedic-1"))]
+        result = self._run(appium_config, logs, RECORDS_PARAMEDIC_ROUTE,
+                           user={"id": "paramedic-1", "name": "Paramédico", "role": DOCTOR})
+        assert result["reached_end"]
+        assert result["rows_reached"] == 40
+    
+    def test_cards_are_read_from_the_page_source(self):
+        """Test only numbered log descriptions count as cards"""
+        source = ("<hierarchy><android.widget.TextView text='Registros'/>"
+                  "<android.widget.TextView text='Registro 12'/>"
+                  "<android.widget.TextView text='Registro 13'/>"
+                  "<android.widget.TextView text='Registro de turno'/></hierarchy>")
+        assert visible_cards(source) == {12, 13}
+
+
+# ============================================================================
+# TRANSPORT
+# ============================================================================
+
+@pytest.mark.performance
+class TestTransport:
+    """Requests and wall time of page-object operations per transport setup"""
+    
+    MODES = [
+        # urllib3's default of one kept connection per host, then a pool, then batching
+        ("single connection", {"APPIUM_POOL_SIZE": "1", "APPIUM_BATCH": "false"}),
+        ("pooled", {"APPIUM_POOL_SIZE": "4", "APPIUM_BATCH": "false"}),
+        ("pooled + batch", {"APPIUM_POOL_SIZE": "4", "APPIUM_BATCH": "true"}),
+    ]
+    
+    def _measure(self, monkeypatch, appium_config, settings, logins):
+        for name, value in settings.items():
+            monkeypatch.setenv(name, value)
+        latency = LatencyProfile(default_ms=float(os.getenv("TRANSPORT_LATENCY_MS", 20)))
+        credentials = TestDataGenerator.get_test_credentials()
+        stop = threading.Event()
+        with fake_driver(appium_config, latency=latency,
+                         allow_insecure=["execute_driver_script"]) as (driver, server):
+            # A background reader sharing the driver, like the logcat collector
+            reader = threading.Thread(target=lambda: [driver.get_log("logcat") for _ in iter(
+                lambda: stop.wait(0.02), True)], daemon=True)
+            try:
+                reader.start()
+                before = dict(server.app.command_counts)
+                start = time.perf_counter()
+                for _ in range(logins):
+                    open_route(driver, LOGIN_ROUTE, appium_config["appPackage"])
+                    LoginPage(driver).login(credentials["valid_email"], credentials["valid_password"])
+                wall = time.perf_counter() - start
+                counts = command_delta(server, before)
+            finally:
+                stop.set()
+                reader.join()
+        foreground = sum(count for command, count in counts.items() if command != "getLogEvents")
+        return {"requests": foreground, "wall_s": round(wall, 3),
+                "connections": server.app.connections}
+    
+    def test_pool_and_batch_cut_requests_and_time(self, monkeypatch, appium_config):
+        """Test pooling avoids reconnects and batching sends one request per login"""
+        logins = int(os.getenv("TRANSPORT_LOGINS", 3))
+        results = {name: self._measure(monkeypatch, appium_config, settings, logins)
+                   for name, settings in self.MODES}
+        write_json(os.path.join(report_dir(), "transport.json"), results)
+        logging.getLogger(__name__).info("\n%s", "\n".join(
+            f"{name:<18} {row['requests']:5d} requests {row['wall_s'] * 1000:8.0f} ms "
+            f"{row['connections']:4d} connections" for name, row in results.items()))
+        single, pooled, batched = (results[name] for name, _ in self.MODES)
+        assert pooled["connections"] <= single["connections"]
+        # deepLink + executeDriver per login instead of find/clear/setValue per field
+        assert batched["requests"] == 2 * logins
+        assert batched["requests"] < pooled["requests"]
+        assert batched["wall_s"] < pooled["wall_s"]
+    
+    def test_batch_falls_back_without_execute_driver(self, monkeypatch, appium_config):
+        """Test a server refusing execute_driver gets the steps one by one"""
+        monkeypatch.setenv("APPIUM_BATCH", "true")
+        with fake_driver(appium_config) as (driver, server):
+            batch = Batch().type(LoginLocators.EMAIL_INPUT, "a@b.co")
+            assert '"selector": "~Usuario"' in batch.script()
+            assert not run_batch(driver, batch)
+            credentials = TestDataGenerator.get_test_credentials()
+            page = LoginPage(driver)
+            page.login(credentials["valid_email"], credentials["valid_password"])
+            page.wait_for_screen_gone(LoginLocators.LOGIN_BUTTON)
+            assert server.app.command_counts["executeDriver"] == 1
+
+
+# ============================================================================
+# FORM FILLING
+# ============================================================================
+
+class TestFormFill:
+    """BasePage.fill_form against the fake Appium server (no device needed)"""
+    
+    FORM = [(RegisterLocators.NAME_INPUT, "Juan García Hernández"),
+            (RegisterLocators.EMAIL_INPUT, "juan.garcia@example.com"),
+            (RegisterLocators.PASSWORD_INPUT, "Contraseña-Segura-123")]
+    
+    @contextmanager
+    def _register_page(self, appium_config, typing_ms=0.0):
+        latency = LatencyProfile(default_ms=2, typing_ms=typing_ms)
+        with fake_driver(appium_config, route=REGISTER_ROUTE, latency=latency) as (driver, server):
+            yield RegisterPage(driver), server.app.sessions[driver.session_id].model
+    
+    @pytest.mark.performance
+    def test_fill_form_is_faster_than_send_keys(self, appium_config):
+        """Test per-field time of fill_form against send_keys on accented text"""
+        typing_ms = float(os.getenv("FORM_FILL_TYPING_MS", 8))
+        with self._register_page(appium_config, typing_ms) as (page, model):
+            typed = {}
+            for locator, text in self.FORM:
+                start = time.perf_counter()
+                page.send_keys(locator, text)
+                typed[locator] = time.perf_counter() - start
+            report = page.fill_form(dict(self.FORM))
+            assert [model.fields[key] for key in ("name", "email", "password")] == \
+                [text for _, text in self.FORM]
+        rows = [{"field": field.locator[1], "path": field.path, "verified": field.verified,
+                 "send_keys_ms": round(typed[field.locator] * 1000, 2),
+                 "fill_form_ms": round(field.seconds * 1000, 2)} for field in report.fields]
+        write_json(os.path.join(report_dir(), "form_fill.json"),
+                   {"typing_ms_per_char": typing_ms, "fields": rows, "fill_form": report.as_dict(),
+                    "send_keys_ms": round(sum(typed.values()) * 1000, 2)})
+        logging.getLogger(__name__).info("\n%s", format_comparison(rows))
+        assert all(field.verified and field.path == "replace" for field in report.fields)
+        assert report.total_s < sum(typed.values())
+    
+    def test_paste_when_replace_is_unavailable(self, monkeypatch, appium_config):
+        """Test a server without replaceElementValue gets the clipboard, once tried"""
+        monkeypatch.delitem(fake_appium_server.MOBILE_COMMANDS, "mobile: replaceElementValue")
+        with self._register_page(appium_config) as (page, model):
+            first = page.fill_form(dict(self.FORM))
+            second = page.fill_form({RegisterLocators.NAME_INPUT: "Ana Núñez"})
+            assert model.fields["name"] == "Ana Núñez"
+            assert model.fields["password"] == self.FORM[2][1]
+        assert {field.path for field in first.fields + second.fields} == {"paste"}
+        assert all(field.verified for field in first.fields)
+    
+    def test_values_that_did_not_take_are_typed(self, monkeypatch, appium_config):
+        """Test the read-back retypes only fields whose paste was lost"""
+        monkeypatch.setenv("FORM_FILL", "paste")
+        monkeypatch.setitem(fake_appium_server.MOBILE_COMMANDS, "mobile: pressKey", lambda session, args: None)
+        with self._register_page(appium_config) as (page, model):
+            report = page.fill_form({RegisterLocators.NAME_INPUT: "José", RegisterLocators.EMAIL_INPUT: ""})
+            assert model.fields["name"] == "José"
+        paths = {field.locator: field.path for field in report.fields}
+        assert paths == {RegisterLocators.NAME_INPUT: "type", RegisterLocators.EMAIL_INPUT: "paste"}
+        assert [field.verified for field in report.fields] == [False, True]
+    
+    def test_login_fills_through_fill_form(self, appium_config):
+        """Test LoginPage.login sets both fields with replaceElementValue"""
+        with fake_driver(appium_config) as (driver, server):
+            credentials = TestDataGenerator.get_test_credentials()
+            page = LoginPage(driver)
+            page.login(credentials["valid_email"], credentials["valid_password"])
+            page.wait_for_screen_gone(LoginLocators.LOGIN_BUTTON)
+            counts = server.app.command_counts
+            assert counts["mobile: replaceElementValue"] == 2
+            assert "setValue" not in counts
+    
+    def test_read_back_rules(self):
+        """Test masked, empty and plain inputs are compared the way Android shows them"""
+        assert holds("Juan García", "Juan García")
+        assert not holds("Juan Garca", "Juan García")
+        assert holds("•••••", "abcde", password=True)
+        assert not holds("••••", "abcde", password=True)
+        assert holds("Correo", "", hint="Correo")
+        assert not holds("x", "")
+    
+    def test_unknown_strategy_is_rejected(self, monkeypatch):
+        """Test FORM_FILL only accepts the known paths"""
+        monkeypatch.setenv("FORM_FILL", "replace")
+        assert forms.paths() == ("replace", "type")
+        monkeypatch.setenv("FORM_FILL", "adb")
+        with pytest.raises(ValueError):
+            forms.paths()
+
+
+# ============================================================================
+# TRACE REPLAY
+# ============================================================================
+
+class TestTraceReplay:
+    """Recording W3C traffic and serving it back with replay.py (no device needed)"""
+    
+    def _login(self, driver, appium_config, email=None):
+        credentials = TestDataGenerator.get_test_credentials()
+        open_route(driver, LOGIN_ROUTE, appium_config["appPackage"])
+        page = LoginPage(driver)
+        page.verify_page_loaded()
+        page.login(email or credentials["valid_email"], credentials["valid_password"])
+        page.wait_for_screen_gone(LoginLocators.LOGIN_BUTTON)
+    
+    def _record(self, appium_config, path, latency_ms=0.0):
+        recorder = TraceRecorder(str(path))
+        recorder.mark("recorded::login")
+        start = time.perf_counter()
+        try:
+            with fake_driver(appium_config, trace=recorder,
+                             latency=LatencyProfile(default_ms=latency_ms)) as (driver, _):
+                self._login(driver, appium_config)
+        finally:
+            recorder.close()
+        return time.perf_counter() - start
+    
+    @contextmanager
+    def _replaying(self, appium_config, path, speed=0):
+        with fake_driver(appium_config, server=ReplayServer(str(path), speed=speed)) as (driver, server):
+            yield driver, server.replayer
+    
+    def test_replay_serves_the_recorded_session(self, appium_config, tmp_path):
+        """Test a login replays against the trace without a device or divergence"""
+        path = tmp_path / "login.trace.gz"
+        self._record(appium_config, path)
+        entries = load_trace(str(path))
+        assert entries[0]["method"] == "POST" and entries[0]["path"] == "/session"
+        assert any(entry["body"] and entry["body"].get("value") == LoginLocators.EMAIL_INPUT[1]
+                   for entry in entries)
+        with self._replaying(appium_config, path) as (driver, replayer):
+            self._login(driver, appium_config)
+        report = replayer.report()
+        assert not replayer.diverged, replayer.summary()
+        assert report["first_divergence"] is None
+        assert report["served"] >= len(entries) - report["not_replayed"] - report["collapsed_polls"]
+    
+    def test_different_typing_is_a_soft_divergence(self, monkeypatch, appium_config, tmp_path):
+        """Test typed text may differ from the recording (generated e-mails)"""
+        # fill_form would read the recorded text back and retype, which the trace cannot answer
+        monkeypatch.setenv("FORM_FILL", "type")
+        path = tmp_path / "login.trace.gz"
+        self._record(appium_config, path)
+        with self._replaying(appium_config, path) as (driver, replayer):
+            self._login(driver, appium_config, email=TestDataGenerator.generate_email())
+        assert not replayer.diverged
+        assert [item["kind"] for item in replayer.divergences] == ["body"]
+    
+    def test_divergent_command_is_reported(self, appium_config, tmp_path):
+        """Test a command absent from the trace fails and names the recorded test"""
+        path = tmp_path / "login.trace.gz"
+        self._record(appium_config, path)
+        with self._replaying(appium_config, path) as (driver, replayer):
+            open_route(driver, LOGIN_ROUTE, appium_config["appPackage"])
+            replayer.current_test = "replayed::register"
+            with pytest.raises(WebDriverException, match="Replay diverged"):
+                driver.find_element(*LoginLocators.REGISTER_LINK).click()
+        first = replayer.report()["first_divergence"]
+        assert replayer.diverged
+        assert first["test"] == "replayed::register"
+        assert first["request"]["body"]["value"] == LoginLocators.REGISTER_LINK[1]
+        assert first["expected"]["test"] == "recorded::login"
+    
+    def test_original_timing_is_reproduced(self, appium_config, tmp_path):
+        """Test speed 1 answers with the recorded durations, speed 0 at once"""
+        path = tmp_path / "slow.trace.gz"
+        self._record(appium_config, path, latency_ms=15)
+        recorded_ms = sum(entry["ms"] for entry in load_trace(str(path)))
+        timings = {}
+        for speed in (0, 1):
+            start = time.perf_counter()
+            with self._replaying(appium_config, path, speed=speed) as (driver, _):
+                self._login(driver, appium_config)
+            timings[speed] = time.perf_counter() - start
+        assert timings[1] * 1000 >= 0.8 * recorded_ms
+        assert timings[0] < timings[1]
+    
+    def test_page_sources_are_stored_once(self, tmp_path):
+        """Test repeated large responses become one blob in the trace"""
+        path = tmp_path / "blobs.trace.gz"
+        recorder = TraceRecorder(str(path))
+        source = "<hierarchy>" + "<node/>" * 200 + "</hierarchy>"
+        for _ in range(3):
+            recorder.record("GET", "/session/s1/source", None, {"value": source}, 0.0, 0.01)
+        recorder.close()
+        entries = load_trace(str(path))
+        assert len(recorder.blobs) == 1
+        assert [entry["response"]["value"] for entry in entries] == [source] * 3
+        replayer = Replayer(entries)
+        assert replayer.handle("GET", "/session/s1/source", None)[1] == {"value": source}
+        assert replayer.handle("GET", "/session/s2/source", None)[0] == 500
+
+
+# ============================================================================
+# SCHEDULING
+# ============================================================================
+
+class TestDurationScheduler:
+    """Duration history and lane planning of scheduler.py (no device needed)"""
+    
+    def test_history_is_smoothed_across_runs(self, tmp_path):
+        """Test a new duration moves the prediction without replacing it"""
+        store = DurationStore(str(tmp_path / "durations.sqlite"))
+        store.record({"a.py::test_a": (10.0, "passed")})
+        store.record({"a.py::test_a": (20.0, "failed")})
+        entry = store.load()["a.py::test_a"]
+        store.close()
+        assert entry["mean"] == pytest.approx(13.0)
+        assert (entry["last"], entry["runs"], entry["failures"]) == (20.0, 2, 1)
+    
+    def test_unknown_tests_use_their_class(self):
+        """Test a new test is predicted from its siblings, then the suite median"""
+        model = CostModel({
+            "a.py::TestMap::test_pan": {"mean": 8.0, "runs": 1, "failures": 0, "last_outcome": "passed"},
+            "a.py::TestMap::test_zoom": {"mean": 12.0, "runs": 1, "failures": 0, "last_outcome": "passed"},
+            "a.py::TestLogin::test_ok": {"mean": 1.0, "runs": 1, "failures": 0, "last_outcome": "passed"},
+        })
+        assert model.predict("a.py::TestMap::test_fling") == pytest.approx(10.0)
+        assert model.predict("a.py::TestRecords::test_scroll") == pytest.approx(8.0)
+    
+    def test_lanes_are_balanced_longest_first(self):
+        """Test LPT keeps the makespan close to the ideal split"""
+        costs = {"t7": 7, "t6": 6, "t5": 5, "t4": 4, "t3": 3, "t2": 2, "t1": 1}
+        plan, loads = balance(list(costs), costs, lanes=2)
+        assert longest_first(list(costs), costs)[:2] == ["t7", "t6"]
+        assert sorted(loads) == [14, 14]
+        assert sorted(nodeid for lane in plan for nodeid in lane) == sorted(costs)
+    
+    def test_budget_prefers_valuable_tests(self):
+        """Test the budget keeps cheap high-value tests and drops what does not fit"""
+        costs = {"smoke": 2.0, "failing": 4.0, "slow": 30.0, "plain": 3.0}
+        values = {"smoke": 4.0, "failing": 5.0, "slow": 1.0, "plain": 1.0}
+        assert within_budget(list(costs), costs, values, budget_s=7.0) == ["smoke", "failing"]
+        assert within_budget(list(costs), costs, values, budget_s=5.0, lanes=2) == \
+            ["smoke", "failing", "plain"]
+
 
 # ============================================================================
 # PYTEST CONFIGURATION
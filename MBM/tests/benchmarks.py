@@ -0,0 +1,143 @@
+"""
+Benchmark helpers for tests under the ``performance`` marker
+Repeats a measurement, summarises it with percentiles and compares it with a
+stored baseline so startup and navigation slowdowns fail the run.
+
+Baselines are only written with PERF_UPDATE_BASELINES=true, so a first run on
+a new device does not silently add numbers to the tree; benchmarks without a
+baseline are logged and pass. Timings against the fake Appium server say
+nothing about a device and are neither gated nor recorded.
+
+    PERF_REPEAT                 measurements per benchmark (default 5)
+    PERF_REGRESSION_THRESHOLD   allowed p50 slowdown, 0.2 = 20% (default 0.2)
+    PERF_MIN_DELTA_MS           ignore slowdowns smaller than this (default 50)
+    PERF_BASELINE_FILE          JSON baseline store (default baselines/performance.json)
+    PERF_UPDATE_BASELINES       true to record or overwrite baselines with this run
+"""
+
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+
+from reporting import lock_exclusive, read_json, write_json
+from waits import WaitEngine, screen_visible
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines", "performance.json"
+)
+
+
+def repeat_count(default=5):
+    return int(os.getenv("PERF_REPEAT", default))
+
+
+def percentile(samples, pct):
+    """Linear-interpolated percentile of ``samples`` (pct in 0..100)"""
+    ordered = sorted(samples)
+    if not ordered:
+        raise ValueError("No samples")
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Stats:
+    """Percentile summary of a list of durations in seconds"""
+
+    def __init__(self, samples):
+        self.samples = list(samples)
+        self.count = len(self.samples)
+        self.min = min(self.samples)
+        self.max = max(self.samples)
+        self.mean = statistics.fmean(self.samples)
+        self.p50 = percentile(self.samples, 50)
+        self.p90 = percentile(self.samples, 90)
+        self.p95 = percentile(self.samples, 95)
+
+    def as_dict(self):
+        return {
+            "count": self.count, "min": self.min, "max": self.max, "mean": self.mean,
+            "p50": self.p50, "p90": self.p90, "p95": self.p95,
+        }
+
+    def __str__(self):
+        return (f"n={self.count} min={self.min * 1000:.0f}ms p50={self.p50 * 1000:.0f}ms "
+                f"p90={self.p90 * 1000:.0f}ms p95={self.p95 * 1000:.0f}ms "
+                f"max={self.max * 1000:.0f}ms")
+
+
+def measure(run, repeat=None, setup=None):
+    """Call ``setup`` then time ``run`` ``repeat`` times"""
+    samples = []
+    for _ in range(repeat or repeat_count()):
+        if setup is not None:
+            setup()
+        samples.append(run())
+    return Stats(samples)
+
+
+def time_until_visible(driver, action, locator, timeout=60):
+    """Seconds from calling ``action`` until ``locator`` is visible
+
+    Polls at a fixed short interval so the measurement is not skewed by the
+    back-off the regular waits use.
+    """
+    engine = WaitEngine(driver, initial_interval=0.02, max_interval=0.02, backoff=1.0)
+    start = time.perf_counter()
+    action()
+    engine.until(screen_visible(locator), timeout)
+    return time.perf_counter() - start
+
+
+class BaselineStore:
+    """Baselines keyed by device and benchmark name"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("PERF_BASELINE_FILE", DEFAULT_BASELINE_FILE)
+        self.threshold = float(os.getenv("PERF_REGRESSION_THRESHOLD", 0.2))
+        self.min_delta = float(os.getenv("PERF_MIN_DELTA_MS", 50)) / 1000.0
+        self.update = os.getenv("PERF_UPDATE_BASELINES", "false").lower() == "true"
+        self.enabled = os.getenv("APPIUM_FAKE_SERVER", "false").lower() != "true"
+        self.data = read_json(self.path) if os.path.exists(self.path) else {}
+
+    def check(self, device, name, stats):
+        """Compare with the stored baseline; returns a regression message or None
+
+        With PERF_UPDATE_BASELINES=true the run is recorded instead.
+        """
+        if not self.enabled:
+            return None
+        key = f"{device}:{name}"
+        if self.update:
+            self._save(key, stats)
+            return None
+        baseline = self.data.get(key)
+        if baseline is None:
+            logger.info("No baseline for %s (record one with PERF_UPDATE_BASELINES=true)", key)
+            return None
+
+        allowed = baseline["p50"] * (1 + self.threshold)
+        if stats.p50 > allowed and stats.p50 - baseline["p50"] > self.min_delta:
+            return (
+                f"{name} regressed on {device}: p50 {stats.p50 * 1000:.0f}ms vs baseline "
+                f"{baseline['p50'] * 1000:.0f}ms (threshold +{self.threshold:.0%})"
+            )
+        return None
+
+    def _save(self, key, stats):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".lock", "w") as lock_file:
+            # Other xdist workers record into the same file
+            lock_exclusive(lock_file)
+            if os.path.exists(self.path):
+                self.data = read_json(self.path)
+            self.data[key] = dict(stats.as_dict(), recorded=datetime.now().isoformat())
+            write_json(self.path + ".tmp", self.data)
+            os.replace(self.path + ".tmp", self.path)
@@ -0,0 +1,102 @@
+"""
+Pytest hooks shared by the MásBosque Manu Appium suite
+Collects per-test durations on every worker and merges them into one timing
+report once the whole (possibly pytest-xdist distributed) run has finished.
+Duration-based ordering (--schedule, --time-budget) lives in scheduler.py.
+With SCREENSHOT_ON_FAILURE=true every failed test that used a driver leaves a
+screenshot under reports/screenshots.
+"""
+
+import logging
+import os
+import time
+
+import pytest
+
+import visual
+from devices import DeviceRegistry
+from reporting import (
+    clear_worker_timings,
+    format_timings,
+    merge_worker_timings,
+    write_worker_timings,
+)
+
+pytest_plugins = ("scheduler",)
+
+logger = logging.getLogger(__name__)
+
+_timings = {}
+_session_started = None
+
+
+def _worker_id(config):
+    workerinput = getattr(config, "workerinput", None)
+    return workerinput["workerid"] if workerinput else "master"
+
+
+def _is_controller(config):
+    """True on the process that owns the run (xdist controller or plain pytest)"""
+    return not hasattr(config, "workerinput")
+
+
+def pytest_configure(config):
+    if _is_controller(config):
+        clear_worker_timings()
+
+
+def pytest_sessionstart(session):
+    global _session_started
+    _session_started = time.time()
+
+
+def pytest_runtest_logreport(report):
+    if not _is_controller_report(report):
+        return
+    entry = _timings.setdefault(report.nodeid, {
+        "nodeid": report.nodeid,
+        "duration": 0.0,
+        "outcome": "passed",
+    })
+    entry["duration"] += report.duration
+    if report.outcome != "passed":
+        entry["outcome"] = report.outcome
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.when != "call" or not report.failed or not visual.screenshot_on_failure():
+        return
+    driver = getattr(item, "funcargs", {}).get("driver")
+    if driver is None:
+        return
+    path = visual.save_screenshot(driver, item.name)
+    if path:
+        report.user_properties.append(("screenshot", path))
+        logger.info("Screenshot of %s: %s", item.nodeid, path)
+
+
+def _is_controller_report(report):
+    # On the xdist controller reports arrive from workers, which write their own files
+    return not hasattr(report, "node")
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    worker_id = _worker_id(config)
+
+    if _timings:
+        try:
+            device = DeviceRegistry.from_env().allocate(worker_id).device.name
+        except (RuntimeError, ValueError, OSError):
+            device = os.getenv("APPIUM_DEVICE_NAME", "unknown")
+        write_worker_timings(
+            worker_id, device, _session_started, time.time(), list(_timings.values())
+        )
+
+    if _is_controller(config):
+        merged = merge_worker_timings()
+        if merged:
+            logger.info("Timing report\n%s", format_timings(merged))
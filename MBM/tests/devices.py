@@ -0,0 +1,106 @@
+"""
+Device registry for running the Appium suite on several devices at once
+Each pytest-xdist worker (gw0, gw1, ...) gets its own device, Appium server
+and a unique systemPort/mjpegServerPort pair so UiAutomator2 sessions never
+collide on the host.
+
+Devices are read from, in order:
+    APPIUM_DEVICES_FILE  JSON list of {"name", "udid", "server"} objects
+    APPIUM_DEVICES       comma separated "udid@server" entries
+    APPIUM_DEVICE_NAME / APPIUM_SERVER_URL for the single-device setup, with
+    APPIUM_DEVICE_UDID (adb serial) when more than one device is connected
+"""
+
+import json
+import os
+
+DEFAULT_SERVER_URL = "http://127.0.0.1:4723"
+SYSTEM_PORT_BASE = 8200
+MJPEG_PORT_BASE = 9200
+
+
+class Device:
+    """One device or emulator and the Appium server driving it"""
+
+    def __init__(self, name, server=DEFAULT_SERVER_URL, udid=None):
+        self.name = name
+        self.server = server
+        self.udid = udid
+
+    def __repr__(self):
+        return f"<Device {self.name} via {self.server}>"
+
+
+class DeviceRegistry:
+    """Maps pytest-xdist workers to devices and ports"""
+
+    def __init__(self, devices, system_port_base=SYSTEM_PORT_BASE,
+                 mjpeg_port_base=MJPEG_PORT_BASE):
+        if not devices:
+            raise ValueError("Device registry is empty")
+        self.devices = devices
+        self.system_port_base = system_port_base
+        self.mjpeg_port_base = mjpeg_port_base
+
+    @classmethod
+    def from_env(cls):
+        """Build the registry from environment variables"""
+        devices_file = os.getenv("APPIUM_DEVICES_FILE")
+        devices_list = os.getenv("APPIUM_DEVICES")
+
+        if devices_file:
+            with open(devices_file, encoding="utf-8") as handle:
+                devices = [Device(**entry) for entry in json.load(handle)]
+        elif devices_list:
+            devices = [cls._parse_entry(entry) for entry in devices_list.split(",")
+                       if entry.strip()]
+        else:
+            devices = [Device(
+                os.getenv("APPIUM_DEVICE_NAME", "emulator-5554"),
+                os.getenv("APPIUM_SERVER_URL", DEFAULT_SERVER_URL),
+                os.getenv("APPIUM_DEVICE_UDID") or None,
+            )]
+
+        return cls(
+            devices,
+            int(os.getenv("APPIUM_SYSTEM_PORT_BASE", SYSTEM_PORT_BASE)),
+            int(os.getenv("APPIUM_MJPEG_PORT_BASE", MJPEG_PORT_BASE)),
+        )
+
+    @staticmethod
+    def _parse_entry(entry):
+        udid, _, server = entry.strip().partition("@")
+        return Device(udid, server or DEFAULT_SERVER_URL, udid)
+
+    def worker_index(self, worker_id):
+        """gw3 -> 3; the main process (no xdist) is worker 0"""
+        if not worker_id or worker_id == "master":
+            return 0
+        return int(worker_id.lstrip("gw"))
+
+    def allocate(self, worker_id=None):
+        """Device and ports reserved for ``worker_id``"""
+        if worker_id is None:
+            worker_id = os.getenv("PYTEST_XDIST_WORKER", "master")
+        index = self.worker_index(worker_id)
+        if index >= len(self.devices):
+            raise RuntimeError(
+                f"Worker {worker_id} has no device: {len(self.devices)} registered, "
+                f"run pytest with -n {len(self.devices)} or fewer"
+            )
+        return Allocation(
+            worker_id,
+            self.devices[index],
+            self.system_port_base + index,
+            self.mjpeg_port_base + index,
+        )
+
+
+class Allocation:
+    """What a single worker owns for the whole session"""
+
+    def __init__(self, worker_id, device, system_port, mjpeg_server_port):
+        self.worker_id = worker_id
+        self.device = device
+        self.system_port = system_port
+        self.mjpeg_server_port = mjpeg_server_port
@@ -0,0 +1,177 @@
+"""
+Driver pool for the MásBosque Manu Appium suite
+Keeps UiAutomator2 sessions open for the whole pytest session (one pool per
+worker process) and resets the Expo app between tests instead of paying for a
+new webdriver.Remote session every time.
+"""
+
+import logging
+import os
+import time
+
+import element_cache
+
+logger = logging.getLogger(__name__)
+
+# Expo Go serves the project under exp://<host>:<port>/--/<route>
+DEFAULT_DEEP_LINK_BASE = "exp://127.0.0.1:8081/--/"
+LOGIN_ROUTE = "logIn"
+REGISTER_ROUTE = "register"
+MAP_ROUTE = "mapView"
+RECORDS_ADMIN_ROUTE = "recordsAdmin"
+RECORDS_PARAMEDIC_ROUTE = "recordsParamedic"
+DAILY_JOURNAL_ROUTE = "dailyJournal"
+ADMIN_NOTIFICATIONS_ROUTE = "adminNotifications"
+EDIT_PROFILE_ROUTE = "editProfile"
+TEST_SESSION_ROUTE = "testSession"
+
+
+def open_route(driver, route, app_package, deep_link_base=None):
+    """Navigate ``driver`` to an expo-router route through a deep link"""
+    base = deep_link_base or os.getenv("APPIUM_DEEP_LINK_BASE", DEFAULT_DEEP_LINK_BASE)
+    element_cache.invalidate(driver)
+    driver.execute_script("mobile: deepLink", {
+        "url": f"{base}{route}",
+        "package": app_package,
+    })
+
+
+class DriverPool:
+    """Pool of reusable Appium sessions
+
+    ``factory`` is a zero-argument callable returning a new driver. Drivers
+    are handed out by ``acquire`` and given back with ``release``; every
+    acquisition resets the app straight to the route asked for (logIn by
+    default) and replaces sessions that stopped answering.
+    """
+
+    def __init__(self, factory, app_package, deep_link_base=None, max_size=1):
+        self.factory = factory
+        self.app_package = app_package
+        self.deep_link_base = deep_link_base or os.getenv(
+            "APPIUM_DEEP_LINK_BASE", DEFAULT_DEEP_LINK_BASE
+        )
+        self.max_size = max_size
+        self._idle = []
+        self._in_use = []
+        self.stats = PoolStats()
+
+    # ------------------------------------------------------------------
+    # Session lifecycle
+    # ------------------------------------------------------------------
+
+    def acquire(self, route=LOGIN_ROUTE):
+        """Get a healthy driver with the app reset to ``route``"""
+        driver = None
+        while self._idle:
+            candidate = self._idle.pop()
+            if self.is_alive(candidate):
+                driver = candidate
+                break
+            logger.warning("Discarding dead Appium session %s", candidate.session_id)
+            self.stats.dead_sessions += 1
+            self._quit(candidate)
+
+        if driver is None:
+            if len(self._in_use) >= self.max_size:
+                raise RuntimeError(
+                    f"Driver pool exhausted ({self.max_size} sessions in use)"
+                )
+            driver = self._create()
+            self.open_route(driver, route)
+        else:
+            self.stats.reuses += 1
+            self.reset(driver, route)
+
+        self.stats.acquisitions += 1
+        self._in_use.append(driver)
+        return driver
+
+    def release(self, driver):
+        """Return a driver to the pool"""
+        if driver in self._in_use:
+            self._in_use.remove(driver)
+        self._idle.append(driver)
+
+    def close(self):
+        """Quit every session owned by the pool"""
+        for driver in self._idle + self._in_use:
+            self._quit(driver)
+        self._idle = []
+        self._in_use = []
+
+    def _create(self):
+        start = time.perf_counter()
+        driver = self.factory()
+        self.stats.record_setup(time.perf_counter() - start)
+        return driver
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------
+    # Health and reset
+    # ------------------------------------------------------------------
+
+    def is_alive(self, driver):
+        """Check the session still answers commands"""
+        if not getattr(driver, "session_id", None):
+            return False
+        try:
+            driver.current_package
+            return True
+        except Exception:
+            return False
+
+    def reset(self, driver, route=LOGIN_ROUTE):
+        """Restart the Expo app and open ``route`` by deep link"""
+        start = time.perf_counter()
+        driver.terminate_app(self.app_package)
+        driver.activate_app(self.app_package)
+        self.open_route(driver, route)
+        self.stats.reset_time += time.perf_counter() - start
+
+    def open_route(self, driver, route):
+        """Navigate to an expo-router route through a deep link"""
+        open_route(driver, route, self.app_package, self.deep_link_base)
+
+
+class PoolStats:
+    """Counters used to report how much session setup the pool saved"""
+
+    def __init__(self):
+        self.sessions_created = 0
+        self.setup_time = 0.0
+        self.reset_time = 0.0
+        self.acquisitions = 0
+        self.reuses = 0
+        self.dead_sessions = 0
+
+    def record_setup(self, seconds):
+        self.sessions_created += 1
+        self.setup_time += seconds
+
+    @property
+    def average_setup(self):
+        if not self.sessions_created:
+            return 0.0
+        return self.setup_time / self.sessions_created
+
+    @property
+    def time_saved(self):
+        """Setup time avoided by reuse, minus what the resets cost"""
+        return self.reuses * self.average_setup - self.reset_time
+
+    def summary(self):
+        return (
+            f"Driver pool: {self.acquisitions} acquisitions, "
+            f"{self.sessions_created} sessions created "
+            f"(avg setup {self.average_setup:.2f}s), "
+            f"{self.reuses} reuses, {self.dead_sessions} dead sessions replaced, "
+            f"reset time {self.reset_time:.2f}s, "
+            f"estimated time saved {self.time_saved:.2f}s"
+        )
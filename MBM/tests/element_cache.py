@@ -0,0 +1,85 @@
+"""
+Element-handle cache for the page objects
+Each driver keeps the elements already resolved on the current screen, keyed
+by locator, so ``send_keys`` followed by ``get_text`` on the same field costs
+one findElement instead of two. Handles that went stale (the view was
+re-rendered) are looked up again once, and the whole cache is dropped on
+navigation: deep links, taps that may leave the screen, alerts.
+
+    APPIUM_ELEMENT_CACHE    cache element handles (default true)
+"""
+
+import os
+
+from selenium.common.exceptions import StaleElementReferenceException
+
+
+def enabled():
+    return os.getenv("APPIUM_ELEMENT_CACHE", "true").lower() == "true"
+
+
+class ElementCache:
+    """Resolved element handles of the screen currently shown"""
+
+    def __init__(self):
+        self.elements = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    def get(self, locator, resolve):
+        """Cached handle for ``locator``, calling ``resolve()`` on a miss"""
+        key = tuple(locator)
+        if key in self.elements:
+            self.hits += 1
+            return self.elements[key]
+        self.misses += 1
+        element = resolve()
+        if enabled():
+            self.elements[key] = element
+        return element
+
+    def use(self, locator, resolve, action):
+        """``action(element)``, re-resolving once if the cached handle went stale"""
+        element = self.get(locator, resolve)
+        try:
+            return action(element)
+        except StaleElementReferenceException:
+            return action(self.refresh(locator, resolve))
+
+    def refresh(self, locator, resolve):
+        """Drop the stale handle of ``locator`` and resolve it again"""
+        self.stale += 1
+        self.elements.pop(tuple(locator), None)
+        return self.get(locator, resolve)
+
+    def invalidate(self):
+        if self.elements:
+            self.invalidations += 1
+        self.elements.clear()
+
+    def reset_counters(self):
+        self.hits = self.misses = self.stale = self.invalidations = 0
+
+    def counters(self):
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale,
+                "invalidations": self.invalidations}
+
+    def summary(self):
+        return (f"Element cache: {self.hits} hits, {self.misses} lookups, "
+                f"{self.stale} stale re-resolved, {self.invalidations} invalidations")
+
+
+def cache_for(driver):
+    """The element cache shared by every page object on ``driver``"""
+    cache = getattr(driver, "_element_cache", None)
+    if cache is None:
+        cache = driver._element_cache = ElementCache()
+    return cache
+
+
+def invalidate(driver):
+    cache = getattr(driver, "_element_cache", None)
+    if cache is not None:
+        cache.invalidate()
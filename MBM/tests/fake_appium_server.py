@@ -0,0 +1,971 @@
+"""
+Local stand-in for an Appium/UiAutomator2 server
+Implements the W3C WebDriver endpoints the suite uses (sessions, element
+lookup, click/clear/send keys, attributes, page source, alerts, logcat,
+W3C actions, execute_driver and the ``mobile:`` extensions) on top of a
+state-machine model of the app's ``logIn`` and ``register`` screens and the
+records list, so appium_tests.py can run headless on Linux without a device.
+
+Every command can be slowed down with an artificial latency profile to
+reproduce a real device or a remote device lab:
+
+    python fake_appium_server.py --port 4723 --latency 40 --typing 8 \
+        --command-latency "findElement=80,getPageSource=150,mobile: activateApp=900"
+
+``--typing`` adds milliseconds per character to setValue, the way
+UiAutomator2 sends typed text as key events.
+
+or from the suite with APPIUM_FAKE_SERVER=true (see the appium_server fixture).
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lxml import etree
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+APP_PACKAGE = "host.exp.exponent"
+
+LOGIN_ROUTE = "logIn"
+REGISTER_ROUTE = "register"
+MAP_ROUTE = "mapView"
+RECORDS_ADMIN_ROUTE = "recordsAdmin"
+RECORDS_PARAMEDIC_ROUTE = "recordsParamedic"
+EDIT_PROFILE_ROUTE = "editProfile"
+# Log cards on screen at once and their height in pixels
+VISIBLE_CARDS = 6
+CARD_HEIGHT = 240
+TEST_SESSION_ROUTE = "testSession"
+
+
+class WebDriverError(Exception):
+    """W3C error response"""
+
+    def __init__(self, error, message, status=404):
+        super().__init__(message)
+        self.error = error
+        self.message = message
+        self.status = status
+
+
+# ============================================================================
+# VIEW HIERARCHY
+# ============================================================================
+
+class Node:
+    """One view in the rendered hierarchy"""
+
+    def __init__(self, key, cls, text="", desc="", resource_id="", children=(),
+                 clickable=False, password=False, hint="", on_click=None,
+                 field=None):
+        self.key = key
+        self.cls = cls
+        self.text = text
+        self.desc = desc
+        self.resource_id = resource_id
+        self.children = list(children)
+        self.clickable = clickable
+        self.password = password
+        self.hint = hint
+        self.on_click = on_click
+        self.field = field
+        self.displayed = True
+        self.enabled = True
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def attributes(self):
+        return {
+            "class": self.cls,
+            "package": APP_PACKAGE,
+            "text": self.text,
+            "content-desc": self.desc,
+            "resource-id": self.resource_id,
+            "hint": self.hint,
+            "clickable": _bool(self.clickable),
+            "enabled": _bool(self.enabled),
+            "focusable": _bool(self.field is not None),
+            "password": _bool(self.password),
+            "displayed": _bool(self.displayed),
+        }
+
+
+def _bool(value):
+    return "true" if value else "false"
+
+
+# ============================================================================
+# APP MODEL
+# ============================================================================
+
+class AppModel:
+    """State machine of the login/register flow of the Expo app"""
+
+    def __init__(self, accounts=None, records=None):
+        self.accounts = dict(accounts or {
+            os.getenv("TEST_USER_EMAIL", "test@example.com"): {
+                "password": os.getenv("TEST_USER_PASSWORD", "TestPassword123!"),
+                "name": os.getenv("TEST_DOCTOR_NAME", "Dr. Test User"),
+                "role": "medico",
+            },
+        })
+        self.running = True
+        self.route = LOGIN_ROUTE
+        self.user = None
+        self.fields = {}
+        self.user_type = "medico"
+        self.dropdown_open = False
+        self.alert = None
+        self.generation = 0
+        self.logcat = []
+        # UserLogs rows the records screens list, newest first
+        self.records = records if records is not None else []
+        self.scroll = 0
+        self.reset_route(LOGIN_ROUTE)
+
+    # -- navigation ---------------------------------------------------------
+
+    def reset_route(self, route):
+        self.route = route
+        self.fields = {"name": "", "email": "", "password": ""}
+        self.user_type = "medico"
+        self.dropdown_open = False
+        self.alert = None
+        self.scroll = 0
+        self.generation += 1
+
+    def navigate(self, route):
+        if route == EDIT_PROFILE_ROUTE and self.user is None:
+            # editProfile sends the user to logIn when there is no profile
+            route = LOGIN_ROUTE
+        self.reset_route(route)
+        if route == MAP_ROUTE:
+            self.log("MAP_PINS", "🗺️ Loading map pins...")
+            self.log("MAP_PINS", "✓ Map display: 0 pins")
+
+    def open_url(self, url):
+        route = url.rsplit("/--/", 1)[-1] if "/--/" in url else url.rsplit("/", 1)[-1]
+        route, _, query = route.partition("?")
+        route = route.strip("/") or LOGIN_ROUTE
+        self.running = True
+        if route == TEST_SESSION_ROUTE:
+            self.inject_session(dict(urllib.parse.parse_qsl(query)))
+            return
+        self.navigate(route)
+
+    def inject_session(self, params):
+        """app/testSession.tsx: store the session and user_data, open ``next``"""
+        if not params.get("user_id"):
+            self.navigate(LOGIN_ROUTE)
+            return
+        self.user = {
+            "id": params["user_id"],
+            "name": params.get("name", ""),
+            "role": params.get("role", "medico"),
+        }
+        self.log("TEST_SESSION", f"Injected {self.user['role']} session, opening {params.get('next')}")
+        self.navigate(params.get("next") or MAP_ROUTE)
+
+    def terminate(self):
+        self.running = False
+        self.generation += 1
+
+    def activate(self):
+        if not self.running:
+            self.running = True
+            self.reset_route(LOGIN_ROUTE)
+
+    def show_alert(self, title, message):
+        self.alert = {"title": title, "message": message}
+        self.generation += 1
+
+    def dismiss_alert(self):
+        if self.alert is None:
+            raise WebDriverError("no such alert", "No alert is open")
+        self.alert = None
+        self.generation += 1
+
+    def log(self, tag, text):
+        """Logcat entry LoggingService.info(tag, text) would produce"""
+        now = time.time()
+        local = time.localtime(now)
+        stamp = time.strftime("%m-%d %H:%M:%S", local) + f".{int(now * 1000) % 1000:03d}"
+        self.logcat.append({
+            "timestamp": int(now * 1000), "level": "INFO",
+            "message": f"{stamp}  4321  4350 I ReactNativeJS: "
+                       f"{time.strftime('%I:%M:%S %p', local)} | INFO : [EVENT][SENTRY]: {tag}: {text}",
+        })
+
+    # -- actions ------------------------------------------------------------
+
+    def submit_login(self):
+        email, password = self.fields["email"], self.fields["password"]
+        if not email or not password:
+            self.show_alert("Error", "Por favor llena todos los campos.")
+            return
+        account = self.accounts.get(email)
+        if account is None or account["password"] != password:
+            self.show_alert("Error", "Invalid login credentials")
+            return
+        self.user = {"id": email, "name": account["name"], "role": account["role"]}
+        self.log("AUTH", f"✓ User signed in: {email}")
+        self.log("PROFILE_LOAD", f"👤 Loading profile {email}...")
+        self.log("PROFILE_LOADED", f"✓ Profile {email} loaded from Supabase")
+        self.navigate(MAP_ROUTE)
+
+    def submit_register(self):
+        name, email, password = (self.fields[key] for key in ("name", "email", "password"))
+        if not email or not password or not self.user_type or not name:
+            self.show_alert("Error", "Por favor llena todos los campos.")
+            return
+        if len(password) < 6:
+            self.show_alert("Error", "La contraseña debe tener al menos 6 caracteres.")
+            return
+        if not re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", email):
+            self.show_alert("Error", "Unable to validate email address: invalid format")
+            return
+        if email in self.accounts:
+            self.show_alert("Error", "User already registered")
+            return
+        self.accounts[email] = {"password": password, "name": name, "role": self.user_type}
+        self.user = {"id": email, "name": name, "role": self.user_type}
+        self.navigate(MAP_ROUTE)
+        self.show_alert("Registro exitoso", "Cuenta y perfil creados.")
+
+    def visible_logs(self):
+        if self.route == RECORDS_PARAMEDIC_ROUTE:
+            user_id = (self.user or {}).get("id")
+            return [log for log in self.records if log.get("userID") == user_id]
+        return self.records
+
+    def scroll_by(self, pixels):
+        """Scroll the records list; the FlatList stops at either end"""
+        last = max(0, len(self.visible_logs()) - VISIBLE_CARDS)
+        self.scroll = min(last, max(0, self.scroll + int(pixels // CARD_HEIGHT)))
+        self.generation += 1
+
+    def toggle_dropdown(self):
+        self.dropdown_open = not self.dropdown_open
+        self.generation += 1
+
+    def choose_user_type(self, value):
+        self.user_type = value
+        self.dropdown_open = False
+        self.generation += 1
+
+    # -- rendering ----------------------------------------------------------
+
+    def render(self):
+        """Root node of what UiAutomator2 would currently see"""
+        if not self.running:
+            return Node("launcher", "android.widget.FrameLayout")
+        if self.alert is not None:
+            return self._render_alert()
+        if self.route == REGISTER_ROUTE:
+            return self._render_register()
+        if self.route == LOGIN_ROUTE:
+            return self._render_login()
+        if self.route in (RECORDS_ADMIN_ROUTE, RECORDS_PARAMEDIC_ROUTE):
+            return self._render_records()
+        if self.route == EDIT_PROFILE_ROUTE:
+            return self._render_profile()
+        children = [Node(f"{self.route}.title", "android.widget.TextView", text=self.route)]
+        if self.route == MAP_ROUTE:
+            children.append(Node("mapView.map", "android.view.View", desc="Google Map"))
+        return self._screen(self.route, children)
+
+    def _render_profile(self):
+        # editProfile prints each value with a leading space
+        return self._screen("profile", [
+            Node("profile.title", "android.widget.TextView", text="Perfil"),
+            Node("profile.name_label", "android.widget.TextView", text="Nombre"),
+            Node("profile.name", "android.widget.TextView", text=f" {self.user['name']}"),
+            Node("profile.role_label", "android.widget.TextView", text="Rol"),
+            Node("profile.role", "android.widget.TextView", text=f" {self.user['role']}"),
+            Node("profile.logout", "android.widget.Button", text="Cerrar Sesión", clickable=True),
+        ])
+
+    def _render_records(self):
+        logs = self.visible_logs()
+        cards = [
+            Node(f"records.card{index}", "android.view.ViewGroup", children=[
+                Node(f"records.card{index}.name", "android.widget.TextView", text=log["name"]),
+                Node(f"records.card{index}.date", "android.widget.TextView", text=log["logDate"]),
+                Node(f"records.card{index}.title", "android.widget.TextView",
+                     text=log.get("description") or ""),
+            ])
+            for index, log in enumerate(logs[self.scroll:self.scroll + VISIBLE_CARDS], self.scroll)
+        ]
+        if not logs:
+            cards = [Node("records.empty", "android.widget.TextView", text="No hay registros")]
+        return self._screen("records", [
+            Node("records.title", "android.widget.TextView", text="Registros"),
+            Node("records.filter", "android.widget.Button", text="Filtrar", clickable=True),
+            Node("records.list", "android.widget.ScrollView", children=cards),
+        ])
+
+    def _screen(self, name, children):
+        return Node(f"{name}.root", "android.widget.FrameLayout", children=[
+            Node(f"{name}.form", "android.view.ViewGroup", children=children),
+        ])
+
+    def _input(self, key, desc, field, password=False):
+        value = self.fields[field]
+        return Node(
+            key, "android.widget.EditText",
+            text="•" * len(value) if password else value,
+            desc=desc, hint=desc, clickable=True, password=password, field=field,
+        )
+
+    def _render_login(self):
+        return self._screen("login", [
+            Node("login.title", "android.widget.TextView", text="Iniciar Sesión"),
+            Node("login.email_label", "android.widget.TextView", text="Correo"),
+            self._input("login.email", "Usuario", "email"),
+            Node("login.password_label", "android.widget.TextView", text="Contraseña"),
+            self._input("login.password", "Contraseña", "password", password=True),
+            Node("login.submit", "android.widget.Button", text="Iniciar Sesión",
+                 clickable=True, on_click=self.submit_login),
+            Node("login.register_link", "android.widget.TextView", text="Registrar Usuario",
+                 clickable=True, on_click=lambda: self.navigate(REGISTER_ROUTE)),
+        ])
+
+    def _render_register(self):
+        if self.dropdown_open:
+            # react-native-element-dropdown renders its options in a modal window
+            return Node("dropdown.root", "android.widget.FrameLayout", children=[
+                Node("dropdown.medico", "android.widget.TextView", text="Médico",
+                     clickable=True, on_click=lambda: self.choose_user_type("medico")),
+                Node("dropdown.admin", "android.widget.TextView", text="Admin",
+                     clickable=True, on_click=lambda: self.choose_user_type("admin")),
+            ])
+        label = "Médico" if self.user_type == "medico" else "Admin"
+        return self._screen("register", [
+            Node("register.title", "android.widget.TextView", text="Registrar Usuario"),
+            Node("register.name_label", "android.widget.TextView", text="Nombre Completo"),
+            self._input("register.name", "Nombre completo", "name"),
+            Node("register.email_label", "android.widget.TextView", text="Email"),
+            self._input("register.email", "Email", "email"),
+            Node("register.password_label", "android.widget.TextView", text="Contraseña"),
+            self._input("register.password", "Contraseña", "password", password=True),
+            Node("register.type_label", "android.widget.TextView", text="Tipo de Usuario"),
+            Node("register.type", "android.view.ViewGroup", desc=f"Tipo de Usuario, {label}",
+                 clickable=True, on_click=self.toggle_dropdown, children=[
+                     Node("register.type_value", "android.widget.TextView", text=label,
+                          clickable=True, on_click=self.toggle_dropdown),
+                 ]),
+            Node("register.submit", "android.widget.Button", text="Registrar",
+                 clickable=True, on_click=self.submit_register),
+            Node("register.login_link", "android.widget.TextView", text="Iniciar Sesión",
+                 clickable=True, on_click=lambda: self.navigate(LOGIN_ROUTE)),
+        ])
+
+    def _render_alert(self):
+        return Node("alert.root", "android.widget.FrameLayout", children=[
+            Node("alert.title", "android.widget.TextView", text=self.alert["title"],
+                 resource_id="android:id/alertTitle"),
+            Node("alert.message", "android.widget.TextView", text=self.alert["message"],
+                 resource_id="android:id/message"),
+            Node("alert.ok", "android.widget.Button", text="OK",
+                 resource_id="android:id/button1", clickable=True,
+                 on_click=self.dismiss_alert),
+        ])
+
+
+# ============================================================================
+# ELEMENT LOOKUP
+# ============================================================================
+
+_UISELECTOR_CALL = re.compile(r'\.(\w+)\((?:"((?:[^"\\]|\\.)*)"|(true|false|\d+))\)')
+
+
+def _uiselector_matcher(selector):
+    calls = [(method, text if text is not None else literal)
+             for method, text, literal in _UISELECTOR_CALL.findall(selector)]
+    if not selector.strip().startswith("new UiSelector()") or not calls:
+        raise WebDriverError("invalid selector", f"Unsupported UiSelector: {selector}", 400)
+
+    tests = {
+        "className": lambda node, v: node.cls == v,
+        "text": lambda node, v: node.text == v,
+        "textContains": lambda node, v: v in node.text,
+        "textStartsWith": lambda node, v: node.text.startswith(v),
+        "description": lambda node, v: node.desc == v,
+        "descriptionContains": lambda node, v: v in node.desc,
+        "resourceId": lambda node, v: node.resource_id == v,
+        "clickable": lambda node, v: _bool(node.clickable) == v,
+    }
+    for method, _ in calls:
+        if method not in tests:
+            raise WebDriverError("invalid selector", f"Unsupported UiSelector method: {method}", 400)
+    unescape = lambda value: value.replace('\\"', '"').replace("\\\\", "\\")
+    return lambda node: all(tests[m](node, unescape(v)) for m, v in calls)
+
+
+class Screen:
+    """Rendered hierarchy plus the XML UiAutomator2 would return for it"""
+
+    def __init__(self, root):
+        self.root = root
+        self.nodes = {node.key: node for node in root.walk()}
+        self.tree = etree.Element("hierarchy", {
+            "index": "0", "class": "hierarchy", "rotation": "0",
+            "width": "1080", "height": "1920",
+        })
+        self._build(self.tree, root, 0)
+
+    def _build(self, parent, node, index):
+        attributes = {"index": str(index)}
+        attributes.update(node.attributes())
+        attributes["_key"] = node.key
+        element = etree.SubElement(parent, node.cls, attributes)
+        for child_index, child in enumerate(node.children):
+            self._build(element, child, child_index)
+
+    def source(self):
+        tree = etree.fromstring(etree.tostring(self.tree))
+        for element in tree.iter():
+            element.attrib.pop("_key", None)
+        return etree.tostring(tree, encoding="UTF-8", xml_declaration=True,
+                              standalone=True).decode("utf-8")
+
+    def find(self, using, value, scope=None):
+        candidates = list(scope.walk())[1:] if scope is not None else list(self.root.walk())
+        if using == "xpath":
+            context = self.tree
+            if scope is not None:
+                context = self.tree.xpath(f"//*[@_key='{scope.key}']")[0]
+            try:
+                matches = context.xpath(value)
+            except etree.XPathError as error:
+                raise WebDriverError("invalid selector", str(error), 400)
+            keys = {match.get("_key") for match in matches if hasattr(match, "get")}
+            return [node for node in candidates if node.key in keys]
+        if using == "accessibility id":
+            return [node for node in candidates if node.desc == value]
+        if using == "-android uiautomator":
+            matcher = _uiselector_matcher(value)
+            return [node for node in candidates if matcher(node)]
+        if using == "id":
+            return [node for node in candidates if node.resource_id == value]
+        if using == "class name":
+            return [node for node in candidates if node.cls == value]
+        raise WebDriverError("invalid selector", f"Unsupported locator strategy: {using}", 400)
+
+
+# ============================================================================
+# SESSION
+# ============================================================================
+
+class Session:
+    """One Appium session bound to its own copy of the app model"""
+
+    def __init__(self, capabilities, records=None):
+        self.id = uuid.uuid4().hex
+        self.capabilities = capabilities
+        self.model = AppModel(records=records)
+        self.elements = {}
+        self.log_cursor = 0
+        self.clipboard = ""
+        self.focused = None
+        self._screen = None
+        self._screen_generation = None
+
+    def screen(self):
+        generation = (self.model.generation, self.model.running, tuple(self.model.fields.items()))
+        if self._screen is None or generation != self._screen_generation:
+            self._screen = Screen(self.model.render())
+            self._screen_generation = generation
+        return self._screen
+
+    def element_ref(self, node):
+        element_id = f"{self.model.generation:08x}-{node.key}"
+        self.elements[element_id] = (self.model.generation, node.key)
+        return {ELEMENT_KEY: element_id, "ELEMENT": element_id}
+
+    def resolve(self, element_id):
+        if element_id not in self.elements:
+            raise WebDriverError("no such element", f"Unknown element {element_id}")
+        generation, key = self.elements[element_id]
+        node = self.screen().nodes.get(key)
+        if generation != self.model.generation or node is None:
+            raise WebDriverError(
+                "stale element reference",
+                f"Element {element_id} is no longer attached to the view hierarchy",
+            )
+        return node
+
+
+# ============================================================================
+# HTTP SERVER
+# ============================================================================
+
+class LatencyProfile:
+    """Artificial delay added before each command is answered"""
+
+    def __init__(self, default_ms=0.0, jitter_ms=0.0, per_command=None, typing_ms=0.0):
+        self.default_ms = default_ms
+        self.jitter_ms = jitter_ms
+        self.per_command = dict(per_command or {})
+        self.typing_ms = typing_ms
+
+    @classmethod
+    def parse(cls, default_ms=0.0, jitter_ms=0.0, overrides="", typing_ms=0.0):
+        per_command = {}
+        for entry in filter(None, (overrides or "").split(",")):
+            name, _, value = entry.partition("=")
+            per_command[name.strip()] = float(value)
+        return cls(float(default_ms), float(jitter_ms), per_command, float(typing_ms))
+
+    @classmethod
+    def from_env(cls):
+        return cls.parse(
+            os.getenv("FAKE_APPIUM_LATENCY_MS", 0),
+            os.getenv("FAKE_APPIUM_JITTER_MS", 0),
+            os.getenv("FAKE_APPIUM_COMMAND_LATENCY", ""),
+            os.getenv("FAKE_APPIUM_TYPING_MS", 0),
+        )
+
+    def delay(self, command, characters=0):
+        base = self.per_command.get(command, self.default_ms) + self.typing_ms * characters
+        if self.jitter_ms:
+            base += random.uniform(-self.jitter_ms, self.jitter_ms)
+        if base > 0:
+            time.sleep(base / 1000.0)
+
+
+_ROUTES = []
+
+
+def route(method, pattern, command):
+    """Register a handler for METHOD /session/<id>/... style paths"""
+    regex = re.compile("^" + re.sub(r"<(\w+)>", r"(?P<\1>[^/]+)", pattern) + "$")
+
+    def decorator(func):
+        _ROUTES.append((method, regex, command, func))
+        return func
+    return decorator
+
+
+class FakeAppium:
+    """Command handlers shared by every HTTP request"""
+
+    def __init__(self, latency=None, allow_insecure=()):
+        self.latency = latency or LatencyProfile()
+        self.allow_insecure = set(allow_insecure)
+        self.sessions = {}
+        self.lock = threading.RLock()
+        self.command_counts = {}
+        self.connections = 0
+        self.records = []
+
+    def dispatch(self, method, path, body):
+        for route_method, regex, command, func in _ROUTES:
+            match = regex.match(path)
+            if match and route_method == method:
+                if command == "execute":
+                    # mobile: extensions are profiled under their own names
+                    command = body.get("script", command)
+                self.latency.delay(command, len(_typed(body)) if command == "setValue" else 0)
+                with self.lock:
+                    self.command_counts[command] = self.command_counts.get(command, 0) + 1
+                    return func(self, body, **match.groupdict())
+        raise WebDriverError("unknown command", f"Unknown command {method} {path}")
+
+    def session(self, session_id):
+        if session_id not in self.sessions:
+            raise WebDriverError("invalid session id", f"Session {session_id} does not exist")
+        return self.sessions[session_id]
+
+    # -- sessions -----------------------------------------------------------
+
+    @route("GET", "/status", "getStatus")
+    def status(self, body):
+        return {"ready": True, "message": "Fake Appium server ready", "build": {"version": "fake"}}
+
+    @route("POST", "/session", "createSession")
+    def create_session(self, body):
+        capabilities = dict(body.get("capabilities", {}).get("alwaysMatch", {}))
+        for entry in body.get("capabilities", {}).get("firstMatch", []) or []:
+            capabilities.update(entry)
+        session = Session(capabilities, self.records)
+        self.sessions[session.id] = session
+        return {"sessionId": session.id, "capabilities": capabilities}
+
+    @route("DELETE", "/session/<sid>", "deleteSession")
+    def delete_session(self, body, sid):
+        self.sessions.pop(sid, None)
+        return None
+
+    @route("POST", "/session/<sid>/timeouts", "setTimeouts")
+    def set_timeouts(self, body, sid):
+        self.session(sid)
+        return None
+
+    @route("GET", "/session/<sid>/window/rect", "getWindowRect")
+    def window_rect(self, body, sid):
+        self.session(sid)
+        return {"x": 0, "y": 0, "width": 1080, "height": 1920}
+
+    # -- elements -----------------------------------------------------------
+
+    def _find(self, sid, body, scope_id=None, many=False):
+        session = self.session(sid)
+        scope = session.resolve(scope_id) if scope_id else None
+        nodes = session.screen().find(body.get("using"), body.get("value"), scope)
+        if many:
+            return [session.element_ref(node) for node in nodes]
+        if not nodes:
+            raise WebDriverError(
+                "no such element",
+                f"An element could not be located on the page using the given search "
+                f"parameters ({body.get('using')}={body.get('value')})",
+            )
+        return session.element_ref(nodes[0])
+
+    @route("POST", "/session/<sid>/element", "findElement")
+    def find_element(self, body, sid):
+        return self._find(sid, body)
+
+    @route("POST", "/session/<sid>/elements", "findElements")
+    def find_elements(self, body, sid):
+        return self._find(sid, body, many=True)
+
+    @route("POST", "/session/<sid>/element/<eid>/element", "findChildElement")
+    def find_child_element(self, body, sid, eid):
+        return self._find(sid, body, scope_id=eid)
+
+    @route("POST", "/session/<sid>/element/<eid>/elements", "findChildElements")
+    def find_child_elements(self, body, sid, eid):
+        return self._find(sid, body, scope_id=eid, many=True)
+
+    @route("POST", "/session/<sid>/element/<eid>/click", "click")
+    def click(self, body, sid, eid):
+        session = self.session(sid)
+        node = session.resolve(eid)
+        if node.field is not None:
+            session.focused = node.field
+        if node.on_click is not None:
+            node.on_click()
+        return None
+
+    @route("POST", "/session/<sid>/element/<eid>/clear", "clear")
+    def clear(self, body, sid, eid):
+        session = self.session(sid)
+        node = session.resolve(eid)
+        if node.field is not None:
+            session.model.fields[node.field] = ""
+        return None
+
+    @route("POST", "/session/<sid>/element/<eid>/value", "setValue")
+    def set_value(self, body, sid, eid):
+        session = self.session(sid)
+        node = session.resolve(eid)
+        if node.field is None:
+            raise WebDriverError("element not interactable", "Element does not accept text", 400)
+        session.focused = node.field
+        session.model.fields[node.field] += _typed(body)
+        return None
+
+    @route("GET", "/session/<sid>/element/<eid>/attribute/<name>", "getAttribute")
+    def get_attribute(self, body, sid, eid, name):
+        node = self.session(sid).resolve(eid)
+        attributes = node.attributes()
+        attributes.update({"className": node.cls, "resourceId": node.resource_id,
+                           "contentDescription": node.desc, "name": node.desc or node.text})
+        return attributes.get(name)
+
+    @route("GET", "/session/<sid>/element/<eid>/text", "getText")
+    def get_text(self, body, sid, eid):
+        return self.session(sid).resolve(eid).text
+
+    @route("GET", "/session/<sid>/element/<eid>/displayed", "elementDisplayed")
+    def displayed(self, body, sid, eid):
+        return self.session(sid).resolve(eid).displayed
+
+    @route("GET", "/session/<sid>/element/<eid>/enabled", "elementEnabled")
+    def enabled(self, body, sid, eid):
+        return self.session(sid).resolve(eid).enabled
+
+    @route("GET", "/session/<sid>/element/<eid>/rect", "getElementRect")
+    def element_rect(self, body, sid, eid):
+        self.session(sid).resolve(eid)
+        return {"x": 0, "y": 0, "width": 1080, "height": 120}
+
+    @route("GET", "/session/<sid>/source", "getPageSource")
+    def page_source(self, body, sid):
+        return self.session(sid).screen().source()
+
+    # -- W3C actions --------------------------------------------------------
+
+    @route("POST", "/session/<sid>/actions", "performActions")
+    def perform_actions(self, body, sid):
+        """Vertical one-finger strokes scroll the records list, flings coast further"""
+        session = self.session(sid)
+        for source in body.get("actions", []):
+            moves = [action for action in source.get("actions", []) if action.get("type") == "pointerMove"]
+            if source.get("type") != "pointer" or len(moves) < 2:
+                continue
+            distance = moves[0].get("y", 0) - moves[-1].get("y", 0)
+            momentum = 3 if moves[-1].get("duration", 0) <= 200 else 1
+            session.model.scroll_by(distance * momentum)
+        return None
+
+    @route("DELETE", "/session/<sid>/actions", "releaseActions")
+    def release_actions(self, body, sid):
+        self.session(sid)
+        return None
+
+    # -- logs ---------------------------------------------------------------
+
+    @route("GET", "/session/<sid>/se/log/types", "getLogTypes")
+    def log_types(self, body, sid):
+        self.session(sid)
+        return ["logcat", "server"]
+
+    @route("POST", "/session/<sid>/se/log", "getLogEvents")
+    def get_log(self, body, sid):
+        session = self.session(sid)
+        if body.get("type") != "logcat":
+            return []
+        entries = session.model.logcat[session.log_cursor:]
+        session.log_cursor += len(entries)
+        return entries
+
+    # -- alerts -------------------------------------------------------------
+
+    def _alert(self, sid):
+        alert = self.session(sid).model.alert
+        if alert is None:
+            raise WebDriverError("no such alert", "No alert is open")
+        return alert
+
+    @route("GET", "/session/<sid>/alert/text", "getAlertText")
+    def alert_text(self, body, sid):
+        return self._alert(sid)["message"]
+
+    @route("POST", "/session/<sid>/alert/accept", "acceptAlert")
+    def accept_alert(self, body, sid):
+        self.session(sid).model.dismiss_alert()
+        return None
+
+    @route("POST", "/session/<sid>/alert/dismiss", "dismissAlert")
+    def dismiss_alert(self, body, sid):
+        self.session(sid).model.dismiss_alert()
+        return None
+
+    # -- execute_driver -----------------------------------------------------
+
+    @route("POST", "/session/<sid>/appium/execute_driver", "executeDriver")
+    def execute_driver(self, body, sid):
+        """Runs the step scripts built by transport.Batch"""
+        session = self.session(sid)
+        if "execute_driver_script" not in self.allow_insecure:
+            raise WebDriverError(
+                "unknown error",
+                "Potentially insecure feature 'execute_driver_script' has not been enabled",
+                500,
+            )
+        match = re.match(r"^const steps = (.*);$", body.get("script", ""), re.MULTILINE)
+        if match is None:
+            raise WebDriverError("unknown error", "Only transport.Batch scripts are supported", 500)
+        steps = json.loads(match.group(1))
+        for step in steps:
+            nodes = session.screen().find(step["using"], step["value"])
+            if not nodes:
+                raise WebDriverError(
+                    "unknown error", f"Error: element (\"{step['selector']}\") still not existing", 500)
+            node = nodes[0]
+            if step["action"] == "type":
+                if node.field is None:
+                    raise WebDriverError("unknown error", "Error: element does not accept text", 500)
+                session.model.fields[node.field] = step["text"]
+            elif node.on_click is not None:
+                node.on_click()
+        return {"result": len(steps), "logs": {"log": [], "warn": [], "error": []}}
+
+    # -- mobile: extensions -------------------------------------------------
+
+    @route("POST", "/session/<sid>/execute/sync", "execute")
+    def execute(self, body, sid):
+        session = self.session(sid)
+        script = body.get("script", "")
+        args = (body.get("args") or [{}])[0] or {}
+        handler = MOBILE_COMMANDS.get(script)
+        if handler is None:
+            raise WebDriverError("unknown method", f"Unsupported script: {script}", 405)
+        return handler(session, args)
+
+
+def _typed(body):
+    text = body.get("text")
+    return "".join(body.get("value", [])) if text is None else text
+
+
+def _terminate_app(session, args):
+    session.model.terminate()
+    return True
+
+
+def _activate_app(session, args):
+    session.model.activate()
+    return None
+
+
+def _deep_link(session, args):
+    session.model.open_url(args.get("url", ""))
+    return None
+
+
+def _current_package(session, args):
+    return APP_PACKAGE if session.model.running else "com.android.launcher3"
+
+
+def _background_app(session, args):
+    # The app resumes on the same screen, as a warm start would
+    return None
+
+
+def _replace_element_value(session, args):
+    node = session.resolve(args.get("elementId", ""))
+    if node.field is None:
+        raise WebDriverError("invalid element state", "Element does not accept text", 400)
+    session.model.fields[node.field] = args.get("text", "")
+    return None
+
+
+def _set_clipboard(session, args):
+    session.clipboard = base64.b64decode(args.get("content", "")).decode("utf-8")
+    return None
+
+
+def _press_key(session, args):
+    # Only KEYCODE_PASTE changes the model: it inserts the clipboard into the focused input
+    if args.get("keycode") == 279 and session.focused in session.model.fields:
+        session.model.fields[session.focused] += session.clipboard
+    return None
+
+
+MOBILE_COMMANDS = {
+    "mobile: terminateApp": _terminate_app,
+    "mobile: activateApp": _activate_app,
+    "mobile: deepLink": _deep_link,
+    "mobile: getCurrentPackage": _current_package,
+    "mobile: backgroundApp": _background_app,
+    "mobile: replaceElementValue": _replace_element_value,
+    "mobile: setClipboard": _set_clipboard,
+    "mobile: pressKey": _press_key,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    app = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.app.lock:
+            self.app.connections += 1
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.startswith("/wd/hub"):
+            path = path[len("/wd/hub"):]
+        try:
+            body = json.loads(raw) if raw else {}
+            status, payload = 200, {"value": self.app.dispatch(method, path or "/", body)}
+        except WebDriverError as error:
+            status = error.status
+            payload = {"value": {"error": error.error, "message": error.message,
+                                 "stacktrace": ""}}
+        except Exception as error:  # surfaced to the client as a W3C error
+            status = 500
+            payload = {"value": {"error": "unknown error", "message": repr(error),
+                                 "stacktrace": ""}}
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class FakeAppiumServer:
+    """Threaded HTTP server hosting FakeAppium"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=None, allow_insecure=()):
+        self.app = FakeAppium(latency, allow_insecure)
+        handler = type("FakeAppiumHandler", (_Handler,), {"app": self.app})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4723)
+    parser.add_argument("--latency", type=float, default=0.0, help="ms added to every command")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- ms random jitter")
+    parser.add_argument("--typing", type=float, default=0.0, help="ms per character typed by setValue")
+    parser.add_argument("--command-latency", default="",
+                        help="per-command overrides, e.g. findElement=80,getPageSource=150")
+    parser.add_argument("--allow-insecure", default="",
+                        help="comma separated insecure features, e.g. execute_driver_script")
+    args = parser.parse_args()
+
+    latency = LatencyProfile.parse(args.latency, args.jitter, args.command_latency, args.typing)
+    allow_insecure = [feature for feature in args.allow_insecure.split(",") if feature]
+    server = FakeAppiumServer(args.host, args.port, latency, allow_insecure)
+    print(f"Fake Appium server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Supabase Realtime stand-in (Phoenix channels over a websocket)
+Speaks the subset of the realtime protocol supabase-js uses for
+``postgres_changes`` bindings: phx_join with the binding config, heartbeats,
+access_token updates and phx_leave. Changes are pushed with ``publish``, which
+fake_supabase_server.py calls for every REST insert, update and delete, so a
+table write reaches every subscribed app the way it would on Supabase.
+
+``RealtimeClient`` is a minimal websocket client used by the tests and by the
+load generator to subscribe alongside the app.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+
+
+# ============================================================================
+# WEBSOCKET FRAMING (RFC 6455)
+# ============================================================================
+
+def accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+def _read_exact(stream, size):
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            raise ConnectionError("websocket closed")
+        data += chunk
+    return data
+
+
+def read_frame(stream):
+    """(opcode, payload) of the next frame; continuation frames are joined"""
+    message, opcode = b"", None
+    while True:
+        first, second = _read_exact(stream, 2)
+        fin, frame_opcode = first & 0x80, first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", _read_exact(stream, 2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", _read_exact(stream, 8))[0]
+        mask = _read_exact(stream, 4) if second & 0x80 else None
+        payload = _read_exact(stream, length)
+        if mask:
+            payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+        if frame_opcode >= 0x8:
+            return frame_opcode, payload
+        opcode = opcode or frame_opcode
+        message += payload
+        if fin:
+            return opcode, message
+
+
+def encode_frame(opcode, payload, masked=False):
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if masked else 0
+    if len(payload) < 126:
+        header += bytes([mask_bit | len(payload)])
+    elif len(payload) < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack("!H", len(payload))
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack("!Q", len(payload))
+    if not masked:
+        return header + payload
+    mask = os.urandom(4)
+    return header + mask + bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+
+
+# ============================================================================
+# SERVER SIDE
+# ============================================================================
+
+def _column_type(value):
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int8"
+    if isinstance(value, float):
+        return "float8"
+    if isinstance(value, (dict, list)):
+        return "jsonb"
+    return "text"
+
+
+def _matches(filter_spec, record):
+    """``column=eq.value`` filters of postgres_changes bindings"""
+    if not filter_spec:
+        return True
+    column, _, condition = filter_spec.partition("=")
+    operator, _, expected = condition.partition(".")
+    if operator != "eq":
+        return True
+    value = record.get(column)
+    if isinstance(value, bool):
+        return str(value).lower() == expected
+    return str(value) == expected
+
+
+class _Binding:
+    def __init__(self, binding_id, event, schema, table, filter_spec):
+        self.id = binding_id
+        self.event = event
+        self.schema = schema
+        self.table = table
+        self.filter = filter_spec
+
+    def wants(self, table, change_type, record):
+        return (self.table in (table, "*") and self.event in (change_type, "*")
+                and _matches(self.filter, record))
+
+
+class _Connection:
+    def __init__(self, sock, wfile):
+        self.sock = sock
+        self.wfile = wfile
+        self.lock = threading.Lock()
+        self.channels = {}
+        self.open = True
+
+    def send(self, message):
+        data = encode_frame(OP_TEXT, json.dumps(message).encode("utf-8"))
+        with self.lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+
+class RealtimeHub:
+    """Channel joins and change fan-out for every connected client"""
+
+    def __init__(self):
+        self.connections = []
+        self.lock = threading.Lock()
+        self.next_binding = 1
+        self.delivered = 0
+        self.published = 0
+
+    def serve(self, handler):
+        """Take over an HTTP request that asked for a websocket upgrade"""
+        handler.send_response(101, "Switching Protocols")
+        handler.send_header("Upgrade", "websocket")
+        handler.send_header("Connection", "Upgrade")
+        handler.send_header("Sec-WebSocket-Accept", accept_key(handler.headers["Sec-WebSocket-Key"]))
+        handler.end_headers()
+        handler.wfile.flush()
+
+        connection = _Connection(handler.connection, handler.wfile)
+        with self.lock:
+            self.connections.append(connection)
+        try:
+            while True:
+                opcode, payload = read_frame(handler.rfile)
+                if opcode == OP_CLOSE:
+                    with connection.lock:
+                        handler.wfile.write(encode_frame(OP_CLOSE, payload[:2]))
+                    break
+                if opcode == OP_PING:
+                    with connection.lock:
+                        handler.wfile.write(encode_frame(OP_PONG, payload))
+                    continue
+                if opcode == OP_TEXT:
+                    self._on_message(connection, json.loads(payload))
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            connection.open = False
+            with self.lock:
+                self.connections.remove(connection)
+            handler.close_connection = True
+
+    def close_all(self):
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _reply(self, connection, message, response=None, status="ok"):
+        connection.send({
+            "topic": message["topic"], "event": "phx_reply",
+            "payload": {"status": status, "response": response or {}},
+            "ref": message.get("ref"), "join_ref": message.get("join_ref"),
+        })
+
+    def _on_message(self, connection, message):
+        event, topic = message.get("event"), message.get("topic")
+        if event == "phx_join":
+            config = (message.get("payload") or {}).get("config") or {}
+            bindings = []
+            with self.lock:
+                for spec in config.get("postgres_changes") or []:
+                    bindings.append(_Binding(self.next_binding, spec.get("event", "*"),
+                                             spec.get("schema", "public"), spec.get("table", "*"),
+                                             spec.get("filter")))
+                    self.next_binding += 1
+            connection.channels[topic] = (message.get("join_ref") or message.get("ref"), bindings)
+            self._reply(connection, message, {"postgres_changes": [
+                {"id": binding.id, "event": binding.event, "schema": binding.schema,
+                 "table": binding.table, **({"filter": binding.filter} if binding.filter else {})}
+                for binding in bindings
+            ]})
+            connection.send({"topic": topic, "event": "system", "ref": None, "payload": {
+                "status": "ok", "extension": "postgres_changes", "channel": topic.split(":", 1)[-1],
+                "message": "Subscribed to PostgreSQL",
+            }})
+        elif event == "phx_leave":
+            connection.channels.pop(topic, None)
+            self._reply(connection, message)
+        else:
+            # heartbeat, access_token and anything else are acknowledged
+            self._reply(connection, message)
+
+    def publish(self, table, change_type, record=None, old_record=None, schema="public"):
+        """Push one change to every matching binding; returns deliveries"""
+        record, old_record = record or {}, old_record or {}
+        subject = record if change_type != "DELETE" else old_record
+        data = {
+            "schema": schema, "table": table, "type": change_type,
+            "commit_timestamp": datetime.now(timezone.utc).isoformat(),
+            "columns": [{"name": name, "type": _column_type(value)}
+                        for name, value in (record or old_record).items()],
+            "record": record, "old_record": old_record, "errors": None,
+        }
+        with self.lock:
+            connections = list(self.connections)
+            self.published += 1
+        delivered = 0
+        for connection in connections:
+            for topic, (join_ref, bindings) in list(connection.channels.items()):
+                ids = [binding.id for binding in bindings if binding.wants(table, change_type, subject)]
+                if not ids or not connection.open:
+                    continue
+                try:
+                    connection.send({"topic": topic, "event": "postgres_changes", "ref": None,
+                                     "join_ref": join_ref, "payload": {"ids": ids, "data": data}})
+                    delivered += 1
+                except OSError:
+                    connection.open = False
+        with self.lock:
+            self.delivered += delivered
+        return delivered
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+class _SocketReader:
+    """Buffered socket reads that survive timeouts
+
+    ``socket.makefile`` refuses every read after one timed out, which the
+    client's polling ``receive`` hits between bursts.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = bytearray()
+
+    def fill(self):
+        """Wait for more data under the socket's current timeout"""
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("websocket closed")
+        self.buffer += chunk
+
+    def read(self, size):
+        while len(self.buffer) < size:
+            self.fill()
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readline(self):
+        while b"\n" not in self.buffer:
+            self.fill()
+        return self.read(self.buffer.index(b"\n") + 1)
+
+
+class RealtimeClient:
+    """Blocking websocket client speaking the Phoenix channel protocol"""
+
+    def __init__(self, url, apikey, timeout=10):
+        parsed = urllib.parse.urlparse(url)
+        self.timeout = timeout
+        self.sock = socket.create_connection((parsed.hostname, parsed.port or 80), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stream = _SocketReader(self.sock)
+        self.ref = 0
+        self.pending = []
+        key = base64.b64encode(os.urandom(16)).decode()
+        query = urllib.parse.urlencode({"apikey": apikey, "vsn": "1.0.0"})
+        self.sock.sendall((
+            f"GET /realtime/v1/websocket?{query} HTTP/1.1\r\n"
+            f"Host: {parsed.netloc}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        status = self.stream.readline()
+        if b" 101 " not in status:
+            raise ConnectionError(f"Websocket upgrade refused: {status!r}")
+        while self.stream.readline() not in (b"\r\n", b""):
+            pass
+
+    def send(self, topic, event, payload=None):
+        self.ref += 1
+        message = {"topic": topic, "event": event, "payload": payload or {},
+                   "ref": str(self.ref), "join_ref": str(self.ref)}
+        self.sock.sendall(encode_frame(OP_TEXT, json.dumps(message).encode(), masked=True))
+        return str(self.ref)
+
+    def receive(self, timeout=None):
+        """Next server message, or None on timeout"""
+        if self.pending:
+            return self.pending.pop(0)
+        if not self.stream.buffer:
+            self.sock.settimeout(timeout)
+            try:
+                self.stream.fill()
+            except (socket.timeout, TimeoutError):
+                return None
+        # A frame that has started arriving is read to its end
+        self.sock.settimeout(self.timeout)
+        opcode, payload = read_frame(self.stream)
+        if opcode != OP_TEXT:
+            return {"event": "ws_control", "opcode": opcode}
+        return json.loads(payload)
+
+    def _await_reply(self, ref, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            message = self.receive(deadline - time.monotonic())
+            if message is None:
+                break
+            if message.get("event") == "phx_reply" and message.get("ref") == ref:
+                return message
+            self.pending.append(message)
+        raise TimeoutError(f"No reply to ref {ref}")
+
+    def subscribe(self, table, event="*", filter_spec=None, timeout=5):
+        """Join ``realtime:public:<table>`` with one postgres_changes binding"""
+        binding = {"event": event, "schema": "public", "table": table}
+        if filter_spec:
+            binding["filter"] = filter_spec
+        ref = self.send(f"realtime:public:{table}", "phx_join",
+                        {"config": {"postgres_changes": [binding]}})
+        reply = self._await_reply(ref, timeout)
+        # drop the "Subscribed to PostgreSQL" system message
+        self.pending = [message for message in self.pending if message.get("event") != "system"]
+        return reply
+
+    def heartbeat(self, timeout=5):
+        return self._await_reply(self.send("phoenix", "heartbeat"), timeout)
+
+    def changes(self, timeout):
+        """postgres_changes data received within ``timeout`` seconds"""
+        received, deadline = [], time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            message = self.receive(max(deadline - time.monotonic(), 0.001))
+            if message is None:
+                break
+            if message.get("event") == "postgres_changes":
+                received.append((time.perf_counter(), message["payload"]["data"]))
+        return received
+
+    def close(self):
+        try:
+            self.sock.sendall(encode_frame(OP_CLOSE, struct.pack("!H", 1000), masked=True))
+        except OSError:
+            pass
+        self.sock.close()
@@ -0,0 +1,733 @@
+"""
+Local stand-in for the Supabase backend
+Implements the PostgREST subset the app's services use (select with eq/in
+filters, order, limit, insert/update returning, delete and ``.single()``)
+and the GoTrue auth endpoints (sign up, password and refresh-token grants,
+get user, logout, the admin user API and one-time magic-link codes through
+``admin/generate_link`` and ``verify``) on top of SQLite, so the suite and
+the app can run against a backend that is local, resettable and can be made
+slow or flaky on purpose:
+
+    python fake_supabase_server.py --port 54321 --latency 150 \
+        --faults "rest/UserLogs=errors:0.2;auth/token=rate:2,burst:4"
+
+Fault rules are keyed by route (``rest/<table>``, ``auth/<endpoint>`` or ``*``)
+and take ``latency``/``jitter`` in ms, an ``errors`` rate answered with 503
+and a token-bucket ``rate`` (requests/s) and ``burst`` answered with 429.
+Every table is schemaless: rows are stored as JSON and filtered with
+``json_extract``, so new tables need no setup. Writes are also pushed to
+``/realtime/v1/websocket`` subscribers (see fake_realtime.py).
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fake_realtime import RealtimeHub
+
+JWT_SECRET = "super-secret-jwt-token-with-at-least-32-characters-long"
+TOKEN_TTL = 3600
+# Seconds a generate_link code can be exchanged for a session
+OTP_TTL = 300
+SINGLE_OBJECT = "application/vnd.pgrst.object+json"
+
+
+class ApiError(Exception):
+    """Error answered as JSON with ``status``"""
+
+    def __init__(self, status, payload, headers=None):
+        super().__init__(payload)
+        self.status = status
+        self.payload = payload
+        self.headers = headers or {}
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ============================================================================
+# STORAGE
+# ============================================================================
+
+_FILTER = re.compile(r"^(not\.)?(eq|neq|gt|gte|lt|lte|like|ilike|is|in)\.(.*)$", re.DOTALL)
+_COMPARISONS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _literal(value):
+    """PostgREST filter value to the type json_extract returns"""
+    if value == "true":
+        return 1
+    if value == "false":
+        return 0
+    if re.fullmatch(r"-?\d+", value):
+        return int(value)
+    if re.fullmatch(r"-?\d+\.\d+", value):
+        return float(value)
+    return value
+
+
+def _column(name):
+    if not _IDENTIFIER.match(name):
+        raise ApiError(400, {"code": "PGRST100", "message": f"Invalid column {name!r}"})
+    return f"json_extract(data, '$.{name}')"
+
+
+def parse_filters(params):
+    """(column, negated, operator, value) for every filter query parameter"""
+    filters = []
+    for name, value in params:
+        if name in ("select", "order", "limit", "offset", "columns", "on_conflict"):
+            continue
+        match = _FILTER.match(value)
+        if not match:
+            raise ApiError(400, {"code": "PGRST100",
+                                 "message": f"Unsupported filter {name}={value}"})
+        negated, operator, operand = match.groups()
+        filters.append((name, bool(negated), operator, operand))
+    return filters
+
+
+def _where(filters):
+    clauses, args = ["tbl = ?"], []
+    for name, negated, operator, operand in filters:
+        column = _column(name)
+        if operator == "is" or (operator == "eq" and operand == "null"):
+            # supabase-js sends .eq(col, null) as eq.null
+            clause = f"{column} IS NULL" if operand == "null" else f"{column} = ?"
+            if operand != "null":
+                args.append(_literal(operand))
+        elif operator == "in":
+            values = [item.strip().strip('"') for item in operand.strip("()").split(",") if item]
+            clause = f"{column} IN ({', '.join('?' * len(values)) or 'NULL'})"
+            args.extend(_literal(item) for item in values)
+        elif operator == "like":
+            # PostgREST uses * as the wildcard; GLOB is case-sensitive like LIKE in Postgres
+            clause = f"{column} GLOB ?"
+            args.append(operand)
+        elif operator == "ilike":
+            clause = f"{column} LIKE ?"
+            args.append(operand.replace("*", "%"))
+        else:
+            clause = f"{column} {_COMPARISONS[operator]} ?"
+            args.append(_literal(operand))
+        clauses.append(f"NOT ({clause})" if negated else clause)
+    return " AND ".join(clauses), args
+
+
+def _order(value):
+    terms = []
+    for term in filter(None, (value or "").split(",")):
+        parts = term.split(".")
+        direction = "DESC" if "desc" in parts[1:] else "ASC"
+        nulls = " NULLS LAST" if "nullslast" in parts[1:] else (
+            " NULLS FIRST" if "nullsfirst" in parts[1:] else "")
+        terms.append(f"{_column(parts[0])} {direction}{nulls}")
+    return f" ORDER BY {', '.join(terms)}" if terms else " ORDER BY pk"
+
+
+class Store:
+    """JSON rows per table in one SQLite database"""
+
+    def __init__(self, path=":memory:"):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS rows (
+              pk INTEGER PRIMARY KEY AUTOINCREMENT,
+              tbl TEXT NOT NULL,
+              data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS rows_tbl ON rows (tbl);
+            CREATE TABLE IF NOT EXISTS users (
+              id TEXT PRIMARY KEY,
+              email TEXT UNIQUE NOT NULL,
+              password TEXT NOT NULL,
+              created_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS refresh_tokens (
+              token TEXT PRIMARY KEY,
+              user_id TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS one_time_tokens (
+              token_hash TEXT PRIMARY KEY,
+              user_id TEXT NOT NULL,
+              expires_at REAL NOT NULL
+            );
+        """)
+
+    def _fetch(self, table, filters, order=None, limit=None, offset=None):
+        where, args = _where(filters)
+        sql = f"SELECT pk, data FROM rows WHERE {where}{_order(order)}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)} OFFSET {int(offset or 0)}"
+        return [(pk, json.loads(data)) for pk, data in self.db.execute(sql, [table] + args)]
+
+    def select(self, table, filters=(), order=None, limit=None, offset=None):
+        with self.lock:
+            return [row for _, row in self._fetch(table, filters, order, limit, offset)]
+
+    def insert(self, table, rows):
+        inserted = []
+        with self.lock, self.db:
+            for row in rows:
+                row = dict(row)
+                cursor = self.db.execute("INSERT INTO rows (tbl, data) VALUES (?, '{}')", (table,))
+                row.setdefault("id", cursor.lastrowid)
+                row.setdefault("created_at", _now())
+                self.db.execute("UPDATE rows SET data = ? WHERE pk = ?",
+                                (json.dumps(row), cursor.lastrowid))
+                inserted.append(row)
+        return inserted
+
+    def update(self, table, filters, values):
+        updated = []
+        with self.lock, self.db:
+            for pk, row in self._fetch(table, filters):
+                row.update(values)
+                self.db.execute("UPDATE rows SET data = ? WHERE pk = ?", (json.dumps(row), pk))
+                updated.append(row)
+        return updated
+
+    def delete(self, table, filters):
+        with self.lock, self.db:
+            deleted = self._fetch(table, filters)
+            self.db.executemany("DELETE FROM rows WHERE pk = ?", [(pk,) for pk, _ in deleted])
+        return [row for _, row in deleted]
+
+    def count(self, table):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM rows WHERE tbl = ?", (table,)).fetchone()[0]
+
+    # -- auth users ---------------------------------------------------------
+
+    def create_user(self, email, password):
+        user_id = str(uuid.uuid4())
+        try:
+            with self.lock, self.db:
+                self.db.execute(
+                    "INSERT INTO users (id, email, password, created_at) VALUES (?, ?, ?, ?)",
+                    (user_id, email.lower(), _hash(password), _now()),
+                )
+        except sqlite3.IntegrityError:
+            raise ApiError(422, {"code": 422, "error_code": "user_already_exists",
+                                 "msg": "User already registered"}) from None
+        return self.user(user_id)
+
+    def user(self, user_id):
+        with self.lock:
+            row = self.db.execute("SELECT id, email, created_at FROM users WHERE id = ?",
+                                  (user_id,)).fetchone()
+        return None if row is None else _user_json(*row)
+
+    def user_by_email(self, email):
+        with self.lock:
+            row = self.db.execute("SELECT id FROM users WHERE email = ?",
+                                  ((email or "").lower(),)).fetchone()
+        return None if row is None else self.user(row[0])
+
+    def authenticate(self, email, password):
+        with self.lock:
+            row = self.db.execute("SELECT id, password FROM users WHERE email = ?",
+                                  ((email or "").lower(),)).fetchone()
+        if row is None or row[1] != _hash(password or ""):
+            return None
+        return self.user(row[0])
+
+    def delete_user(self, user_id):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            self.db.execute("DELETE FROM refresh_tokens WHERE user_id = ?", (user_id,))
+
+    def issue_refresh_token(self, user_id):
+        token = uuid.uuid4().hex
+        with self.lock, self.db:
+            self.db.execute("INSERT INTO refresh_tokens (token, user_id) VALUES (?, ?)",
+                            (token, user_id))
+        return token
+
+    def redeem_refresh_token(self, token):
+        with self.lock, self.db:
+            row = self.db.execute("SELECT user_id FROM refresh_tokens WHERE token = ?",
+                                  (token,)).fetchone()
+            self.db.execute("DELETE FROM refresh_tokens WHERE token = ?", (token,))
+        return None if row is None else row[0]
+
+    def issue_one_time_token(self, user_id):
+        token_hash = hashlib.sha224(uuid.uuid4().bytes).hexdigest()
+        with self.lock, self.db:
+            self.db.execute("INSERT INTO one_time_tokens (token_hash, user_id, expires_at) "
+                            "VALUES (?, ?, ?)", (token_hash, user_id, time.time() + OTP_TTL))
+        return token_hash
+
+    def redeem_one_time_token(self, token_hash):
+        """User id of an unexpired code, which can only be redeemed once"""
+        with self.lock, self.db:
+            row = self.db.execute("SELECT user_id, expires_at FROM one_time_tokens "
+                                  "WHERE token_hash = ?", (token_hash,)).fetchone()
+            self.db.execute("DELETE FROM one_time_tokens WHERE token_hash = ?", (token_hash,))
+        return None if row is None or row[1] < time.time() else row[0]
+
+
+def _hash(password):
+    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+
+def _user_json(user_id, email, created_at):
+    return {
+        "id": user_id, "aud": "authenticated", "role": "authenticated", "email": email,
+        "email_confirmed_at": created_at, "created_at": created_at, "updated_at": created_at,
+        "app_metadata": {"provider": "email", "providers": ["email"]}, "user_metadata": {},
+    }
+
+
+# ============================================================================
+# TOKENS
+# ============================================================================
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def make_jwt(payload, secret=JWT_SECRET):
+    """HS256 JWT, so supabase-js can decode the expiry of the session"""
+    header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    body = _b64(json.dumps(payload).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{body}".encode(), hashlib.sha256).digest()
+    return f"{header}.{body}.{_b64(signature)}"
+
+
+def read_jwt(token, secret=JWT_SECRET):
+    """Payload of a token issued by make_jwt, or None when invalid or expired"""
+    try:
+        header, body, signature = token.split(".")
+    except (AttributeError, ValueError):
+        return None
+    expected = hmac.new(secret.encode(), f"{header}.{body}".encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(_b64(expected), signature):
+        return None
+    payload = json.loads(base64.urlsafe_b64decode(body + "=" * (-len(body) % 4)))
+    if payload.get("exp", 0) < time.time():
+        return None
+    return payload
+
+
+def service_key(role="service_role"):
+    """Long-lived apikey for ``anon`` or ``service_role``"""
+    return make_jwt({"iss": "supabase-stand-in", "role": role, "exp": int(time.time()) + 10 * 365 * 86400})
+
+
+# ============================================================================
+# FAULT INJECTION
+# ============================================================================
+
+class TokenBucket:
+    """``rate`` requests per second with bursts of up to ``burst``"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class RouteFaults:
+    """Latency, error rate and rate limit of one route"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate=None, burst=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate, burst or max(1, int(rate))) if rate else None
+
+    @classmethod
+    def parse(cls, spec, base=None):
+        values = {"latency": 0.0, "jitter": 0.0, "errors": 0.0, "rate": None, "burst": None}
+        if base is not None:
+            values.update(latency=base.latency_ms, jitter=base.jitter_ms, errors=base.error_rate)
+        for entry in filter(None, spec.split(",")):
+            name, _, value = entry.partition(":")
+            if name.strip() not in values:
+                raise ValueError(f"Unknown fault setting {name!r}")
+            values[name.strip()] = float(value)
+        return cls(values["latency"], values["jitter"], values["errors"],
+                   values["rate"], values["burst"] and int(values["burst"]))
+
+    def apply(self, rng):
+        """Sleep for the latency, then raise the injected failure if any"""
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if self.bucket is not None and not self.bucket.take():
+            raise ApiError(429, {"message": "Too many requests (rate limited by stand-in)"},
+                           {"Retry-After": "1"})
+        if self.error_rate and rng.random() < self.error_rate:
+            raise ApiError(503, {"message": "Service unavailable (injected by stand-in)"})
+
+
+class FaultProfile:
+    """Per-route faults, falling back to the ``*`` rule"""
+
+    def __init__(self, rules=None, seed=None):
+        self.rules = dict(rules or {})
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def parse(cls, latency_ms=0.0, error_rate=0.0, rules="", seed=None):
+        default = RouteFaults(float(latency_ms), 0.0, float(error_rate))
+        parsed = {"*": default}
+        for entry in filter(None, (rules or "").split(";")):
+            route_key, _, spec = entry.partition("=")
+            parsed[route_key.strip()] = RouteFaults.parse(
+                spec, parsed.get("*") if route_key.strip() != "*" else None)
+        return cls(parsed, seed)
+
+    @classmethod
+    def from_env(cls):
+        seed = os.getenv("SUPABASE_STANDIN_SEED")
+        return cls.parse(
+            os.getenv("SUPABASE_STANDIN_LATENCY_MS", 0),
+            os.getenv("SUPABASE_STANDIN_ERROR_RATE", 0),
+            os.getenv("SUPABASE_STANDIN_FAULTS", ""),
+            int(seed) if seed else None,
+        )
+
+    def apply(self, route_key):
+        rule = self.rules.get(route_key) or self.rules.get("*")
+        if rule is not None:
+            rule.apply(self.rng)
+
+
+# ============================================================================
+# API
+# ============================================================================
+
+class FakeSupabase:
+    """REST and auth handlers shared by every HTTP request"""
+
+    def __init__(self, store=None, faults=None):
+        self.store = store or Store()
+        self.faults = faults or FaultProfile()
+        self.realtime = RealtimeHub()
+        self.request_counts = {}
+        self.status_counts = {}
+        self.lock = threading.Lock()
+
+    def count(self, route_key, status):
+        with self.lock:
+            self.request_counts[route_key] = self.request_counts.get(route_key, 0) + 1
+            key = f"{route_key} {status}"
+            self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def handle(self, method, path, query, headers, body):
+        """Returns (status, payload, extra headers)"""
+        route_key = self.route_key(path)
+        self.faults.apply(route_key)
+        if path.startswith("/rest/v1/"):
+            return self.rest(method, path[len("/rest/v1/"):], query, headers, body)
+        if path.startswith("/auth/v1/"):
+            return self.auth(method, path[len("/auth/v1/"):], query, headers, body)
+        raise ApiError(404, {"message": f"No route for {method} {path}"})
+
+    @staticmethod
+    def route_key(path):
+        parts = path.strip("/").split("/")
+        if len(parts) >= 3 and parts[0] in ("rest", "auth"):
+            return f"{parts[0]}/{urllib.parse.unquote(parts[2])}"
+        return path
+
+    # -- PostgREST ----------------------------------------------------------
+
+    def rest(self, method, table, query, headers, body):
+        table = urllib.parse.unquote(table)
+        params = urllib.parse.parse_qsl(query, keep_blank_values=True)
+        options = dict(params)
+        filters = parse_filters(params)
+        prefer = headers.get("Prefer", "")
+        returning = "return=representation" in prefer or method == "GET"
+
+        if method == "GET":
+            rows = self.store.select(table, filters, options.get("order"),
+                                     options.get("limit"), options.get("offset"))
+            status = 200
+        elif method == "POST":
+            rows = self.store.insert(table, body if isinstance(body, list) else [body])
+            for row in rows:
+                self.realtime.publish(table, "INSERT", row)
+            status = 201
+        elif method == "PATCH":
+            old = self.store.select(table, filters)
+            rows = self.store.update(table, filters, body or {})
+            for old_row, row in zip(old, rows):
+                self.realtime.publish(table, "UPDATE", row, old_row)
+            status = 200
+        elif method == "DELETE":
+            rows = self.store.delete(table, filters)
+            for row in rows:
+                self.realtime.publish(table, "DELETE", None, row)
+            status = 200
+        else:
+            raise ApiError(405, {"message": f"{method} is not supported"})
+
+        if not returning:
+            return 204 if method != "POST" else 201, None, {}
+        rows = [self._columns(row, options.get("select", "*")) for row in rows]
+        extra = {"Content-Range": f"0-{max(len(rows) - 1, 0)}/*"}
+        if SINGLE_OBJECT in headers.get("Accept", ""):
+            if len(rows) != 1:
+                raise ApiError(406, {
+                    "code": "PGRST116",
+                    "details": f"The result contains {len(rows)} rows",
+                    "hint": None,
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                })
+            return status, rows[0], extra
+        return status, rows, extra
+
+    @staticmethod
+    def _columns(row, select):
+        columns = [column.strip() for column in select.split(",") if column.strip()]
+        if not columns or "*" in columns:
+            return row
+        return {column: row.get(column) for column in columns}
+
+    # -- GoTrue -------------------------------------------------------------
+
+    def auth(self, method, endpoint, query, headers, body):
+        params = dict(urllib.parse.parse_qsl(query))
+        if method == "POST" and endpoint == "signup":
+            user = self.store.create_user(body.get("email", ""), body.get("password", ""))
+            return 200, self.session(user), {}
+        if method == "POST" and endpoint == "token":
+            return 200, self.token(params.get("grant_type"), body), {}
+        if method == "GET" and endpoint == "user":
+            return 200, self.current_user(headers), {}
+        if method == "POST" and endpoint == "logout":
+            return 204, None, {}
+        if method == "POST" and endpoint == "admin/users":
+            user = self.store.create_user(body.get("email", ""), body.get("password", ""))
+            return 200, user, {}
+        if method == "POST" and endpoint == "admin/generate_link":
+            return 200, self.generate_link(body), {}
+        if method == "POST" and endpoint == "verify":
+            return 200, self.verify(body), {}
+        match = re.fullmatch(r"admin/users/([^/]+)", endpoint)
+        if match and method == "DELETE":
+            self.store.delete_user(match.group(1))
+            return 200, {}, {}
+        if match and method == "GET":
+            user = self.store.user(match.group(1))
+            if user is None:
+                raise ApiError(404, {"code": 404, "error_code": "user_not_found",
+                                     "msg": "User not found"})
+            return 200, user, {}
+        raise ApiError(404, {"message": f"No auth route for {method} {endpoint}"})
+
+    def token(self, grant_type, body):
+        if grant_type == "password":
+            user = self.store.authenticate(body.get("email"), body.get("password"))
+        elif grant_type == "refresh_token":
+            user_id = self.store.redeem_refresh_token(body.get("refresh_token"))
+            user = user_id and self.store.user(user_id)
+        else:
+            raise ApiError(400, {"error": "unsupported_grant_type",
+                                 "error_description": f"Unsupported grant type {grant_type}"})
+        if not user:
+            raise ApiError(400, {"code": 400, "error_code": "invalid_credentials",
+                                 "error": "invalid_grant",
+                                 "error_description": "Invalid login credentials",
+                                 "msg": "Invalid login credentials"})
+        return self.session(user)
+
+    def generate_link(self, body):
+        user = self.store.user_by_email(body.get("email"))
+        if user is None:
+            raise ApiError(404, {"code": 404, "error_code": "user_not_found",
+                                 "msg": "User not found"})
+        token_hash = self.store.issue_one_time_token(user["id"])
+        return dict(user, hashed_token=token_hash, verification_type=body.get("type", "magiclink"),
+                    action_link=f"/auth/v1/verify?token={token_hash}&type=magiclink",
+                    email_otp="", redirect_to="")
+
+    def verify(self, body):
+        user_id = self.store.redeem_one_time_token(body.get("token_hash"))
+        user = user_id and self.store.user(user_id)
+        if not user:
+            raise ApiError(403, {"code": 403, "error_code": "otp_expired",
+                                 "msg": "Email link is invalid or has expired"})
+        return self.session(user)
+
+    def session(self, user):
+        expires_at = int(time.time()) + TOKEN_TTL
+        return {
+            "access_token": make_jwt({
+                "sub": user["id"], "email": user["email"], "role": "authenticated",
+                "aud": "authenticated", "exp": expires_at,
+                "session_id": str(uuid.uuid4()),
+            }),
+            "token_type": "bearer",
+            "expires_in": TOKEN_TTL,
+            "expires_at": expires_at,
+            "refresh_token": self.store.issue_refresh_token(user["id"]),
+            "user": user,
+        }
+
+    def current_user(self, headers):
+        token = headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        payload = read_jwt(token)
+        user = payload and payload.get("sub") and self.store.user(payload["sub"])
+        if not user:
+            raise ApiError(401, {"code": 401, "error_code": "bad_jwt",
+                                 "msg": "invalid JWT: unable to parse or verify signature"})
+        return user
+
+
+# ============================================================================
+# HTTP SERVER
+# ============================================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    api = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        path, _, query = self.path.partition("?")
+        route_key = self.api.route_key(path)
+        extra = {}
+        try:
+            body = json.loads(raw) if raw else {}
+            status, payload, extra = self.api.handle(method, path.rstrip("/"), query,
+                                                     self.headers, body)
+        except ApiError as error:
+            status, payload, extra = error.status, error.payload, error.headers
+        except Exception as error:  # surfaced to the client as a PostgREST-style error
+            status, payload = 500, {"message": repr(error)}
+        self.api.count(route_key, status)
+
+        data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for name, value in extra.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/realtime/v1/websocket") \
+                and self.headers.get("Upgrade", "").lower() == "websocket":
+            self.api.count("realtime/websocket", 101)
+            self.api.realtime.serve(self)
+            return
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Headers", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, PATCH, DELETE, OPTIONS")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class FakeSupabaseServer:
+    """Threaded HTTP server hosting FakeSupabase"""
+
+    def __init__(self, host="127.0.0.1", port=0, faults=None, db_path=":memory:"):
+        self.api = FakeSupabase(Store(db_path), faults)
+        handler = type("FakeSupabaseHandler", (_Handler,), {"api": self.api})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def store(self):
+        return self.api.store
+
+    def start(self):
+        # Short poll interval so per-test servers shut down quickly
+        self._thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,),
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.api.realtime.close_all()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--db", default=":memory:", help="SQLite file (default in memory)")
+    parser.add_argument("--latency", type=float, default=0.0, help="ms added to every request")
+    parser.add_argument("--errors", type=float, default=0.0, help="share of requests failing with 503")
+    parser.add_argument("--faults", default="",
+                        help='per-route rules, e.g. "rest/UserLogs=latency:200,errors:0.1"')
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    faults = FaultProfile.parse(args.latency, args.errors, args.faults, args.seed)
+    server = FakeSupabaseServer(args.host, args.port, faults, args.db)
+    print(f"Supabase stand-in listening on {server.url}")
+    print(f"anon key:         {service_key('anon')}")
+    print(f"service role key: {service_key()}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Bulk form filling for the page objects
+``send_keys`` costs a findElement, a clear and a setValue per field, and
+UiAutomator2 sends the text as key events, which is slow on long values and
+can trip the IME on accented text such as "Juan García". ``FormFiller``
+resolves every field of a form first, sets each value in a single command
+through the fastest path the session supports
+
+* ``mobile: replaceElementValue`` (UiAutomator2 replaces the text at once),
+* the clipboard: ``mobile: setClipboard``, a tap and KEYCODE_PASTE,
+* typing, clear then send_keys, as ``BasePage.send_keys`` does,
+
+then reads every value back from one page source and types only the fields
+that did not take. A path the server rejects is not tried again on that
+session, and a field that went stale on the way is resolved again once.
+
+    FORM_FILL   auto, replace, paste or type (default auto: replace, else paste, else type)
+"""
+
+import base64
+import logging
+import os
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+
+from snapshot import PageSnapshot
+
+logger = logging.getLogger(__name__)
+
+PATHS = ("replace", "paste", "type")
+KEYCODE_PASTE = 279
+_unsupported = {}
+
+
+def strategy():
+    return os.getenv("FORM_FILL", "auto").lower()
+
+
+def paths():
+    """Fill paths to try, fastest first"""
+    chosen = strategy()
+    if chosen == "auto":
+        return PATHS
+    if chosen not in PATHS:
+        raise ValueError(f"FORM_FILL must be auto or one of {', '.join(PATHS)}, not {chosen}")
+    return (chosen,) if chosen == "type" else (chosen, "type")
+
+
+def _replace(driver, element, text):
+    driver.execute_script("mobile: replaceElementValue", {"elementId": element.id, "text": text})
+
+
+def _paste(driver, element, text):
+    element.clear()
+    if not text:
+        return
+    driver.execute_script("mobile: setClipboard", {
+        "content": base64.b64encode(text.encode("utf-8")).decode("ascii"),
+        "contentType": "plaintext",
+    })
+    element.click()
+    driver.execute_script("mobile: pressKey", {"keycode": KEYCODE_PASTE})
+
+
+def _type(driver, element, text):
+    element.clear()
+    element.send_keys(text)
+
+
+_SETTERS = {"replace": _replace, "paste": _paste, "type": _type}
+
+
+class FieldResult:
+    """How one field was filled"""
+
+    def __init__(self, locator, path, seconds, verified):
+        self.locator = locator
+        self.path = path
+        self.seconds = seconds
+        self.verified = verified
+
+    def as_dict(self):
+        return {"field": self.locator[1], "path": self.path,
+                "ms": round(self.seconds * 1000, 2), "verified": self.verified}
+
+
+class FillReport:
+    """Per-field results of one ``fill_form`` call"""
+
+    def __init__(self):
+        self.fields = []
+        self.resolve_s = 0.0
+        self.verify_s = 0.0
+        self.total_s = 0.0
+
+    @property
+    def retyped(self):
+        return [field for field in self.fields if field.path == "type"]
+
+    def as_dict(self):
+        return {"total_ms": round(self.total_s * 1000, 2),
+                "resolve_ms": round(self.resolve_s * 1000, 2),
+                "verify_ms": round(self.verify_s * 1000, 2),
+                "fields": [field.as_dict() for field in self.fields]}
+
+
+class FormFiller:
+    """Fills several inputs of the current screen at once
+
+    ``resolve(locator)`` returns the element of a field, possibly a cached
+    handle; ``refresh(locator)`` looks it up again after it went stale
+    (``resolve`` itself when not given).
+    """
+
+    def __init__(self, driver, resolve, refresh=None):
+        self.driver = driver
+        self.resolve = resolve
+        self.refresh = refresh or resolve
+
+    def fill(self, mapping):
+        """Set every ``locator: text`` of ``mapping``, return a FillReport"""
+        report = FillReport()
+        start = time.perf_counter()
+        elements = {locator: self.resolve(locator) for locator in mapping}
+        report.resolve_s = time.perf_counter() - start
+        timings = {}
+        for locator, text in mapping.items():
+            began = time.perf_counter()
+            path = self._on(elements, locator, lambda element: self._set(element, text))
+            timings[locator] = (path, time.perf_counter() - began)
+        began = time.perf_counter()
+        pending = self.mismatched(mapping, elements)
+        report.verify_s = time.perf_counter() - began
+        for locator, text in mapping.items():
+            path, seconds = timings[locator]
+            if locator in pending and path != "type":
+                logger.info("%s did not take %r through %s, typing it", locator[1], text, path)
+                began = time.perf_counter()
+                self._on(elements, locator, lambda element: _type(self.driver, element, text))
+                path, seconds = "type", seconds + time.perf_counter() - began
+            report.fields.append(FieldResult(locator, path, seconds, locator not in pending))
+        report.total_s = time.perf_counter() - start
+        return report
+
+    def _on(self, elements, locator, action):
+        """``action(element)``, looking the field up again once if its handle went stale"""
+        try:
+            return action(elements[locator])
+        except StaleElementReferenceException:
+            elements[locator] = self.refresh(locator)
+            return action(elements[locator])
+
+    def _set(self, element, text):
+        skipped = _unsupported.setdefault(self.driver.session_id, set())
+        for path in paths():
+            if path in skipped:
+                continue
+            if path == "type":
+                _type(self.driver, element, text)
+                return path
+            try:
+                _SETTERS[path](self.driver, element, text)
+                return path
+            except WebDriverException as error:
+                if "unknown method" not in str(error).lower() and "unsupported" not in str(error).lower():
+                    raise
+                logger.info("%s unavailable on this session: %s", path, error.msg)
+                skipped.add(path)
+        raise WebDriverException(f"No form fill path left for FORM_FILL={strategy()}")
+
+    def mismatched(self, mapping, elements):
+        """Locators whose input does not hold the wanted text, read from one page source"""
+        snapshot = PageSnapshot(self.driver.page_source)
+        wrong = set()
+        for locator, text in mapping.items():
+            nodes = snapshot.find_all(locator)
+            if nodes:
+                node = nodes[0]
+                shown, password, hint = node.get("text", ""), node.get("password") == "true", node.get("hint")
+            else:
+                # No XPath form, or a node the snapshot cannot see: ask the element
+                shown, password, hint = self._on(elements, locator, lambda element: (
+                    element.text, element.get_attribute("password") == "true",
+                    element.get_attribute("hint")))
+            if not holds(shown, text, password, hint):
+                wrong.add(locator)
+        return wrong
+
+
+def holds(shown, text, password=False, hint=None):
+    """Whether an input showing ``shown`` contains ``text``"""
+    if not text:
+        # Android reports the hint of an empty input as its text
+        return shown in ("", hint)
+    if password:
+        # Masked, so only the length can be checked
+        return len(shown) == len(text)
+    return shown == text
+
+
+def format_comparison(rows):
+    lines = [f"{'field':<24} {'send_keys ms':>13} {'fill_form ms':>13} {'path':>8}"]
+    for row in rows:
+        lines.append(f"{row['field']:<24} {row['send_keys_ms']:13.1f} {row['fill_form_ms']:13.1f} "
+                     f"{row['path']:>8}")
+    return "\n".join(lines)
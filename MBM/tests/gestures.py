@@ -0,0 +1,79 @@
+"""
+Scripted W3C touch gestures
+Swipes, flings and pinches built from W3C pointer actions, so they behave the
+same on every Appium driver instead of relying on driver-specific
+``mobile:`` gesture extensions.
+"""
+
+from selenium.webdriver.common.actions import interaction
+from selenium.webdriver.common.actions.action_builder import ActionBuilder
+from selenium.webdriver.common.actions.mouse_button import MouseButton
+from selenium.webdriver.common.actions.pointer_input import PointerInput
+
+SWIPE_MS = 600
+FLING_MS = 120
+
+
+def _stroke(finger, start, end, duration_ms):
+    finger.create_pointer_move(duration=0, x=int(start[0]), y=int(start[1]), origin="viewport")
+    finger.create_pointer_down(button=MouseButton.LEFT)
+    finger.create_pause(0.05)
+    finger.create_pointer_move(duration=duration_ms, x=int(end[0]), y=int(end[1]),
+                               origin="viewport")
+    finger.create_pointer_up(button=MouseButton.LEFT)
+
+
+def swipe(driver, start, end, duration_ms=SWIPE_MS):
+    """One-finger drag from ``start`` to ``end`` (x, y viewport points)"""
+    finger = PointerInput(interaction.POINTER_TOUCH, "finger")
+    builder = ActionBuilder(driver, mouse=finger)
+    _stroke(finger, start, end, duration_ms)
+    builder.perform()
+
+
+def _vertical_span(driver):
+    size = driver.get_window_size()
+    x = size["width"] // 2
+    return x, int(size["height"] * 0.8), int(size["height"] * 0.25)
+
+
+def fling_up(driver, duration_ms=FLING_MS):
+    """Fast upward flick that scrolls a list towards its end"""
+    x, bottom, top = _vertical_span(driver)
+    swipe(driver, (x, bottom), (x, top), duration_ms)
+
+
+def fling_down(driver, duration_ms=FLING_MS):
+    """Fast downward flick that scrolls a list back to its start"""
+    x, bottom, top = _vertical_span(driver)
+    swipe(driver, (x, top), (x, bottom), duration_ms)
+
+
+def scroll_up(driver, duration_ms=SWIPE_MS):
+    """Slow upward drag (no fling momentum)"""
+    x, bottom, top = _vertical_span(driver)
+    swipe(driver, (x, bottom), (x, top), duration_ms)
+
+
+def pan(driver, dx, dy, duration_ms=SWIPE_MS):
+    """Drag from the centre of the screen by (dx, dy)"""
+    size = driver.get_window_size()
+    cx, cy = size["width"] // 2, size["height"] // 2
+    swipe(driver, (cx, cy), (cx + dx, cy + dy), duration_ms)
+
+
+def pinch(driver, zoom_in=True, distance=None, duration_ms=SWIPE_MS):
+    """Two-finger pinch around the centre; zoom_in spreads the fingers apart"""
+    size = driver.get_window_size()
+    cx, cy = size["width"] // 2, size["height"] // 2
+    distance = distance or size["width"] // 3
+    near, far = 40, distance
+
+    first = PointerInput(interaction.POINTER_TOUCH, "finger1")
+    builder = ActionBuilder(driver, mouse=first)
+    second = builder.add_pointer_input(interaction.POINTER_TOUCH, "finger2")
+
+    start, end = (near, far) if zoom_in else (far, near)
+    _stroke(first, (cx, cy - start), (cx, cy - end), duration_ms)
+    _stroke(second, (cx, cy + start), (cx, cy + end), duration_ms)
+    builder.perform()
@@ -0,0 +1,137 @@
+"""
+Frame-timing and jank collection from ``dumpsys gfxinfo``
+The collector resets the app's frame statistics, runs a scripted gesture and
+reads them back, so each gesture gets its own janky-frame percentage and
+frame-time percentiles. ``parse_gfxinfo`` only needs the dump text and can be
+tested against captured output without a device.
+"""
+
+import re
+
+from shell import adb_shell
+
+_COUNTERS = {
+    "total_frames": re.compile(r"Total frames rendered:\s*(\d+)"),
+    "janky_frames": re.compile(r"^Janky frames:\s*(\d+)", re.MULTILINE),
+    "missed_vsync": re.compile(r"Number Missed Vsync:\s*(\d+)"),
+    "high_input_latency": re.compile(r"Number High input latency:\s*(\d+)"),
+    "slow_ui_thread": re.compile(r"Number Slow UI thread:\s*(\d+)"),
+    "slow_bitmap_uploads": re.compile(r"Number Slow bitmap uploads:\s*(\d+)"),
+    "slow_draw_commands": re.compile(r"Number Slow issue draw commands:\s*(\d+)"),
+    "deadline_missed": re.compile(r"Number Frame deadline missed:\s*(\d+)"),
+}
+_PERCENTILE = re.compile(r"^(\d+)th percentile:\s*([\d.]+)ms", re.MULTILINE)
+_HISTOGRAM = re.compile(r"^HISTOGRAM:(.*)$", re.MULTILINE)
+_BUCKET = re.compile(r"(\d+)ms=(\d+)")
+
+
+class FrameStats:
+    """Frame statistics of one gfxinfo dump"""
+
+    def __init__(self, counters, percentiles, histogram):
+        self.counters = counters
+        self.percentiles = percentiles
+        self.histogram = histogram
+
+    @property
+    def total_frames(self):
+        return self.counters.get("total_frames", 0)
+
+    @property
+    def janky_frames(self):
+        return self.counters.get("janky_frames", 0)
+
+    @property
+    def jank_percent(self):
+        if not self.total_frames:
+            return 0.0
+        return 100.0 * self.janky_frames / self.total_frames
+
+    def percentile(self, pct):
+        """Frame time in ms: reported value, else derived from the histogram"""
+        if pct in self.percentiles:
+            return self.percentiles[pct]
+        return histogram_percentile(self.histogram, pct)
+
+    def as_dict(self):
+        return {
+            "total_frames": self.total_frames,
+            "janky_frames": self.janky_frames,
+            "jank_percent": round(self.jank_percent, 2),
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "counters": self.counters,
+        }
+
+
+def parse_gfxinfo(text):
+    """Parse the output of ``dumpsys gfxinfo <package>``"""
+    counters = {}
+    for name, pattern in _COUNTERS.items():
+        match = pattern.search(text)
+        if match:
+            counters[name] = int(match.group(1))
+
+    percentiles = {int(pct): float(value) for pct, value in _PERCENTILE.findall(text)}
+
+    histogram = []
+    match = _HISTOGRAM.search(text)
+    if match:
+        histogram = [(int(ms), int(count)) for ms, count in _BUCKET.findall(match.group(1))]
+
+    return FrameStats(counters, percentiles, histogram)
+
+
+def histogram_percentile(histogram, pct):
+    """Frame time (ms) at ``pct`` from gfxinfo's (bucket_ms, count) histogram"""
+    total = sum(count for _, count in histogram)
+    if not total:
+        return None
+    threshold = total * pct / 100.0
+    seen = 0
+    for bucket_ms, count in histogram:
+        seen += count
+        if seen >= threshold:
+            return float(bucket_ms)
+    return float(histogram[-1][0])
+
+
+class GfxinfoCollector:
+    """Measures frame statistics around gestures on the device"""
+
+    def __init__(self, driver, package):
+        self.driver = driver
+        self.package = package
+        self.results = []
+
+    def reset(self):
+        adb_shell(self.driver, "dumpsys", "gfxinfo", self.package, "reset")
+
+    def read(self):
+        return parse_gfxinfo(adb_shell(self.driver, "dumpsys", "gfxinfo", self.package))
+
+    def measure(self, screen, gesture_name, gesture, repeat=1):
+        """Reset, run ``gesture`` ``repeat`` times and read the frame stats"""
+        self.reset()
+        for _ in range(repeat):
+            gesture()
+        stats = self.read()
+        self.results.append({"screen": screen, "gesture": gesture_name, **stats.as_dict()})
+        return stats
+
+    def report(self):
+        lines = [f"{'screen':<18} {'gesture':<12} {'frames':>6} {'jank %':>7} "
+                 f"{'p50':>5} {'p90':>5} {'p95':>5} {'p99':>5}"]
+        for row in self.results:
+            lines.append(
+                f"{row['screen']:<18} {row['gesture']:<12} {row['total_frames']:6d} "
+                f"{row['jank_percent']:7.2f} "
+                + " ".join(f"{_ms(row[key]):>5}" for key in ("p50_ms", "p90_ms", "p95_ms", "p99_ms"))
+            )
+        return "\n".join(lines)
+
+
+def _ms(value):
+    return "-" if value is None else f"{value:.0f}"
@@ -0,0 +1,186 @@
+"""
+Per-command latency instrumentation for the Appium driver
+Wraps the driver's command executor so every W3C command is recorded with its
+name, locator, duration and retry number, attributed to the running pytest
+test and the page-object call stack that issued it, for example
+
+    LoginPage.login > BasePage.send_keys > BasePage.find_element > findElement
+
+Enable with APPIUM_INSTRUMENTATION=true; per-test JSON and a summary of the
+slowest commands/locators are written under reports/instrumentation.
+"""
+
+import functools
+import inspect
+import os
+import re
+import threading
+import time
+
+from reporting import report_dir, write_json
+
+_local = threading.local()
+
+
+def _frames():
+    if not hasattr(_local, "frames"):
+        _local.frames = []
+    return _local.frames
+
+
+def enabled():
+    return os.getenv("APPIUM_INSTRUMENTATION", "false").lower() == "true"
+
+
+# ============================================================================
+# PAGE-OBJECT FRAMES
+# ============================================================================
+
+class _Frame:
+    def __init__(self, name):
+        self.name = name
+        self.attempts = {}
+
+
+def _traced(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        frames = _frames()
+        frames.append(_Frame(name))
+        try:
+            return func(*args, **kwargs)
+        finally:
+            frames.pop()
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def trace_page_methods(cls):
+    """Record calls to the public methods defined on ``cls`` as frames"""
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(member):
+            continue
+        if getattr(member, "__traced__", False):
+            continue
+        setattr(cls, name, _traced(f"{cls.__name__}.{name}", member))
+    return cls
+
+
+# ============================================================================
+# COMMAND RECORDER
+# ============================================================================
+
+def _locator(command, params):
+    if not isinstance(params, dict):
+        return None
+    if "using" in params:
+        return f"{params['using']}={params.get('value')}"
+    if "script" in params:
+        return params["script"]
+    return None
+
+
+class CommandRecorder:
+    """Collects command records for the current test and the whole session"""
+
+    def __init__(self):
+        self.current_test = None
+        self.records = []
+        self.session_records = []
+        self._lock = threading.Lock()
+
+    def install(self, driver):
+        """Wrap ``driver.command_executor`` so its commands get recorded"""
+        executor = driver.command_executor
+        if getattr(executor, "_recorder", None) is self:
+            return driver
+        original = executor.execute
+
+        def execute(command, params):
+            locator = _locator(command, params)
+            frames = _frames()
+            attempt = 1
+            if frames:
+                key = (command, locator)
+                attempt = frames[-1].attempts.get(key, 0) + 1
+                frames[-1].attempts[key] = attempt
+            start = time.perf_counter()
+            try:
+                return original(command, params)
+            finally:
+                self.record({
+                    "test": self.current_test,
+                    "command": command,
+                    "locator": locator,
+                    "duration": time.perf_counter() - start,
+                    "retry": attempt - 1,
+                    "stack": [frame.name for frame in frames],
+                })
+
+        executor.execute = execute
+        executor._recorder = self
+        return driver
+
+    def record(self, entry):
+        with self._lock:
+            self.records.append(entry)
+
+    def start_test(self, nodeid):
+        self.current_test = nodeid
+        self.records = []
+
+    def finish_test(self):
+        """Write the current test's records and fold them into the session"""
+        records, self.records = self.records, []
+        if self.current_test and records:
+            name = re.sub(r"[^\w.-]+", "_", self.current_test)
+            write_json(os.path.join(report_dir("instrumentation"), f"{name}.json"), {
+                "test": self.current_test,
+                "commands": len(records),
+                "total": sum(record["duration"] for record in records),
+                "records": records,
+            })
+        self.session_records.extend(records)
+        self.current_test = None
+        return records
+
+    # -- aggregation --------------------------------------------------------
+
+    def aggregate(self, key):
+        """Count, total, max and retries grouped by ``key`` over the session"""
+        groups = {}
+        for record in self.session_records:
+            name = key(record)
+            if name is None:
+                continue
+            group = groups.setdefault(name, {
+                "name": name, "count": 0, "total": 0.0, "max": 0.0, "retries": 0,
+            })
+            group["count"] += 1
+            group["total"] += record["duration"]
+            group["max"] = max(group["max"], record["duration"])
+            group["retries"] += record["retry"]
+        return sorted(groups.values(), key=lambda group: group["total"], reverse=True)
+
+    def summary(self, top=10):
+        commands = self.aggregate(lambda record: record["command"])[:top]
+        locators = self.aggregate(lambda record: record["locator"])[:top]
+        write_json(os.path.join(report_dir("instrumentation"), "summary.json"), {
+            "commands": commands,
+            "locators": locators,
+        })
+        return "\n".join([
+            format_table(f"Top {top} commands", commands),
+            format_table(f"Top {top} locators", locators),
+        ])
+
+
+def format_table(title, rows):
+    lines = [title, f"  {'total ms':>9} {'count':>6} {'avg ms':>8} {'max ms':>8} {'retries':>7}  name"]
+    for row in rows:
+        lines.append(
+            f"  {row['total'] * 1000:9.1f} {row['count']:6d} "
+            f"{row['total'] / row['count'] * 1000:8.1f} {row['max'] * 1000:8.1f} "
+            f"{row['retries']:7d}  {row['name']}"
+        )
+    return "\n".join(lines)
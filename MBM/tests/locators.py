@@ -0,0 +1,162 @@
+"""
+Locator compiler for the MásBosque Manu Appium suite
+Locators are declared as XPath, which makes UiAutomator2 serialize the whole
+view hierarchy on every lookup. ``compile_locator`` rewrites the XPath forms
+used by the suite into native strategies:
+
+    //cls[@content-desc='X']            -> accessibility id X
+    //cls[contains(@content-desc, 'X')] -> UiSelector().className(cls).descriptionContains("X")
+    //cls[@text='X']                    -> UiSelector().className(cls).text("X")
+    //cls[contains(@text, 'X')]         -> UiSelector().className(cls).textContains("X")
+    //cls[@resource-id='X']             -> UiSelector().className(cls).resourceId("X")
+
+Anything else stays XPath. Set APPIUM_COMPILE_LOCATORS=false to keep every
+locator as declared.
+"""
+
+import os
+import re
+import statistics
+import time
+from functools import lru_cache
+
+from appium.webdriver.common.appiumby import AppiumBy
+
+_XPATH_FORM = re.compile(
+    r"^//(?P<cls>\*|[\w.$]+)\["
+    r"(?:@(?P<eq_attr>[\w-]+)\s*=\s*'(?P<eq_value>[^']*)'"
+    r"|contains\(\s*@(?P<contains_attr>[\w-]+)\s*,\s*'(?P<contains_value>[^']*)'\s*\))"
+    r"\]$"
+)
+
+_UISELECTOR_EQUALS = {
+    "text": "text",
+    "content-desc": "description",
+    "resource-id": "resourceId",
+}
+
+_UISELECTOR_CONTAINS = {
+    "text": "textContains",
+    "content-desc": "descriptionContains",
+}
+
+
+class CompiledLocator(tuple):
+    """(by, value) pair that remembers the XPath it was compiled from"""
+
+    def __new__(cls, by, value, source):
+        locator = super().__new__(cls, (by, value))
+        locator.source = source
+        return locator
+
+
+def _java_string(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _uiselector(cls, method, value):
+    selector = "new UiSelector()"
+    if cls != "*":
+        selector += f".className({_java_string(cls)})"
+    return f"{selector}.{method}({_java_string(value)})"
+
+
+@lru_cache(maxsize=None)
+def compile_locator(locator):
+    """Fastest equivalent of an (AppiumBy.XPATH, expression) locator"""
+    if isinstance(locator, CompiledLocator):
+        return locator
+    by, value = locator[0], locator[1]
+    if by != AppiumBy.XPATH:
+        return CompiledLocator(by, value, None)
+
+    match = _XPATH_FORM.match(value.strip())
+    if match:
+        cls = match.group("cls")
+        eq_attr = match.group("eq_attr")
+        contains_attr = match.group("contains_attr")
+
+        if eq_attr == "content-desc":
+            return CompiledLocator(AppiumBy.ACCESSIBILITY_ID, match.group("eq_value"), value)
+        if eq_attr in _UISELECTOR_EQUALS:
+            selector = _uiselector(cls, _UISELECTOR_EQUALS[eq_attr], match.group("eq_value"))
+            return CompiledLocator(AppiumBy.ANDROID_UIAUTOMATOR, selector, value)
+        if contains_attr in _UISELECTOR_CONTAINS:
+            selector = _uiselector(
+                cls, _UISELECTOR_CONTAINS[contains_attr], match.group("contains_value")
+            )
+            return CompiledLocator(AppiumBy.ANDROID_UIAUTOMATOR, selector, value)
+
+    return CompiledLocator(AppiumBy.XPATH, value, value)
+
+
+def xpath_of(locator):
+    """XPath a locator was declared with (None for native declarations)"""
+    source = getattr(locator, "source", None)
+    if source is not None:
+        return source
+    return locator[1] if locator[0] == AppiumBy.XPATH else None
+
+
+def compiled_locators(cls):
+    """Class decorator compiling every (by, value) attribute of a locator class"""
+    if os.getenv("APPIUM_COMPILE_LOCATORS", "true").lower() == "false":
+        return cls
+    for name, value in list(vars(cls).items()):
+        if not name.startswith("_") and isinstance(value, tuple) and len(value) == 2:
+            setattr(cls, name, compile_locator(value))
+    return cls
+
+
+def locators_of(cls):
+    """Public locator attributes of a locator class"""
+    return {name: value for name, value in vars(cls).items()
+            if not name.startswith("_") and isinstance(value, tuple)}
+
+
+# ============================================================================
+# MICRO-BENCHMARK
+# ============================================================================
+
+def _time_lookup(driver, by, value, repeat):
+    samples = []
+    found = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = len(driver.find_elements(by, value))
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), found
+
+
+def benchmark_locators(driver, locators, repeat=5):
+    """Median lookup latency of XPath vs compiled strategy for each locator"""
+    rows = []
+    for name, locator in locators.items():
+        xpath = xpath_of(locator)
+        compiled = compile_locator((AppiumBy.XPATH, xpath)) if xpath else locator
+        xpath_time, xpath_found = _time_lookup(driver, AppiumBy.XPATH, xpath, repeat) \
+            if xpath else (None, None)
+        native_time, native_found = _time_lookup(driver, compiled[0], compiled[1], repeat)
+        rows.append({
+            "name": name,
+            "strategy": compiled[0],
+            "xpath_ms": xpath_time * 1000 if xpath_time is not None else None,
+            "compiled_ms": native_time * 1000,
+            "xpath_found": xpath_found,
+            "compiled_found": native_found,
+        })
+    return rows
+
+
+def format_benchmark(rows):
+    """Text table of benchmark_locators results"""
+    lines = [f"{'locator':<22} {'strategy':<22} {'xpath ms':>9} {'native ms':>10} {'speedup':>8}"]
+    for row in rows:
+        xpath_ms = row["xpath_ms"]
+        speedup = xpath_ms / row["compiled_ms"] if xpath_ms and row["compiled_ms"] else 0.0
+        lines.append(
+            f"{row['name']:<22} {row['strategy']:<22} "
+            f"{xpath_ms if xpath_ms is not None else float('nan'):9.1f} "
+            f"{row['compiled_ms']:10.1f} {speedup:7.2f}x"
+        )
+    return "\n".join(lines)
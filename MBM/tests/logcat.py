@@ -0,0 +1,256 @@
+"""
+App log spans from logcat
+LoggingService (react-native-logs) and debugLogger print tagged messages such
+as ``SYNC_START: ...`` or ``[MBM-INFO] ...`` to the console, which ends up in
+logcat under the ``ReactNativeJS`` tag. ``LogcatCollector`` polls the Appium
+``logcat`` log in a background thread, keeps only those lines and pairs
+start/end tags into ``Span`` objects, so tests can assert on how long the app
+itself took for a sync cycle or a profile load instead of polling the UI.
+
+    APPIUM_APP_LOGS             record spans for every test that uses a driver (default false)
+    APPIUM_APP_LOGS_INTERVAL    seconds between logcat polls (default 0.5)
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+LOG_TYPE = "logcat"
+JS_TAG = " ReactNativeJS"
+
+# 10-18 12:00:00.123  4321  4350 I ReactNativeJS: <message>
+_LINE = re.compile(r"^\S+ \S+\s+\d+\s+\d+ (?P<level>[VDIWEF]) ReactNativeJS\s*: (?P<body>.*)$")
+# LoggingService: "12:00:00 PM | INFO : [EVENT][SENTRY]: SYNC_START: 🔄 ..."
+_TAGGED = re.compile(r"\[[A-Z]+\]\[SENTRY\]: (?P<tag>[A-Z][A-Z0-9_]+): (?P<text>.*)$")
+# debugLogger: "[MBM-INFO] ℹ️ <message>"
+_DEBUG_LOG = re.compile(r"\[MBM-(?P<level>[A-Z]+)\] \S+ (?P<text>.*)$")
+
+
+def enabled():
+    return os.getenv("APPIUM_APP_LOGS", "false").lower() == "true"
+
+
+class AppEvent:
+    """One tagged app log message"""
+
+    def __init__(self, time, tag, text, level="I"):
+        self.time = time
+        self.tag = tag
+        self.text = text
+        self.level = level
+
+    @property
+    def line(self):
+        return f"{self.tag}: {self.text}"
+
+
+def parse_entry(entry):
+    """AppEvent of an Appium logcat entry, or None for other lines"""
+    message = entry.get("message", "")
+    if JS_TAG not in message:
+        return None
+    match = _LINE.match(message)
+    if match is None:
+        return None
+    body = match.group("body")
+    at = entry.get("timestamp", 0) / 1000.0
+    tagged = _TAGGED.search(body)
+    if tagged:
+        return AppEvent(at, tagged.group("tag"), tagged.group("text"), match.group("level"))
+    debug = _DEBUG_LOG.search(body)
+    if debug:
+        return AppEvent(at, "MBM_" + debug.group("level"), debug.group("text"), match.group("level"))
+    return None
+
+
+def entries_from_dump(text, year=None):
+    """Appium-style logcat entries of saved ``adb logcat -v threadtime`` output"""
+    year = year or datetime.now().year
+    entries = []
+    for line in text.splitlines():
+        try:
+            stamp = datetime.strptime(f"{year}-{line[:18]}", "%Y-%m-%d %H:%M:%S.%f")
+        except ValueError:
+            continue
+        entries.append({"timestamp": int(stamp.timestamp() * 1000), "message": line})
+    return entries
+
+
+# ============================================================================
+# SPANS
+# ============================================================================
+
+class SpanRule:
+    """Start/end patterns matched against ``TAG: text`` of each event
+
+    ``key`` extracts an id from both lines so that overlapping spans (one per
+    synced log, say) pair up correctly; end lines without the id close the
+    oldest open span of the rule.
+    """
+
+    def __init__(self, name, start, end, key=None):
+        self.name = name
+        self.start = re.compile(start)
+        self.end = re.compile(end)
+        self.key = re.compile(key, re.IGNORECASE) if key else None
+
+    def key_of(self, line):
+        if self.key is None:
+            return None
+        match = self.key.search(line)
+        return match.group(1) if match else None
+
+
+SPAN_RULES = [
+    SpanRule("sync_cycle", r"SYNC_START:", r"SYNC_(COMPLETE|EMPTY|CYCLE_ERROR):"),
+    SpanRule("sync_log", r"SYNC_LOG:", r"SYNC_(SUCCESS|DUP|SKIP|MAX_RETRIES|ERROR):",
+             key=r"\blog (\d+)\b"),
+    SpanRule("profile_load", r"PROFILE_LOAD:", r"PROFILE_LOADED:", key=r"\bprofile (\S+?)\.*(?:\s|$)"),
+    SpanRule("map_pins", r"MAP_PINS: .*Loading", r"MAP_PINS: .*Map display"),
+]
+
+
+class Span:
+    """Time between a start event and the end event paired with it"""
+
+    def __init__(self, name, key, start, end):
+        self.name = name
+        self.key = key
+        self.start = start
+        self.end = end
+
+    @property
+    def duration_ms(self):
+        return (self.end.time - self.start.time) * 1000
+
+    @property
+    def outcome(self):
+        return self.end.tag
+
+    def as_dict(self):
+        return {"name": self.name, "key": self.key, "outcome": self.outcome,
+                "start": self.start.time, "duration_ms": round(self.duration_ms, 1)}
+
+
+class SpanTracker:
+    """Pairs start and end events into spans as they arrive"""
+
+    def __init__(self, rules=None):
+        self.rules = SPAN_RULES if rules is None else rules
+        self.pending = {rule.name: [] for rule in self.rules}
+        self.spans = []
+
+    def feed(self, event):
+        line = event.line
+        for rule in self.rules:
+            if rule.start.match(line):
+                self.pending[rule.name].append((rule.key_of(line), event))
+            elif rule.end.match(line):
+                self._close(rule, rule.key_of(line), event)
+
+    def _close(self, rule, key, event):
+        pending = self.pending[rule.name]
+        for index, (start_key, start) in enumerate(pending):
+            if key is None or start_key == key:
+                del pending[index]
+                self.spans.append(Span(rule.name, start_key, start, event))
+                return
+        logger.debug("%s without a matching start: %s", rule.name, event.line)
+
+
+# ============================================================================
+# COLLECTION
+# ============================================================================
+
+def logcat_available(driver):
+    try:
+        return LOG_TYPE in driver.log_types
+    except WebDriverException:
+        return False
+
+
+class LogcatCollector:
+    """Background reader of the Appium logcat log for one driver"""
+
+    def __init__(self, driver, interval=None, rules=None):
+        self.driver = driver
+        self.interval = float(os.getenv("APPIUM_APP_LOGS_INTERVAL", 0.5) if interval is None else interval)
+        self.tracker = SpanTracker(rules)
+        self.events = []
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def spans(self):
+        return self.tracker.spans
+
+    def start(self):
+        # Skip whatever the device logged before this session
+        self.driver.get_log(LOG_TYPE)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except WebDriverException as error:
+                logger.warning("Stopped reading logcat: %s", error.msg)
+                return
+
+    def poll(self):
+        """Read and parse the entries logged since the previous poll"""
+        with self.lock:
+            for entry in self.driver.get_log(LOG_TYPE):
+                event = parse_entry(entry)
+                if event is not None:
+                    self.events.append(event)
+                    self.tracker.feed(event)
+
+    def window(self):
+        """Spans completed from now on"""
+        return SpanWindow(self)
+
+
+class SpanWindow:
+    """The spans a collector completes while one test runs"""
+
+    def __init__(self, collector):
+        self.collector = collector
+        self.first = len(collector.spans)
+        self.last = None
+
+    @property
+    def spans(self):
+        return self.collector.spans[self.first:self.last]
+
+    def named(self, name):
+        return [span for span in self.spans if span.name == name]
+
+    def wait_for(self, name, timeout=30, count=1):
+        """The first ``count`` spans called ``name``, polling until ``timeout``"""
+        deadline = time.monotonic() + timeout
+        while True:
+            self.collector.poll()
+            found = self.named(name)
+            if len(found) >= count or time.monotonic() >= deadline:
+                return found[:count]
+            time.sleep(min(self.collector.interval, 0.25))
+
+    def close(self):
+        self.collector.poll()
+        self.last = len(self.collector.spans)
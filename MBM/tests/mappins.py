@@ -0,0 +1,147 @@
+"""
+Map-pin scaling benchmark for the mapView screen
+``fetchMapPins`` loads every pin through ``getAllMapPinsResilient``: online it
+selects ``Localizations`` from Supabase (capped at 1000 rows) and caches them
+one INSERT at a time with ``addPinsLocations``; offline it falls back to a full
+``SELECT`` of the ``locations`` table. For each pin count the benchmark seeds
+synthetic pins either into the Supabase stand-in or into a pre-built
+``localdatabase.db`` pushed to the device, opens the map and records
+
+* time to first render (deep link until the map view is visible),
+* pin load time (the app's MAP_PINS span, see logcat.py) and how many pins the
+  map ended up showing,
+* frame stats while panning and zooming, when ``dumpsys`` is reachable.
+
+    MAP_PIN_COUNTS      synthetic pins per run (default 100,1000,10000,50000)
+    MAP_PIN_SPREAD      degrees of latitude/longitude the pins cover (default 0.11)
+"""
+
+import os
+import random
+import re
+import sqlite3
+
+from benchmarks import time_until_visible
+from driver_pool import MAP_ROUTE
+from syncdb import build_queue_db
+
+# Fallback region of app/mapView.tsx when the location is unavailable
+DEFAULT_CENTER = (20.630117, -103.555317)
+ZONE_TYPES = ("safe", "warning", "danger", "shelter")
+SUPABASE_TABLE = "Localizations"
+# getAllMapPinsResilient: .from('Localizations').select('*').limit(1000)
+SUPABASE_LIMIT = 1000
+
+_DISPLAYED = re.compile(r"Map display: (\d+) pins")
+
+
+def pin_counts():
+    return [int(count) for count in os.getenv("MAP_PIN_COUNTS", "100,1000,10000,50000").split(",")]
+
+
+def synthetic_pins(count, seed=0, center=DEFAULT_CENTER, spread=None):
+    """``count`` reproducible pins scattered around ``center``"""
+    spread = float(os.getenv("MAP_PIN_SPREAD", 0.11) if spread is None else spread)
+    rng = random.Random(seed)
+    latitude, longitude = center
+    return [
+        {
+            "name": f"Zona {index}",
+            "latitude": round(latitude + rng.uniform(-spread, spread) / 2, 6),
+            "longitude": round(longitude + rng.uniform(-spread, spread) / 2, 6),
+            "zoneType": ZONE_TYPES[index % len(ZONE_TYPES)],
+        }
+        for index in range(count)
+    ]
+
+
+def seed_supabase(store, pins):
+    """Replace the stand-in's ``Localizations`` rows with ``pins``"""
+    store.delete(SUPABASE_TABLE, [])
+    store.insert(SUPABASE_TABLE, pins)
+
+
+def build_locations_db(path, pins, user_id="test-user", role="medico"):
+    """App database at ``path`` whose ``locations`` cache holds ``pins``"""
+    build_queue_db(path, user_id=user_id, role=role)
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            connection.executemany(
+                "INSERT INTO locations (name, latitude, longitude, zoneType) VALUES (?, ?, ?, ?)",
+                ((pin["name"], pin["latitude"], pin["longitude"], pin["zoneType"]) for pin in pins),
+            )
+    finally:
+        connection.close()
+    return path
+
+
+def displayed_pins(span):
+    """Pin count of a map_pins span's ``Map display: N pins`` line, or None"""
+    match = _DISPLAYED.search(span.end.text)
+    return int(match.group(1)) if match else None
+
+
+def expected_pins(source, count):
+    return min(count, SUPABASE_LIMIT) if source == "supabase" else count
+
+
+class MapPinBenchmark:
+    """Opens the map with a seeded pin set and measures how it copes"""
+
+    def __init__(self, driver, driver_pool, collector, locator, gfxinfo=None):
+        self.driver = driver
+        self.driver_pool = driver_pool
+        self.collector = collector
+        self.locator = locator
+        self.gfxinfo = gfxinfo
+
+    def run(self, source, count, gestures=(), timeout=120):
+        """Record for ``count`` pins already seeded into ``source``"""
+        window = self.collector.window()
+        first_render = time_until_visible(
+            self.driver, lambda: self.driver_pool.open_route(self.driver, MAP_ROUTE),
+            self.locator, timeout)
+        spans = window.wait_for("map_pins", timeout=timeout)
+        window.close()
+        result = {
+            "source": source,
+            "pins": count,
+            "expected": expected_pins(source, count),
+            "first_render_ms": round(first_render * 1000, 1),
+            "pins_loaded_ms": round(spans[0].duration_ms, 1) if spans else None,
+            "displayed": displayed_pins(spans[0]) if spans else None,
+            "frames": {},
+        }
+        if self.gfxinfo is not None:
+            for name, gesture in gestures:
+                stats = self.gfxinfo.measure(MAP_ROUTE, name, gesture, repeat=2)
+                result["frames"][name] = {
+                    "frames": stats.total_frames,
+                    "jank_percent": round(stats.jank_percent, 2),
+                    "p90_ms": stats.percentile(90),
+                }
+        return result
+
+
+def format_scaling(results):
+    lines = [f"{'source':<9} {'pins':>6} {'shown':>6} {'render ms':>10} {'load ms':>8} "
+             f"{'pan p90':>8} {'zoom p90':>9}"]
+    for row in results:
+        frames = row.get("frames", {})
+        cells = [
+            "-" if row.get("displayed") is None else str(row["displayed"]),
+            f"{row['first_render_ms']:.0f}",
+            "-" if row.get("pins_loaded_ms") is None else f"{row['pins_loaded_ms']:.0f}",
+            _p90(frames.get("pan")),
+            _p90(frames.get("zoom_in")),
+        ]
+        lines.append(f"{row['source']:<9} {row['pins']:6d} {cells[0]:>6} {cells[1]:>10} "
+                     f"{cells[2]:>8} {cells[3]:>8} {cells[4]:>9}")
+    return "\n".join(lines)
+
+
+def _p90(frames):
+    if not frames or frames.get("p90_ms") is None:
+        return "-"
+    return f"{frames['p90_ms']:.0f}"
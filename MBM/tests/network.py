@@ -0,0 +1,376 @@
+"""
+Network conditions and connectivity-transition latency
+``connectionManager`` flips ``isOnline`` from NetInfo's ``isInternetReachable``
+and ``syncManager`` starts a sync cycle from its ``onConnectionChange``
+listener (``SYNC_CONNECTION: ... Connection restored!``). The harness takes
+the device offline with a queue of pending rows, brings it back through
+Appium (wifi + data, or airplane mode) and measures
+
+* reconnect -> the app's connection-change event (logcat),
+* reconnect -> the first sync request seen by the throttling proxy,
+* reconnect -> an empty pending queue (pulled ``localdatabase.db``),
+
+for every network profile of the matrix. ``ThrottlingProxy`` is a TCP proxy
+put in front of the Supabase stand-in (build the app with
+``EXPO_PUBLIC_SUPABASE_URL`` pointing at the proxy) that adds latency, jitter,
+a bandwidth cap and segment loss in each direction. The harness only runs
+behind it, so the queued rows never reach a real backend:
+
+    python network.py --upstream 127.0.0.1:54321 --port 54320 --profile 3g
+
+Profiles are given by name or as ``name=latency:200,jitter:50,bandwidth:750,loss:0.01``
+(ms one way, kbit/s, share of 1460-byte segments that need a retransmission).
+
+    NETWORK_PROFILES        profiles of the matrix, ";"-separated (default wifi;3g;edge)
+    NETWORK_TRANSITIONS     how the device is reconnected (default connectivity,airplane)
+    NETWORK_QUEUE_SIZE      pending rows queued while offline (default 200)
+    NETWORK_PROXY_HOST      proxy bind address (default 127.0.0.1)
+    NETWORK_PROXY_PORT      proxy port, 0 picks a free one (default 0)
+"""
+
+import argparse
+import logging
+import math
+import os
+import queue
+import random
+import re
+import socket
+import threading
+import time
+from datetime import datetime
+
+from selenium.common.exceptions import WebDriverException
+
+from syncdb import SyncBenchmark, build_queue_db, pending_counts, split_rows
+
+logger = logging.getLogger(__name__)
+
+SEGMENT = 1460
+_REQUEST_LINE = re.compile(rb"^(GET|POST|PATCH|PUT|DELETE|HEAD|OPTIONS) (\S+) HTTP/1\.[01]\r\n")
+
+
+class NetworkProfile:
+    """Latency (ms, one way), jitter (ms), bandwidth (kbit/s, 0 = unlimited) and loss"""
+
+    def __init__(self, name, latency_ms=0.0, jitter_ms=0.0, bandwidth_kbps=0.0, loss=0.0):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.bandwidth_kbps = bandwidth_kbps
+        self.loss = loss
+
+    @classmethod
+    def parse(cls, spec):
+        """``name`` of a built-in profile or ``name=latency:..,jitter:..,bandwidth:..,loss:..``"""
+        name, _, settings = spec.partition("=")
+        name = name.strip()
+        if not settings:
+            if name not in PROFILES:
+                raise ValueError(f"Unknown network profile {name!r}")
+            return PROFILES[name]
+        values = {"latency": 0.0, "jitter": 0.0, "bandwidth": 0.0, "loss": 0.0}
+        for entry in filter(None, settings.split(",")):
+            key, _, value = entry.partition(":")
+            if key.strip() not in values:
+                raise ValueError(f"Unknown network setting {key!r}")
+            values[key.strip()] = float(value)
+        return cls(name, values["latency"], values["jitter"], values["bandwidth"], values["loss"])
+
+    @property
+    def retransmit_s(self):
+        """Delay a lost segment adds: the minimum RTO or two round trips"""
+        return max(0.2, 4 * self.latency_ms / 1000.0)
+
+    def as_dict(self):
+        return {"name": self.name, "latency_ms": self.latency_ms, "jitter_ms": self.jitter_ms,
+                "bandwidth_kbps": self.bandwidth_kbps, "loss": self.loss}
+
+
+PROFILES = {
+    "wifi": NetworkProfile("wifi", 5, 2, 0, 0.0),
+    "4g": NetworkProfile("4g", 30, 10, 12000, 0.0),
+    "3g": NetworkProfile("3g", 100, 30, 750, 0.01),
+    "edge": NetworkProfile("edge", 300, 80, 120, 0.02),
+    # One bar at the edge of the reserve
+    "forest": NetworkProfile("forest", 600, 250, 40, 0.08),
+}
+
+
+def network_profiles():
+    return [NetworkProfile.parse(spec) for spec in
+            filter(None, os.getenv("NETWORK_PROFILES", "wifi;3g;edge").split(";"))]
+
+
+def transitions():
+    return [name.strip() for name in os.getenv("NETWORK_TRANSITIONS", "connectivity,airplane").split(",")]
+
+
+# ============================================================================
+# THROTTLING PROXY
+# ============================================================================
+
+class _Direction:
+    """One direction of a proxied connection: a reader stamps, a sender releases"""
+
+    def __init__(self, proxy, source, sink, upstream):
+        self.proxy = proxy
+        self.source = source
+        self.sink = sink
+        self.upstream = upstream
+        self.chunks = queue.Queue()
+        self.last_release = 0.0
+
+    def start(self):
+        threads = [threading.Thread(target=self._read, daemon=True),
+                   threading.Thread(target=self._send, daemon=True)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _read(self):
+        while True:
+            try:
+                chunk = self.source.recv(65536)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                self.chunks.put(None)
+                return
+            arrived = time.monotonic()
+            if self.upstream:
+                self.proxy.note_request(chunk)
+            self.chunks.put((self._release_time(arrived, len(chunk)), chunk))
+
+    def _release_time(self, arrived, size):
+        profile = self.proxy.profile
+        delay = profile.latency_ms / 1000.0
+        if profile.jitter_ms:
+            delay = max(0.0, delay + self.proxy.rng.uniform(-profile.jitter_ms, profile.jitter_ms) / 1000.0)
+        if profile.loss:
+            segments = math.ceil(size / SEGMENT)
+            lost = sum(self.proxy.rng.random() < profile.loss for _ in range(segments))
+            if lost:
+                with self.proxy.lock:
+                    self.proxy.retransmits += lost
+                delay += lost * profile.retransmit_s
+        transmit = size * 8 / (profile.bandwidth_kbps * 1000.0) if profile.bandwidth_kbps else 0.0
+        # Segments leave one after the other at the link rate, in order
+        release = max(arrived + delay + transmit, self.last_release + transmit)
+        self.last_release = release
+        return release
+
+    def _send(self):
+        while True:
+            item = self.chunks.get()
+            if item is None:
+                break
+            release, chunk = item
+            wait = release - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                self.sink.sendall(chunk)
+            except OSError:
+                break
+        try:
+            self.sink.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+class ThrottlingProxy:
+    """TCP proxy shaping traffic to ``upstream`` with a switchable NetworkProfile"""
+
+    def __init__(self, upstream, host="127.0.0.1", port=0, profile=None, seed=None):
+        self.upstream = upstream
+        self.profile = profile or PROFILES["wifi"]
+        self.rng = random.Random(seed)
+        self.requests = []
+        self.connections = 0
+        self.retransmits = 0
+        self.lock = threading.Lock()
+        self.server = socket.create_server((host, port))
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        try:
+            self.server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.server.close()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._link, args=(client,), daemon=True).start()
+
+    def _link(self, client):
+        try:
+            upstream = socket.create_connection(self.upstream)
+        except OSError as error:
+            logger.warning("Proxy cannot reach %s:%s: %s", *self.upstream, error)
+            client.close()
+            return
+        with self.lock:
+            self.connections += 1
+        for sock in (client, upstream):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threads = (_Direction(self, client, upstream, upstream=True).start()
+                   + _Direction(self, upstream, client, upstream=False).start())
+        for thread in threads:
+            thread.join()
+        client.close()
+        upstream.close()
+
+    def note_request(self, chunk):
+        """Record the HTTP request a client chunk starts, if it starts one"""
+        match = _REQUEST_LINE.match(chunk)
+        if match:
+            with self.lock:
+                self.requests.append((time.time(), match.group(1).decode(), match.group(2).decode()))
+
+    def first_request(self, after, prefix="/rest/v1/"):
+        """Wall-clock time of the first request for ``prefix`` after ``after``, or None"""
+        with self.lock:
+            times = [at for at, _, path in self.requests if at >= after and path.startswith(prefix)]
+        return min(times, default=None)
+
+
+# ============================================================================
+# DEVICE
+# ============================================================================
+
+def set_network(driver, transition, online):
+    """Reconnect (or disconnect) the device the way ``transition`` names"""
+    if transition == "airplane":
+        settings = {"airplaneMode": not online}
+    elif transition == "wifi":
+        settings = {"wifi": online}
+    elif transition == "connectivity":
+        settings = {"wifi": online, "data": online}
+    else:
+        raise ValueError(f"Unknown transition {transition!r}")
+    driver.execute_script("mobile: setConnectivity", settings)
+
+
+def clock_offset(driver):
+    """Seconds to add to device timestamps to get host time (0 if unknown)"""
+    before = time.time()
+    try:
+        stamp = driver.get_device_time("YYYY-MM-DDTHH:mm:ss.SSSZ")
+    except WebDriverException:
+        return 0.0
+    after = time.time()
+    try:
+        device = datetime.strptime(stamp, "%Y-%m-%dT%H:%M:%S.%f%z").timestamp()
+    except ValueError:
+        return 0.0
+    return (before + after) / 2 - device
+
+
+class ConnectivityHarness:
+    """Times the app's recovery after the device comes back online"""
+
+    def __init__(self, driver, package, collector, proxy, queue_size=None):
+        self.driver = driver
+        self.package = package
+        self.collector = collector
+        self.proxy = proxy
+        self.queue_size = int(os.getenv("NETWORK_QUEUE_SIZE", 200) if queue_size is None else queue_size)
+        self.sync = SyncBenchmark(driver, package)
+
+    def _event_after(self, since, offset, tag, contains=""):
+        for event in self.collector.events:
+            if event.tag == tag and contains in event.text and event.time + offset >= since:
+                return event.time + offset
+        return None
+
+    def run(self, profile, transition):
+        """Measurements for one profile/transition pair of the matrix"""
+        local = build_queue_db(os.path.join(self.sync.workdir, f"network-{self.queue_size}.db"),
+                               **split_rows(self.queue_size))
+        expected = pending_counts(local)["total"]
+        self.proxy.profile = profile
+        self.sync.push(local)
+        set_network(self.driver, transition, False)
+        self.driver.activate_app(self.package)
+        time.sleep(self.sync.poll_interval)
+        offset = clock_offset(self.driver)
+        self.collector.poll()
+
+        reconnected = time.time()
+        set_network(self.driver, transition, True)
+        event = first_request = None
+        remaining = expected
+        next_pull = time.monotonic() + self.sync.poll_interval
+        deadline = time.monotonic() + self.sync.timeout
+        while remaining and time.monotonic() < deadline:
+            time.sleep(min(self.collector.interval, 0.25))
+            self.collector.poll()
+            event = event or self._event_after(reconnected, offset, "SYNC_CONNECTION", "restored")
+            if first_request is None:
+                first_request = self.proxy.first_request(reconnected)
+            if time.monotonic() >= next_pull:
+                remaining = pending_counts(self.sync.pull())["total"]
+                next_pull = time.monotonic() + self.sync.poll_interval
+        drained = time.time() if not remaining else None
+
+        since = lambda at: None if at is None else round((at - reconnected) * 1000, 1)
+        return {
+            "profile": profile.name,
+            "transition": transition,
+            "queue_size": expected,
+            "connection_event_ms": since(event),
+            "first_sync_request_ms": since(first_request),
+            "drained_ms": since(drained),
+            "remaining": remaining,
+            "retransmits": self.proxy.retransmits,
+        }
+
+
+def format_matrix(results):
+    lines = [f"{'profile':<10} {'transition':<13} {'queue':>6} {'event ms':>9} "
+             f"{'1st req ms':>11} {'drained ms':>11} {'left':>5}"]
+    for row in results:
+        cells = ["-" if row[key] is None else f"{row[key]:.0f}"
+                 for key in ("connection_event_ms", "first_sync_request_ms", "drained_ms")]
+        lines.append(f"{row['profile']:<10} {row['transition']:<13} {row['queue_size']:6d} "
+                     f"{cells[0]:>9} {cells[1]:>11} {cells[2]:>11} {row['remaining']:5d}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--upstream", default="127.0.0.1:54321", help="host:port to forward to")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54320)
+    parser.add_argument("--profile", default="3g", help="built-in name or name=latency:..,bandwidth:..")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    host, _, port = args.upstream.rpartition(":")
+    proxy = ThrottlingProxy((host, int(port)), args.host, args.port,
+                            NetworkProfile.parse(args.profile), args.seed).start()
+    print(f"Throttling proxy on {proxy.url} -> {args.upstream} ({proxy.profile.as_dict()})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        proxy.stop()
+
+
+if __name__ == "__main__":
+    main()
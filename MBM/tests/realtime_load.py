@@ -0,0 +1,204 @@
+"""
+Realtime notification load generator and end-to-end latency probes
+``EventLoad`` writes ArrivalAlerts/Emergencies rows at a steady rate with
+periodic bursts, each tagged with a unique marker. ``NotificationProbe``
+watches the Android notification shade (where NotificationsProvider posts
+every INSERT) and ``SubscriberProbe`` a set of websocket subscribers, and
+both timestamp when each marker shows up, giving latency percentiles and the
+share of events that never arrive at a given rate.
+
+    REALTIME_RATES          events/s swept by the fan-out benchmark (default 1,5,20)
+    REALTIME_EVENTS         events per rate (default 30)
+    REALTIME_BURST          extra events fired together every REALTIME_BURST_EVERY s (default 0)
+    REALTIME_BURST_EVERY    seconds between bursts (default 5)
+    REALTIME_P95_LIMIT_MS   p95 above which the UI counts as lagging (default 5000)
+"""
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from benchmarks import percentile
+from fake_realtime import RealtimeClient
+
+
+def rates():
+    return [float(rate) for rate in os.getenv("REALTIME_RATES", "1,5,20").split(",")]
+
+
+class Event:
+    """One published row and when it was sent"""
+
+    def __init__(self, marker, table, sent_at):
+        self.marker = marker
+        self.table = table
+        self.sent_at = sent_at
+
+
+def arrival_row(marker):
+    """ArrivalAlerts row; the notification body shows ``name``"""
+    return {"userID": "load-test", "name": marker,
+            "arrivalTime": datetime.now().strftime("%H:%M:%S"), "accepted": False}
+
+
+def emergency_row(marker):
+    """Emergencies row; the notification body shows ``timeAlert``"""
+    return {"timeAlert": marker, "date": datetime.now().date().isoformat(),
+            "description": "load test", "received": False}
+
+
+ROW_FACTORIES = {"ArrivalAlerts": arrival_row, "Emergencies": emergency_row}
+
+
+class EventLoad:
+    """Inserts rows through ``insert(table, row)`` at ``rate`` events/s"""
+
+    def __init__(self, insert, rate=1.0, burst=None, burst_every=None):
+        self.insert = insert
+        self.rate = rate
+        self.burst = int(os.getenv("REALTIME_BURST", 0) if burst is None else burst)
+        self.burst_every = float(os.getenv("REALTIME_BURST_EVERY", 5)
+                                 if burst_every is None else burst_every)
+        self.run_id = uuid.uuid4().hex[:6]
+        self.events = []
+        self._thread = None
+
+    def schedule(self, count):
+        """Send offsets (s) for ``count`` events: steady ticks plus bursts"""
+        offsets, next_burst, tick = [], self.burst_every, 0
+        while len(offsets) < count:
+            at = tick / self.rate
+            if self.burst and at >= next_burst:
+                offsets.extend([next_burst] * self.burst)
+                next_burst += self.burst_every
+            offsets.append(at)
+            tick += 1
+        return offsets[:count]
+
+    def run(self, count, table="ArrivalAlerts"):
+        """Publish ``count`` events synchronously and return them"""
+        make_row = ROW_FACTORIES[table]
+        start = time.perf_counter()
+        for index, offset in enumerate(self.schedule(count)):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            marker = f"LT{self.run_id}-{index:05d}"
+            sent_at = time.perf_counter()
+            self.insert(table, make_row(marker))
+            self.events.append(Event(marker, table, sent_at))
+        return self.events
+
+    def start(self, count, table="ArrivalAlerts"):
+        """Publish in a background thread while a probe watches"""
+        self._thread = threading.Thread(target=self.run, args=(count, table), daemon=True)
+        self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+        return self.events
+
+
+def summarize(events, seen, rate=None):
+    """Latency percentiles (ms) and dropped events for one load run"""
+    latencies = [(seen[event.marker] - event.sent_at) * 1000
+                 for event in events if event.marker in seen]
+    result = {"rate": rate, "published": len(events), "received": len(latencies),
+              "dropped": len(events) - len(latencies)}
+    if latencies:
+        result.update({f"p{pct}_ms": round(percentile(latencies, pct), 1) for pct in (50, 90, 95, 99)})
+        result["max_ms"] = round(max(latencies), 1)
+    return result
+
+
+def saturation_rate(results, p95_limit_ms=None):
+    """Lowest rate at which events were dropped or p95 passed the limit"""
+    limit = float(os.getenv("REALTIME_P95_LIMIT_MS", 5000) if p95_limit_ms is None else p95_limit_ms)
+    for result in sorted(results, key=lambda result: result["rate"]):
+        if result["dropped"] or result.get("p95_ms", 0) > limit:
+            return result["rate"]
+    return None
+
+
+def format_results(results):
+    lines = [f"{'rate/s':>7} {'sent':>5} {'recv':>5} {'drop':>5} {'p50':>7} {'p95':>7} {'p99':>7}"]
+    for row in results:
+        lines.append(
+            f"{row['rate']:7.1f} {row['published']:5d} {row['received']:5d} {row['dropped']:5d} "
+            + " ".join(f"{row.get(key, float('nan')):7.0f}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+        )
+    return "\n".join(lines)
+
+
+# ============================================================================
+# PROBES
+# ============================================================================
+
+class NotificationProbe:
+    """Timestamps markers appearing in the Android notification shade"""
+
+    def __init__(self, driver, poll_interval=0.1):
+        self.driver = driver
+        self.poll_interval = poll_interval
+        self.seen = {}
+
+    def watch(self, load, timeout):
+        """Poll the shade until every published marker was seen or ``timeout``"""
+        self.driver.open_notifications()
+        try:
+            deadline = time.perf_counter() + timeout
+            while time.perf_counter() < deadline:
+                source = self.driver.page_source
+                now = time.perf_counter()
+                for event in list(load.events):
+                    if event.marker not in self.seen and event.marker in source:
+                        self.seen[event.marker] = now
+                if not load.running and len(self.seen) >= len(load.events):
+                    break
+                time.sleep(self.poll_interval)
+        finally:
+            self.driver.back()
+        return self.seen
+
+
+class SubscriberProbe:
+    """``count`` websocket subscribers timestamping each marker they receive"""
+
+    def __init__(self, url, apikey, table="ArrivalAlerts", count=1):
+        self.clients = [RealtimeClient(url, apikey) for _ in range(count)]
+        for client in self.clients:
+            client.subscribe(table, "INSERT")
+        self.seen = [{} for _ in self.clients]
+
+    def _collect(self, client, seen, load, timeout):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            for received_at, data in client.changes(0.2):
+                record = data.get("record") or {}
+                marker = record.get("name") or record.get("timeAlert")
+                seen.setdefault(marker, received_at)
+            if not load.running and len(seen) >= len(load.events):
+                break
+
+    def watch(self, load, timeout):
+        """Per-subscriber {marker: first seen}; the slowest subscriber counts"""
+        threads = [threading.Thread(target=self._collect, args=(client, seen, load, timeout))
+                   for client, seen in zip(self.clients, self.seen)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        markers = set().union(*self.seen)
+        return {marker: max(seen.get(marker, float("inf")) for seen in self.seen)
+                for marker in markers if all(marker in seen for seen in self.seen)}
+
+    def close(self):
+        for client in self.clients:
+            client.close()
@@ -0,0 +1,203 @@
+"""
+Scroll-throughput benchmark for the records screens
+recordsAdmin (``showLogsController`` -> ``getAllUserLogsResilient``) and
+recordsParamedic (``getUserLogsResilient``) load every log into one FlatList:
+online from Supabase ``UserLogs``, caching each row with ``saveSyncedLog``;
+offline from ``pending_logs`` through ``getAllLocalUserLogs`` /
+``getLocalUserLogs``. For each log count the benchmark seeds synthetic logs
+into the Supabase stand-in or into a pre-built ``localdatabase.db``, opens the
+screen and records
+
+* load time (deep link until the first log card is visible),
+* log cards scrolled past per second while flinging with W3C gestures. The
+  synthetic logs are numbered in list order, so one page source per fling
+  tells how far the list got, cards a fling skipped over included,
+* time until the last card (or until further flings stop moving the list).
+
+    RECORDS_LOG_COUNTS      synthetic logs per run (default 1000,10000,50000)
+    RECORDS_FLING_SETTLE    seconds the list may coast after a fling (default 0.3)
+    RECORDS_SCROLL_TIMEOUT  seconds of flinging before giving up on the end (default 300)
+"""
+
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+from appium.webdriver.common.appiumby import AppiumBy
+
+from benchmarks import Stats, time_until_visible
+from snapshot import PageSnapshot
+from syncdb import build_queue_db
+
+SUPABASE_TABLE = "UserLogs"
+USERS = 50
+# Consecutive flings that do not move the list mean it is at its end
+STALL_FLINGS = 2
+
+# recordsCardTitle shows the description; synthetic ones are numbered
+LOG_CARD = (AppiumBy.XPATH, "//*[starts-with(@text, 'Registro ')]")
+_CARD = re.compile(r"^Registro (\d+)$")
+
+
+def log_counts():
+    return [int(count) for count in os.getenv("RECORDS_LOG_COUNTS", "1000,10000,50000").split(",")]
+
+
+def synthetic_logs(count, user_id=None, users=USERS):
+    """``count`` UserLogs rows in list order (newest first), spread over ``users`` users
+
+    With ``user_id`` every log belongs to that user, as the paramedic screen
+    only lists its own.
+    """
+    today = datetime.now(timezone.utc).date()
+    return [
+        {
+            "id": f"log-{index}",
+            "userID": user_id or f"user-{index % users}",
+            "name": f"Usuario {index % users}",
+            "logDate": (today - timedelta(days=index // users)).isoformat(),
+            "ingressTime": "08:00",
+            "exitTime": "16:00",
+            "description": f"Registro {index}",
+            "image": None,
+        }
+        for index in range(count)
+    ]
+
+
+def seed_supabase(store, logs):
+    """Replace the stand-in's ``UserLogs`` rows with ``logs``"""
+    store.delete(SUPABASE_TABLE, [])
+    store.insert(SUPABASE_TABLE, logs)
+
+
+def build_logs_db(path, logs, user_id="test-user", role="medico"):
+    """App database at ``path`` whose ``pending_logs`` cache holds ``logs``
+
+    Rows are stored the way ``saveSyncedLog`` caches them (synced, with their
+    server id), so syncManager has nothing to send. They are inserted last
+    first so that ``ORDER BY logDate DESC, id DESC`` keeps the list order.
+    """
+    build_queue_db(path, user_id=user_id, role=role)
+    now = datetime.now(timezone.utc).isoformat()
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            connection.executemany(
+                "INSERT INTO pending_logs (userID, name, logDate, ingressTime, exitTime, "
+                "description, image, created_at, synced, server_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?)",
+                ((log["userID"], log["name"], log["logDate"], log["ingressTime"], log["exitTime"],
+                  log["description"], log["image"], now, log["id"]) for log in reversed(logs)),
+            )
+    finally:
+        connection.close()
+    return path
+
+
+def visible_cards(source):
+    """Numbers of the synthetic log cards in a page source"""
+    nodes = PageSnapshot(source).find_all(LOG_CARD)
+    return {int(match.group(1)) for match in (_CARD.match(node.get("text", "")) for node in nodes)
+            if match}
+
+
+class ScrollProgress:
+    """How far down the list each fling got, and when it stopped moving"""
+
+    def __init__(self, first, last=None):
+        self.position = max(first, default=-1)
+        self.last = last
+        self.samples = []
+        self.stalled = 0
+        self.last_new_at = 0.0
+
+    def add(self, elapsed, seconds, cards):
+        """Cards visible ``elapsed`` s into scrolling, after a fling that took ``seconds``"""
+        position = max(cards, default=self.position)
+        advanced = max(0, position - self.position)
+        self.position = max(self.position, position)
+        self.samples.append((seconds, advanced))
+        if advanced:
+            self.last_new_at = elapsed
+        self.stalled = 0 if advanced else self.stalled + 1
+
+    @property
+    def rows(self):
+        return self.position + 1
+
+    @property
+    def at_end(self):
+        if self.last is not None and self.position >= self.last:
+            return True
+        return self.stalled >= STALL_FLINGS
+
+    def seconds_per_100(self):
+        """Seconds per 100 cards of every fling that moved the list"""
+        return [seconds * 100 / new for seconds, new in self.samples if new]
+
+    def rows_per_s(self):
+        moving = [(seconds, new) for seconds, new in self.samples if new]
+        total = sum(seconds for seconds, _ in moving)
+        return round(sum(new for _, new in moving) / total, 1) if total else None
+
+
+class RecordsScrollBenchmark:
+    """Opens a records screen over a seeded log set and flings to its end"""
+
+    def __init__(self, driver, driver_pool, page, settle=None, timeout=None):
+        self.driver = driver
+        self.driver_pool = driver_pool
+        self.page = page
+        self.settle = float(os.getenv("RECORDS_FLING_SETTLE", 0.3) if settle is None else settle)
+        self.timeout = float(os.getenv("RECORDS_SCROLL_TIMEOUT", 300) if timeout is None else timeout)
+
+    def run(self, route, source, count, load_timeout=180):
+        """Measure ``route`` with ``count`` logs already seeded into ``source``"""
+        load = time_until_visible(
+            self.driver, lambda: self.driver_pool.open_route(self.driver, route), LOG_CARD, load_timeout)
+        progress = ScrollProgress(visible_cards(self.driver.page_source), count - 1)
+        start = time.perf_counter()
+        while not progress.at_end and time.perf_counter() - start < self.timeout:
+            began = time.perf_counter()
+            self.page.fling_up()
+            time.sleep(self.settle)
+            cards = visible_cards(self.driver.page_source)
+            now = time.perf_counter()
+            progress.add(now - start, now - began, cards)
+        return {
+            "screen": route,
+            "source": source,
+            "logs": count,
+            "load_ms": round(load * 1000, 1),
+            "flings": len(progress.samples),
+            "rows_reached": progress.rows,
+            "rows_per_s": progress.rows_per_s(),
+            "reached_end": progress.at_end,
+            "end_ms": round(progress.last_new_at * 1000, 1) if progress.at_end else None,
+            "s_per_100_rows": [round(value, 3) for value in progress.seconds_per_100()],
+        }
+
+
+def gated_stats(result):
+    """Benchmark name -> Stats for the baseline gate (durations, lower is better)"""
+    prefix = f"{result['screen']}_{result['source']}_{result['logs']}"
+    stats = {f"{prefix}:load": Stats([result["load_ms"] / 1000])}
+    if result["s_per_100_rows"]:
+        stats[f"{prefix}:scroll_100_rows"] = Stats(result["s_per_100_rows"])
+    if result["end_ms"] is not None:
+        stats[f"{prefix}:to_end"] = Stats([result["end_ms"] / 1000])
+    return stats
+
+
+def format_throughput(results):
+    lines = [f"{'screen':<17} {'source':<9} {'logs':>6} {'load ms':>8} {'rows/s':>7} "
+             f"{'reached':>7} {'end s':>7}"]
+    for row in results:
+        rate = "-" if row["rows_per_s"] is None else f"{row['rows_per_s']:.1f}"
+        end = "-" if row["end_ms"] is None else f"{row['end_ms'] / 1000:.1f}"
+        lines.append(f"{row['screen']:<17} {row['source']:<9} {row['logs']:6d} {row['load_ms']:8.0f} "
+                     f"{rate:>7} {row['rows_reached']:7d} {end:>7}")
+    return "\n".join(lines)
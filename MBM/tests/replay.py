@@ -0,0 +1,405 @@
+"""
+Record and replay of the W3C traffic between the suite and Appium
+With APPIUM_TRACE=record every request a driver sends (newSession included)
+and the response it got are written to a gzip-compressed JSON-lines trace:
+method, path, body (locators, typed text, scripts), response (element ids,
+page sources, alerts), duration and the test that sent it. Page sources and
+screenshots repeat a lot, so strings over 512 characters are stored once
+and referenced by hash.
+
+With APPIUM_TRACE=replay the ``appium_server`` fixture starts a
+``ReplayServer`` on the trace instead of talking to a device, so TestLogin or
+TestRegister rerun in seconds on any Linux box, e.g. to profile the Python
+side or to bisect a harness change:
+
+    APPIUM_TRACE=record pytest appium_tests.py -k "TestLogin"
+    APPIUM_TRACE=replay pytest appium_tests.py -k "TestLogin"
+    python replay.py reports/traces/master.trace.gz --port 4723 --speed 1
+
+Requests are matched per Appium session against the recorded order, within a
+look-ahead window so background threads may interleave differently. A poll
+repeated more often than recorded gets the last response again, recorded
+polls the replay no longer makes are skipped. Text typed, pasted or set into
+inputs may differ (generated e-mails); any other request without a recorded counterpart is a divergence,
+answered with a W3C error and listed in reports/replay/<trace>.json.
+
+    APPIUM_TRACE          off, record or replay (default off)
+    APPIUM_TRACE_FILE     trace path (default reports/traces/<xdist worker>.trace.gz)
+    APPIUM_REPLAY_SPEED   0 answers at once, 1 with the recorded durations (default 0)
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from reporting import report_dir, write_json
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "mbm-w3c-trace"
+VERSION = 1
+BLOB_MIN = 512
+LOOKAHEAD = 64
+_SESSION = re.compile(r"^(?:/wd/hub)?/session/([^/]+)")
+
+
+def mode():
+    return os.getenv("APPIUM_TRACE", "off").lower()
+
+
+def default_path():
+    worker = os.getenv("PYTEST_XDIST_WORKER", "master")
+    return os.getenv("APPIUM_TRACE_FILE") or os.path.join(report_dir("traces"), f"{worker}.trace.gz")
+
+
+def _session_of(path):
+    match = _SESSION.match(path)
+    return match.group(1) if match else None
+
+
+def _key(method, path, body):
+    return method, path, json.dumps(body or None, sort_keys=True)
+
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+class TraceRecorder:
+    """Writes every request/response of the connections it is installed on"""
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.handle = gzip.open(self.path, "wt", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.blobs = set()
+        self.current_test = None
+        self.count = 0
+        self.started = time.perf_counter()
+        self._write({"format": FORMAT, "version": VERSION, "created": datetime.now().isoformat()})
+
+    def install(self, connection):
+        """Wrap ``connection._request`` (a RemoteConnection) before the session starts"""
+        original = connection._request
+
+        def request(method, url, body=None):
+            start = time.perf_counter()
+            response = original(method, url, body)
+            self.record(method, urllib.parse.urlsplit(url).path, body, response,
+                        start - self.started, time.perf_counter() - start)
+            return response
+
+        connection._request = request
+        return connection
+
+    def mark(self, test):
+        """Attribute the following requests to ``test``"""
+        with self.lock:
+            self.current_test = test
+
+    def record(self, method, path, body, response, offset, duration):
+        payload = json.loads(body) if body and method in ("POST", "PUT") else None
+        with self.lock:
+            entry = {
+                "t": round(offset, 4), "ms": round(duration * 1000, 2), "test": self.current_test,
+                "method": method, "path": path, "body": payload,
+                "response": self._compact(response),
+            }
+            self._write(entry)
+            self.count += 1
+
+    def _compact(self, value):
+        if isinstance(value, str) and len(value) >= BLOB_MIN:
+            digest = hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
+            if digest not in self.blobs:
+                self.blobs.add(digest)
+                self._write({"blob": digest, "data": value})
+            return {"$blob": digest}
+        if isinstance(value, dict):
+            return {key: self._compact(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._compact(item) for item in value]
+        return value
+
+    def _write(self, line):
+        self.handle.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def close(self):
+        with self.lock:
+            self.handle.close()
+        return f"Recorded {self.count} commands ({len(self.blobs)} distinct blobs) to {self.path}"
+
+
+def load_trace(path):
+    """Recorded entries of a trace, blobs expanded"""
+    blobs = {}
+    entries = []
+
+    def expand(value):
+        if isinstance(value, dict):
+            if set(value) == {"$blob"}:
+                return blobs[value["$blob"]]
+            return {key: expand(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [expand(item) for item in value]
+        return value
+
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        header = json.loads(handle.readline())
+        if header.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a W3C trace")
+        for line in handle:
+            item = json.loads(line)
+            if "blob" in item:
+                blobs[item["blob"]] = item["data"]
+                continue
+            item["response"] = expand(item["response"])
+            item["index"] = len(entries)
+            entries.append(item)
+    return entries
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+class _Lane:
+    """Recorded entries of one Appium session (or of session-less requests)"""
+
+    def __init__(self):
+        self.entries = []
+        self.consumed = set()
+        self.cursor = 0
+        self.last = None
+
+    def advance(self):
+        while self.cursor < len(self.entries) and self.entries[self.cursor]["index"] in self.consumed:
+            self.cursor += 1
+
+
+class Replayer:
+    """Matches incoming requests with a recorded trace"""
+
+    def __init__(self, entries, speed=None, lookahead=LOOKAHEAD):
+        self.entries = entries
+        self.speed = float(os.getenv("APPIUM_REPLAY_SPEED", 0) if speed is None else speed)
+        self.lookahead = lookahead
+        self.lanes = {}
+        for entry in entries:
+            self.lanes.setdefault(_session_of(entry["path"]), _Lane()).entries.append(entry)
+        self.lock = threading.Lock()
+        self.current_test = None
+        self.served = 0
+        self.repeated = 0
+        self.collapsed = 0
+        self.divergences = []
+
+    def handle(self, method, path, body):
+        """(status, payload, recorded ms) answering one request"""
+        with self.lock:
+            lane = self.lanes.setdefault(_session_of(path), _Lane())
+            key = _key(method, path, body)
+            entry = self._take(lane, lambda item: _key(item["method"], item["path"], item["body"]) == key)
+            if entry is None and lane.last is not None and lane.last[0] == key:
+                # The replay polls longer than the recording did
+                self.repeated += 1
+                entry = lane.last[1]
+            if entry is None:
+                loose = _key(method, path, _without_text(body))
+                entry = self._take(lane, lambda item: _key(
+                    item["method"], item["path"], _without_text(item["body"])) == loose)
+                if entry is not None:
+                    self._diverged("body", entry, method, path, body)
+            if entry is None:
+                expected = lane.entries[lane.cursor] if lane.cursor < len(lane.entries) else None
+                self._diverged("command", expected, method, path, body)
+                return 500, {"value": {
+                    "error": "unknown error",
+                    "message": f"Replay diverged: no recorded response for {method} {path}",
+                    "stacktrace": "",
+                }}, 0.0
+            lane.last = (key, entry)
+            self.served += 1
+            return _http(entry["response"]) + (entry["ms"] * self.speed,)
+
+    def _take(self, lane, matches):
+        stop = min(len(lane.entries), lane.cursor + self.lookahead)
+        for position in range(lane.cursor, stop):
+            entry = lane.entries[position]
+            if entry["index"] in lane.consumed or not matches(entry):
+                continue
+            lane.consumed.add(entry["index"])
+            # Identical polls recorded before this one were not needed this time
+            for earlier in lane.entries[lane.cursor:position]:
+                if earlier["index"] not in lane.consumed and matches(earlier):
+                    lane.consumed.add(earlier["index"])
+                    self.collapsed += 1
+            # Whatever fell out of the window will never be asked for
+            for earlier in lane.entries[lane.cursor:max(lane.cursor, position - self.lookahead)]:
+                if earlier["index"] not in lane.consumed:
+                    lane.consumed.add(earlier["index"])
+                    self._missing(earlier)
+            lane.advance()
+            return entry
+        return None
+
+    def _missing(self, entry):
+        self.divergences.append({"kind": "missing", "test": self.current_test,
+                                 "expected": _describe(entry)})
+
+    def _diverged(self, kind, expected, method, path, body):
+        self.divergences.append({
+            "kind": kind, "test": self.current_test,
+            "request": {"method": method, "path": path, "body": body},
+            "expected": _describe(expected) if expected is not None else None,
+        })
+
+    def unreplayed(self):
+        return [entry for lane in self.lanes.values() for entry in lane.entries
+                if entry["index"] not in lane.consumed]
+
+    @property
+    def diverged(self):
+        return any(item["kind"] == "command" for item in self.divergences)
+
+    def report(self):
+        left = self.unreplayed()
+        return {
+            "commands": len(self.entries), "served": self.served,
+            "repeated_polls": self.repeated, "collapsed_polls": self.collapsed,
+            "not_replayed": len(left),
+            "divergences": self.divergences,
+            "first_divergence": next((item for item in self.divergences
+                                      if item["kind"] == "command"), None),
+        }
+
+    def summary(self):
+        report = self.report()
+        text = (f"Replayed {report['served']}/{report['commands']} commands, "
+                f"{report['repeated_polls']} polls repeated, {report['collapsed_polls']} collapsed, "
+                f"{len(self.divergences)} divergences")
+        first = report["first_divergence"]
+        if first is not None:
+            expected = first["expected"] or {}
+            text += (f"; first in {first['test']}: {first['request']['method']} "
+                     f"{first['request']['path']}, recorded {expected.get('method')} "
+                     f"{expected.get('path')} (#{expected.get('index')} of {expected.get('test')})")
+        return text
+
+
+def _without_text(value):
+    """``value`` minus the text typed, pasted or set into inputs"""
+    if isinstance(value, dict):
+        return {key: _without_text(item) for key, item in value.items()
+                if key not in ("text", "content") and not (key == "value" and isinstance(item, list))}
+    if isinstance(value, list):
+        return [_without_text(item) for item in value]
+    return value
+
+
+def _describe(entry):
+    return {"index": entry["index"], "test": entry["test"], "method": entry["method"],
+            "path": entry["path"], "body": entry["body"]}
+
+
+def _http(response):
+    """(status, JSON body) the client turns back into ``response``"""
+    status = response.get("status") if isinstance(response, dict) else None
+    if isinstance(status, int) and status >= 400:
+        # RemoteConnection keeps error bodies as text
+        return status, response["value"]
+    return 200, response
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    replayer = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        body = json.loads(raw) if raw and method in ("POST", "PUT") else None
+        status, payload, delay_ms = self.replayer.handle(method, self.path.split("?", 1)[0], body)
+        if delay_ms:
+            time.sleep(delay_ms / 1000.0)
+        data = (payload if isinstance(payload, str) else json.dumps(payload)).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class ReplayServer:
+    """Threaded HTTP server answering from a recorded trace"""
+
+    def __init__(self, path=None, host="127.0.0.1", port=0, speed=None):
+        self.path = path or default_path()
+        self.replayer = Replayer(load_trace(self.path), speed)
+        handler = type("ReplayHandler", (_Handler,), {"replayer": self.replayer})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def write_report(self):
+        name = os.path.basename(self.path).split(".", 1)[0]
+        return write_json(os.path.join(report_dir("replay"), f"{name}.json"), self.replayer.report())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("trace")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4723)
+    parser.add_argument("--speed", type=float, default=0.0, help="0 at once, 1 with recorded timing")
+    args = parser.parse_args()
+    server = ReplayServer(args.trace, args.host, args.port, args.speed)
+    print(f"Replaying {len(server.replayer.entries)} commands on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(server.replayer.summary())
+
+
+if __name__ == "__main__":
+    main()
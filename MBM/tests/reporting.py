@@ -0,0 +1,111 @@
+"""
+Report files for the MásBosque Manu Appium suite
+Every worker writes its own JSON file under the report directory and the
+controlling process merges them into a single report at the end of the run.
+"""
+
+import glob
+import json
+import os
+
+DEFAULT_REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports")
+
+
+def report_dir(*parts):
+    """Report directory (TEST_REPORT_DIR), created on demand"""
+    path = os.path.join(os.getenv("TEST_REPORT_DIR", DEFAULT_REPORT_DIR), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def write_json(path, data):
+    """Write ``data`` as indented JSON"""
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, indent=2, ensure_ascii=False)
+    return path
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def lock_exclusive(handle):
+    """Hold an exclusive lock on the open lock file ``handle`` until it is closed
+
+    Lets xdist workers update one shared file. fcntl is POSIX only; without
+    it (Windows) the file is written unlocked.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return
+    fcntl.flock(handle, fcntl.LOCK_EX)
+
+
+def clear_worker_timings():
+    """Remove per-worker files left over from a previous run"""
+    for path in glob.glob(os.path.join(report_dir(), "timings-*.json")):
+        os.remove(path)
+
+
+def write_worker_timings(worker_id, device, started, finished, tests):
+    """Dump one worker's test durations"""
+    return write_json(os.path.join(report_dir(), f"timings-{worker_id}.json"), {
+        "worker": worker_id,
+        "device": device,
+        "started": started,
+        "finished": finished,
+        "tests": tests,
+    })
+
+
+def merge_worker_timings():
+    """Combine every timings-<worker>.json into timings.json"""
+    workers = [read_json(path) for path in
+               sorted(glob.glob(os.path.join(report_dir(), "timings-*.json")))]
+    if not workers:
+        return None
+
+    started = min(worker["started"] for worker in workers)
+    finished = max(worker["finished"] for worker in workers)
+    wall_clock = finished - started
+    busy = sum(test["duration"] for worker in workers for test in worker["tests"])
+
+    merged = {
+        "wall_clock": wall_clock,
+        "test_time": busy,
+        "speedup": busy / wall_clock if wall_clock else 0.0,
+        "workers": [
+            {
+                "worker": worker["worker"],
+                "device": worker["device"],
+                "tests": len(worker["tests"]),
+                "busy": sum(test["duration"] for test in worker["tests"]),
+                "wall_clock": worker["finished"] - worker["started"],
+            }
+            for worker in workers
+        ],
+        "tests": sorted(
+            (dict(test, worker=worker["worker"], device=worker["device"])
+             for worker in workers for test in worker["tests"]),
+            key=lambda test: test["nodeid"],
+        ),
+    }
+    write_json(os.path.join(report_dir(), "timings.json"), merged)
+    return merged
+
+
+def format_timings(merged):
+    """Short text summary of a merged timing report"""
+    lines = [
+        f"Wall clock {merged['wall_clock']:.1f}s, test time {merged['test_time']:.1f}s, "
+        f"speedup x{merged['speedup']:.2f}"
+    ]
+    for worker in merged["workers"]:
+        lines.append(
+            f"  {worker['worker']:<8} {worker['device']:<28} "
+            f"{worker['tests']:3d} tests  busy {worker['busy']:7.1f}s  "
+            f"wall {worker['wall_clock']:7.1f}s"
+        )
+    return "\n".join(lines)
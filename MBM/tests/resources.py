@@ -0,0 +1,146 @@
+"""
+Memory and CPU sampling of the app process
+A background thread polls ``dumpsys meminfo`` and ``/proc/<pid>/stat`` for the
+app package through ``mobile: shell`` while a test runs, then reports the
+peak and delta of PSS, Java heap, native heap and the CPU time used.
+
+    APPIUM_RESOURCE_SAMPLING      true to sample every test that uses a driver
+    RESOURCE_SAMPLE_INTERVAL      seconds between samples (default 1.0)
+    MEMORY_DELTA_THRESHOLD_KB     PSS growth that flags a test (default 20480)
+"""
+
+import os
+import re
+import threading
+import time
+
+from shell import adb_shell
+
+CLOCK_TICKS = 100
+MEMORY_FIELDS = ("pss_kb", "java_heap_kb", "native_heap_kb")
+
+_SUMMARY = {
+    "java_heap_kb": re.compile(r"^\s*Java Heap:\s*(\d+)", re.MULTILINE),
+    "native_heap_kb": re.compile(r"^\s*Native Heap:\s*(\d+)", re.MULTILINE),
+    "pss_kb": re.compile(r"^\s*TOTAL(?: PSS)?:\s*(\d+)", re.MULTILINE),
+}
+
+
+def enabled():
+    return os.getenv("APPIUM_RESOURCE_SAMPLING", "false").lower() == "true"
+
+
+def parse_meminfo(text):
+    """PSS, Java heap and native heap (KB) from ``dumpsys meminfo <package>``"""
+    summary = text.split("App Summary", 1)[-1]
+    values = {}
+    for name, pattern in _SUMMARY.items():
+        match = pattern.search(summary)
+        if match:
+            values[name] = int(match.group(1))
+    return values
+
+
+def parse_proc_stat(text, clock_ticks=CLOCK_TICKS):
+    """User + system CPU seconds from a ``/proc/<pid>/stat`` line"""
+    # comm (field 2) may contain spaces, so split after its closing parenthesis
+    fields = text.rsplit(")", 1)[-1].split()
+    utime, stime = int(fields[11]), int(fields[12])
+    return (utime + stime) / clock_ticks
+
+
+class ResourceSampler:
+    """Samples one package in a background thread between start() and stop()"""
+
+    def __init__(self, driver, package, interval=None):
+        self.driver = driver
+        self.package = package
+        self.interval = interval or float(os.getenv("RESOURCE_SAMPLE_INTERVAL", 1.0))
+        self.samples = []
+        self.errors = 0
+        self._pid = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def pid(self):
+        output = adb_shell(self.driver, "pidof", self.package).split()
+        return output[0] if output else None
+
+    def sample(self):
+        """Take one sample; returns None when the app is not running"""
+        self._pid = self._pid or self.pid()
+        if self._pid is None:
+            return None
+        values = parse_meminfo(adb_shell(self.driver, "dumpsys", "meminfo", self.package))
+        values["cpu_s"] = parse_proc_stat(adb_shell(self.driver, "cat", f"/proc/{self._pid}/stat"))
+        values["time"] = time.monotonic()
+        self.samples.append(values)
+        return values
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception:
+                # The app restarting (new pid) or a slow dumpsys must not end sampling
+                self._pid = None
+                self.errors += 1
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling, take a final sample and return the usage summary"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        try:
+            self.sample()
+        except Exception:
+            self.errors += 1
+        return summarize(self.samples)
+
+
+def summarize(samples):
+    """Start, end, peak and delta of every memory field plus CPU seconds used"""
+    if not samples:
+        return {"samples": 0}
+    first, last = samples[0], samples[-1]
+    usage = {"samples": len(samples)}
+    for field in MEMORY_FIELDS:
+        values = [sample[field] for sample in samples if field in sample]
+        if values:
+            usage[field] = {
+                "start": values[0], "end": values[-1],
+                "peak": max(values), "delta": values[-1] - values[0],
+            }
+    usage["cpu_s"] = round(last["cpu_s"] - first["cpu_s"], 3)
+    usage["duration_s"] = round(last["time"] - first["time"], 3)
+    return usage
+
+
+def memory_threshold_kb():
+    return int(os.getenv("MEMORY_DELTA_THRESHOLD_KB", 20480))
+
+
+def exceeds_threshold(usage, threshold_kb=None):
+    """True when the test grew PSS by more than the threshold"""
+    threshold_kb = memory_threshold_kb() if threshold_kb is None else threshold_kb
+    return usage.get("pss_kb", {}).get("delta", 0) > threshold_kb
+
+
+def format_usage(rows):
+    lines = [f"{'test':<60} {'pss peak':>9} {'pss Δ':>8} {'java Δ':>8} "
+             f"{'native Δ':>9} {'cpu s':>6}"]
+    for test, usage in rows:
+        if not usage.get("samples"):
+            continue
+        pss, java, native = (usage.get(field, {}) for field in MEMORY_FIELDS)
+        lines.append(
+            f"{test[-60:]:<60} {pss.get('peak', 0):9d} {pss.get('delta', 0):8d} "
+            f"{java.get('delta', 0):8d} {native.get('delta', 0):9d} "
+            f"{usage['cpu_s']:6.2f}" + ("  !" if exceeds_threshold(usage) else "")
+        )
+    return "\n".join(lines)
@@ -0,0 +1,263 @@
+"""
+Duration-aware test scheduling for the MásBosque Manu Appium suite
+Keeps every test's measured duration in a small SQLite database across runs
+and uses it to order and split the suite:
+
+    pytest appium_tests.py --schedule                 longest tests first
+    pytest appium_tests.py --schedule -n 3 --dist loadgroup
+                                                      one balanced lane per worker
+    pytest appium_tests.py --time-budget 5            best subset that fits in 5 minutes
+
+Lanes are filled longest-processing-time first, so each xdist worker/device
+gets about the same predicted cost. The time budget keeps the tests with the
+highest value per predicted second (smoke tests, recently failing tests and
+tests without history first). Only the process that owns the run writes the
+database, so every xdist worker computes the same order from the same data.
+
+    TEST_DURATIONS_DB   duration database (default reports/durations.sqlite)
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import statistics
+import time
+
+import pytest
+
+from reporting import report_dir
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COST_S = 5.0
+# Weight of the newest run in the moving average of a test's duration
+SMOOTHING = 0.3
+_LANE_SUFFIX = re.compile(r"@lane\d+$")
+
+
+def default_db_path():
+    return os.getenv("TEST_DURATIONS_DB") or os.path.join(report_dir(), "durations.sqlite")
+
+
+class DurationStore:
+    """Exponentially smoothed duration and failure count of every test"""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS durations ("
+            "nodeid TEXT PRIMARY KEY, mean REAL NOT NULL, last REAL NOT NULL, "
+            "runs INTEGER NOT NULL, failures INTEGER NOT NULL, last_outcome TEXT, updated REAL)"
+        )
+        self.connection.commit()
+
+    def record(self, results):
+        """Fold ``{nodeid: (duration_s, outcome)}`` into the history"""
+        history = self.load()
+        rows = []
+        for nodeid, (duration, outcome) in results.items():
+            known = history.get(nodeid)
+            failed = outcome == "failed"
+            if known is None:
+                rows.append((nodeid, duration, duration, 1, int(failed), outcome, time.time()))
+            else:
+                mean = SMOOTHING * duration + (1 - SMOOTHING) * known["mean"]
+                rows.append((nodeid, mean, duration, known["runs"] + 1,
+                             known["failures"] + int(failed), outcome, time.time()))
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO durations VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def load(self):
+        cursor = self.connection.execute(
+            "SELECT nodeid, mean, last, runs, failures, last_outcome FROM durations")
+        return {row[0]: {"mean": row[1], "last": row[2], "runs": row[3],
+                         "failures": row[4], "last_outcome": row[5]} for row in cursor}
+
+    def close(self):
+        self.connection.close()
+
+
+# ============================================================================
+# PLANNING
+# ============================================================================
+
+class CostModel:
+    """Predicted seconds per test, falling back to its class, then the suite median"""
+
+    def __init__(self, history):
+        self.history = history
+        self.by_class = {}
+        for nodeid, entry in history.items():
+            self.by_class.setdefault(_class_of(nodeid), []).append(entry["mean"])
+        means = [entry["mean"] for entry in history.values()]
+        self.default = statistics.median(means) if means else DEFAULT_COST_S
+
+    def predict(self, nodeid):
+        if nodeid in self.history:
+            return self.history[nodeid]["mean"]
+        siblings = self.by_class.get(_class_of(nodeid))
+        return statistics.mean(siblings) if siblings else self.default
+
+    def value(self, nodeid, markers=()):
+        """Worth of running a test: smoke tests, recent failures and new tests rank first"""
+        entry = self.history.get(nodeid)
+        value = 1.0
+        if "smoke" in markers:
+            value += 3.0
+        if entry is None:
+            value += 2.0
+        else:
+            if entry["last_outcome"] == "failed":
+                value += 3.0
+            value += 2.0 * entry["failures"] / entry["runs"]
+        return value
+
+
+def _class_of(nodeid):
+    return nodeid.rsplit("::", 1)[0]
+
+
+def longest_first(nodeids, costs):
+    """Order by predicted cost, longest first (ties by node id)"""
+    return sorted(nodeids, key=lambda nodeid: (-costs[nodeid], nodeid))
+
+
+def balance(nodeids, costs, lanes):
+    """Longest-processing-time assignment of tests to ``lanes`` workers"""
+    plan = [[] for _ in range(lanes)]
+    loads = [0.0] * lanes
+    for nodeid in longest_first(nodeids, costs):
+        lane = loads.index(min(loads))
+        plan[lane].append(nodeid)
+        loads[lane] += costs[nodeid]
+    return plan, loads
+
+
+def within_budget(nodeids, costs, values, budget_s, lanes=1):
+    """Highest value-per-second subset whose balanced makespan fits ``budget_s``"""
+    ranked = sorted(nodeids, key=lambda nodeid: (-values[nodeid] / max(costs[nodeid], 0.01), nodeid))
+    loads = [0.0] * lanes
+    chosen = []
+    for nodeid in ranked:
+        lane = loads.index(min(loads))
+        if loads[lane] + costs[nodeid] <= budget_s:
+            loads[lane] += costs[nodeid]
+            chosen.append(nodeid)
+    return chosen
+
+
+# ============================================================================
+# PYTEST PLUGIN
+# ============================================================================
+
+def pytest_addoption(parser):
+    group = parser.getgroup("scheduler", "duration-aware scheduling")
+    group.addoption("--schedule", action="store_true", default=False,
+                    help="run the longest tests first and balance xdist lanes by measured duration")
+    group.addoption("--time-budget", type=float, default=None, metavar="MINUTES",
+                    help="only run the most valuable tests that fit in MINUTES")
+    group.addoption("--durations-db", default=None, metavar="PATH",
+                    help="duration history database (default TEST_DURATIONS_DB or reports/durations.sqlite)")
+
+
+def _lanes(config):
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput:
+        return workerinput["workercount"]
+    numprocesses = getattr(config.option, "numprocesses", None)
+    return numprocesses if isinstance(numprocesses, int) and numprocesses > 1 else 1
+
+
+def _is_controller(config):
+    return not hasattr(config, "workerinput")
+
+
+class SchedulerPlugin:
+    """Reorders collected tests and records their durations"""
+
+    def __init__(self, config):
+        self.config = config
+        self.path = config.getoption("durations_db") or default_db_path()
+        self.results = {}
+        self.order = None
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        """Select the tests and plan the lanes
+
+        Runs first so the xdist_group markers are in place when xdist's own
+        hook suffixes the node ids with their group under --dist loadgroup.
+        """
+        self.order = None
+        if not (config.getoption("schedule") or config.getoption("time_budget")):
+            return
+        store = DurationStore(self.path)
+        model = CostModel(store.load())
+        store.close()
+        by_id = {item.nodeid: item for item in items}
+        costs = {nodeid: model.predict(nodeid) for nodeid in by_id}
+        lanes = _lanes(config)
+        selected = list(by_id)
+
+        budget = config.getoption("time_budget")
+        if budget:
+            values = {nodeid: model.value(nodeid, {mark.name for mark in item.iter_markers()})
+                      for nodeid, item in by_id.items()}
+            selected = within_budget(selected, costs, values, budget * 60, lanes)
+            keep = set(selected)
+            deselected = [item for item in items if item.nodeid not in keep]
+            if deselected:
+                config.hook.pytest_deselected(items=deselected)
+                items[:] = [item for item in items if item.nodeid in keep]
+
+        plan, loads = balance(selected, costs, lanes)
+        if lanes > 1:
+            for lane, nodeids in enumerate(plan):
+                for nodeid in nodeids:
+                    by_id[nodeid].add_marker(pytest.mark.xdist_group(f"lane{lane}"))
+            # loadgroup hands groups out in order, one lane per worker
+            self.order = [nodeid for nodeids in plan for nodeid in nodeids]
+        else:
+            self.order = longest_first(selected, costs)
+
+        if _is_controller(config):
+            logger.info("Scheduled %d tests on %d lane(s), predicted makespan %.1fs (%s)",
+                        len(selected), lanes, max(loads, default=0.0),
+                        ", ".join(f"{load:.1f}s" for load in loads))
+
+    @pytest.hookimpl(trylast=True, specname="pytest_collection_modifyitems")
+    def order_items(self, items):
+        """Put the planned order in place once every other plugin is done"""
+        if self.order is None:
+            return
+        position = {nodeid: index for index, nodeid in enumerate(self.order)}
+        # xdist may have added its @lane<n> suffix since the plan was made
+        items.sort(key=lambda item: position.get(_LANE_SUFFIX.sub("", item.nodeid), len(position)))
+
+    def pytest_runtest_logreport(self, report):
+        if not _is_controller(self.config):
+            return
+        nodeid = _LANE_SUFFIX.sub("", report.nodeid)
+        duration, outcome = self.results.get(nodeid, (0.0, "passed"))
+        if report.outcome != "passed":
+            outcome = report.outcome
+        self.results[nodeid] = (duration + report.duration, outcome)
+
+    def pytest_sessionfinish(self, session):
+        if not _is_controller(self.config):
+            return
+        # Skipped tests say nothing about how long the test takes
+        measured = {nodeid: result for nodeid, result in self.results.items()
+                    if result[1] != "skipped"}
+        if not measured:
+            return
+        store = DurationStore(self.path)
+        store.record(measured)
+        store.close()
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(SchedulerPlugin(config), "duration-scheduler")
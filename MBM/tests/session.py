@@ -0,0 +1,49 @@
+"""
+Logged-in state injection for tests of the screens behind the login
+Opens the development-only ``testSession`` route of the app with the
+``user_data`` fields for an account; the route stores them the same way a UI
+login does and replaces itself with the target screen.
+
+ActivityManager and logcat record deep links, so no token goes into one. With
+SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY the link carries a fresh one-time
+magic-link code from the auth admin API instead, which the route exchanges for
+the session with ``verifyOtp``; a logged code is spent and expires. Without
+those variables only the local user data is injected, which is enough for
+the offline code paths and for the fake Appium server.
+"""
+
+import urllib.parse
+import uuid
+
+from accounts import SupabaseAdmin
+from driver_pool import MAP_ROUTE, TEST_SESSION_ROUTE
+
+
+class SessionInjector:
+    """Puts a pooled driver's app into a logged-in state"""
+
+    def __init__(self, driver_pool, admin=None):
+        self.driver_pool = driver_pool
+        self.admin = admin
+
+    @classmethod
+    def from_env(cls, driver_pool):
+        return cls(driver_pool, SupabaseAdmin.from_env())
+
+    def session_for(self, account):
+        """User id and, with an admin client, a new one-time ``token_hash`` for ``account``"""
+        if self.admin is None:
+            user_id = account.user_id or str(uuid.uuid5(uuid.NAMESPACE_URL, account.email))
+            return {"user_id": user_id}
+        link = self.admin.generate_link(account.email)
+        return {"user_id": link["id"], "token_hash": link["hashed_token"]}
+
+    def route_for(self, account, next_route=MAP_ROUTE):
+        """``testSession?...`` route that logs ``account`` in and opens ``next_route``"""
+        params = dict(self.session_for(account), name=account.name, role=account.role,
+                      next=next_route)
+        return f"{TEST_SESSION_ROUTE}?{urllib.parse.urlencode(params)}"
+
+    def inject(self, driver, account, next_route=MAP_ROUTE):
+        self.driver_pool.open_route(driver, self.route_for(account, next_route))
+        return driver
@@ -0,0 +1,38 @@
+"""
+adb shell access through Appium's ``mobile: shell`` extension
+The Appium server must be started with ``--allow-insecure adb_shell``.
+"""
+
+from selenium.common.exceptions import WebDriverException
+
+
+class ShellUnavailable(Exception):
+    """The Appium server refuses or does not implement mobile: shell"""
+
+
+def adb_shell(driver, command, *args, timeout_ms=20000):
+    """Run ``command args...`` on the device and return its stdout"""
+    try:
+        return driver.execute_script("mobile: shell", {
+            "command": command,
+            "args": [str(arg) for arg in args],
+            "timeout": timeout_ms,
+        }) or ""
+    except WebDriverException as error:
+        message = str(error)
+        if "adb_shell" in message or "Unsupported script" in message \
+                or "unknown method" in message.lower():
+            raise ShellUnavailable(
+                "mobile: shell is not available; start Appium with "
+                "--allow-insecure adb_shell"
+            ) from error
+        raise
+
+
+def shell_available(driver):
+    """True when ``mobile: shell`` can be used on this session"""
+    try:
+        adb_shell(driver, "echo", "ok")
+        return True
+    except ShellUnavailable:
+        return False
@@ -0,0 +1,60 @@
+"""
+Page-source snapshots for batched element checks
+One ``driver.page_source`` call is parsed locally with lxml and many locators
+are resolved against the in-memory tree, so checking five elements on a
+screen costs one device round trip instead of five.
+"""
+
+from appium.webdriver.common.appiumby import AppiumBy
+from lxml import etree
+
+from locators import xpath_of
+
+
+def _xpath_literal(value):
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    parts = value.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in parts) + ")"
+
+
+def snapshot_xpath(locator):
+    """XPath equivalent of a locator, or None when it can only be resolved live"""
+    xpath = xpath_of(locator)
+    if xpath:
+        return xpath
+    by, value = locator[0], locator[1]
+    if by == AppiumBy.ACCESSIBILITY_ID:
+        return f"//*[@content-desc={_xpath_literal(value)}]"
+    if by == AppiumBy.ID:
+        return f"//*[@resource-id={_xpath_literal(value)}]"
+    if by == AppiumBy.CLASS_NAME:
+        return f"//{value}"
+    return None
+
+
+class PageSnapshot:
+    """Parsed view hierarchy taken at one instant"""
+
+    def __init__(self, source):
+        self.tree = etree.fromstring(source.encode("utf-8"))
+        self._cache = {}
+
+    def find_all(self, locator):
+        """Matching nodes, or None when the locator has no XPath form"""
+        xpath = snapshot_xpath(locator)
+        if xpath is None:
+            return None
+        if xpath not in self._cache:
+            self._cache[xpath] = self.tree.xpath(xpath)
+        return self._cache[xpath]
+
+    def is_displayed(self, locator):
+        """True/False from the snapshot, None when it cannot tell"""
+        nodes = self.find_all(locator)
+        if nodes is None:
+            return None
+        return any(node.get("displayed", "true") == "true" for node in nodes)
+
@@ -0,0 +1,319 @@
+"""
+Offline-queue databases and sync throughput measurement
+Builds ``localdatabase.db`` files with the schema of
+services/localdatabase.ts ``initDatabase`` filled with pending rows, pushes
+them into the app's data directory, brings the device back online and polls
+the pulled database until syncManager has drained the queue.
+
+    SYNC_DB_DEVICE_PATH       database path inside the app data dir
+                              (default files/SQLite/localdatabase.db)
+    SYNC_QUEUE_SIZES          pending rows per benchmark run (default 50,200)
+    SYNC_POLL_INTERVAL        seconds between database pulls (default 2.0)
+    SYNC_TIMEOUT              seconds to wait for an empty queue (default 1800)
+"""
+
+import base64
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from selenium.common.exceptions import WebDriverException
+
+# Keep in sync with initDatabase() in services/localdatabase.ts
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_data (
+  user_id TEXT PRIMARY KEY NOT NULL,
+  name TEXT,
+  nVisits TEXT,
+  dateRegistered TEXT,
+  lastVisit TEXT,
+  role TEXT,
+  startSessionTime TEXT
+);
+
+CREATE TABLE IF NOT EXISTS profiles (
+  id TEXT PRIMARY KEY NOT NULL,
+  user_id TEXT,
+  email TEXT,
+  phone TEXT,
+  avatar_url TEXT,
+  created_at TEXT,
+  updated_at TEXT,
+  synced INTEGER DEFAULT 0,
+  server_id TEXT
+);
+
+CREATE TABLE IF NOT EXISTS records (
+  record_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id TEXT,
+  arrivalTime TEXT,
+  departureTime TEXT,
+  image TEXT,
+  description TEXT,
+  location TEXT,
+  userName TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pending_logs (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  userID TEXT NOT NULL,
+  name TEXT NOT NULL,
+  logDate TEXT NOT NULL,
+  ingressTime TEXT,
+  exitTime TEXT,
+  description TEXT,
+  image TEXT,
+  created_at TEXT NOT NULL,
+  synced INTEGER DEFAULT 0,
+  server_id TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pending_emergencies (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  emergency_id INTEGER,
+  timeAlert TEXT,
+  location TEXT,
+  description TEXT,
+  date TEXT,
+  received INTEGER DEFAULT 0,
+  created_at TEXT NOT NULL,
+  synced INTEGER DEFAULT 0,
+  server_id TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pending_arrival_alerts (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  arrival_id INTEGER,
+  userID TEXT,
+  name TEXT,
+  arrivalTime TEXT,
+  exitTime TEXT,
+  accepted INTEGER DEFAULT 0,
+  created_at TEXT NOT NULL,
+  synced INTEGER DEFAULT 0,
+  server_id TEXT
+);
+
+CREATE TABLE IF NOT EXISTS emergencies (
+  emergency_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  timeAlert TEXT,
+  location TEXT,
+  description TEXT,
+  date TEXT
+);
+
+CREATE TABLE IF NOT EXISTS arrival (
+  arrival_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name TEXT,
+  arrivalTime TEXT,
+  departureTime TEXT,
+  accepted INTEGER,
+  user_id TEXT
+);
+
+CREATE TABLE IF NOT EXISTS locations (
+  location_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name TEXT,
+  latitude REAL,
+  longitude REAL,
+  zoneType TEXT
+);
+"""
+
+# The WHERE clauses of the getPending* functions syncManager drains
+PENDING_QUERIES = {
+    "logs": "SELECT COUNT(*) FROM (SELECT 1 FROM pending_logs WHERE synced = 0 "
+            "GROUP BY userID, logDate)",
+    "profiles": "SELECT COUNT(*) FROM profiles WHERE synced = 0",
+    "emergencies": "SELECT COUNT(*) FROM pending_emergencies WHERE synced = 0 AND received = 0",
+    "arrival_alerts": "SELECT COUNT(*) FROM pending_arrival_alerts "
+                      "WHERE synced = 0 AND accepted = 0",
+}
+
+# Share of each queue in a generated database (roughly a paramedic's shift)
+DEFAULT_MIX = {"logs": 0.7, "emergencies": 0.1, "arrival_alerts": 0.15, "profiles": 0.05}
+
+USERS = 50
+
+
+def queue_sizes():
+    return [int(size) for size in os.getenv("SYNC_QUEUE_SIZES", "50,200").split(",")]
+
+
+def split_rows(total, mix=None):
+    """Rows per queue for ``total`` pending rows"""
+    mix = mix or DEFAULT_MIX
+    counts = {name: int(total * share) for name, share in mix.items()}
+    counts["logs"] += total - sum(counts.values())
+    return counts
+
+
+def build_queue_db(path, logs=0, emergencies=0, arrival_alerts=0, profiles=0,
+                   user_id="test-user", role="medico"):
+    """Create an app database at ``path`` with the given pending rows"""
+    if os.path.exists(path):
+        os.remove(path)
+    now = datetime.now(timezone.utc)
+    stamp = lambda index: (now - timedelta(seconds=index)).isoformat()
+
+    connection = sqlite3.connect(path)
+    try:
+        connection.executescript(SCHEMA)
+        with connection:
+            connection.execute(
+                "INSERT INTO user_data (user_id, name, nVisits, dateRegistered, lastVisit, role) "
+                "VALUES (?, ?, '0', ?, '', ?)",
+                (user_id, "Sync Benchmark", now.isoformat(), role),
+            )
+            # getPendingLogs keeps one row per userID + logDate, so every
+            # generated log gets its own pair
+            connection.executemany(
+                "INSERT INTO pending_logs (userID, name, logDate, ingressTime, exitTime, "
+                "description, image, created_at) VALUES (?, ?, ?, ?, ?, ?, NULL, ?)",
+                (
+                    (f"{user_id}-{index % USERS}", f"Usuario {index % USERS}",
+                     (now - timedelta(days=index // USERS)).date().isoformat(),
+                     "08:00", "16:00", f"Registro {index}", stamp(index))
+                    for index in range(logs)
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO pending_emergencies (timeAlert, location, description, date, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (stamp(index), "19.4326,-99.1332", f"Emergencia {index}",
+                     now.date().isoformat(), stamp(index))
+                    for index in range(emergencies)
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO pending_arrival_alerts (userID, name, arrivalTime, exitTime, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (f"{user_id}-{index % USERS}", f"Usuario {index % USERS}", stamp(index),
+                     None, stamp(index))
+                    for index in range(arrival_alerts)
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO profiles (id, user_id, email, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (f"profile-{index}", f"{user_id}-{index}", f"sync{index}@example.com",
+                     stamp(index), stamp(index))
+                    for index in range(profiles)
+                ),
+            )
+    finally:
+        connection.close()
+    return path
+
+
+def pending_counts(path):
+    """Rows syncManager still has to send, per queue"""
+    connection = sqlite3.connect(path)
+    try:
+        counts = {name: connection.execute(query).fetchone()[0]
+                  for name, query in PENDING_QUERIES.items()}
+    finally:
+        connection.close()
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+def set_connectivity(driver, online):
+    """Turn wifi and mobile data on or off (UiAutomator2 ``mobile: setConnectivity``)"""
+    driver.execute_script("mobile: setConnectivity", {"wifi": online, "data": online})
+
+
+class SyncUnsupported(Exception):
+    """The Appium server cannot push/pull files into the app data dir"""
+
+
+class SyncBenchmark:
+    """Pushes a queue database to the device and times how fast it drains"""
+
+    def __init__(self, driver, package, device_path=None, poll_interval=None, timeout=None):
+        self.driver = driver
+        self.package = package
+        self.device_path = device_path or os.getenv(
+            "SYNC_DB_DEVICE_PATH", "files/SQLite/localdatabase.db")
+        self.poll_interval = poll_interval or float(os.getenv("SYNC_POLL_INTERVAL", 2.0))
+        self.timeout = timeout or float(os.getenv("SYNC_TIMEOUT", 1800))
+        self.workdir = tempfile.mkdtemp(prefix="syncdb-")
+
+    def _remote(self, suffix=""):
+        # @<package>/<path> addresses the app data dir (adb run-as)
+        return f"@{self.package}/{self.device_path}{suffix}"
+
+    def _set_online(self, online):
+        set_connectivity(self.driver, online)
+
+    def push(self, local_path):
+        """Replace the app database while the app is stopped"""
+        with open(local_path, "rb") as handle:
+            payload = base64.b64encode(handle.read()).decode("ascii")
+        try:
+            self.driver.terminate_app(self.package)
+            self.driver.push_file(self._remote(), payload)
+            for suffix in ("-wal", "-shm"):
+                # Stale journal pages would be replayed over the new database
+                self.driver.push_file(self._remote(suffix), "")
+        except WebDriverException as error:
+            raise SyncUnsupported(f"Cannot push {self._remote()}: {error.msg}") from error
+
+    def pull(self):
+        """Copy the app database (and its WAL) to the work dir"""
+        local = os.path.join(self.workdir, "pulled.db")
+        with open(local, "wb") as handle:
+            handle.write(base64.b64decode(self.driver.pull_file(self._remote())))
+        try:
+            wal = base64.b64decode(self.driver.pull_file(self._remote("-wal")))
+        except WebDriverException:
+            wal = b""
+        with open(local + "-wal", "wb") as handle:
+            handle.write(wal)
+        return local
+
+    def run(self, total, mix=None):
+        """Time draining ``total`` pending rows; returns the throughput record"""
+        local = build_queue_db(os.path.join(self.workdir, f"queue-{total}.db"),
+                               **split_rows(total, mix))
+        expected = pending_counts(local)["total"]
+
+        self.push(local)
+        self._set_online(False)
+        self.driver.activate_app(self.package)
+        time.sleep(self.poll_interval)
+
+        start = time.perf_counter()
+        self._set_online(True)
+        samples = []
+        remaining = expected
+        while remaining and time.perf_counter() - start < self.timeout:
+            time.sleep(self.poll_interval)
+            remaining = pending_counts(self.pull())["total"]
+            samples.append((round(time.perf_counter() - start, 3), remaining))
+        elapsed = samples[-1][0] if samples else 0.0
+
+        synced = expected - remaining
+        return {
+            "queue_size": total,
+            "synced": synced,
+            "remaining": remaining,
+            "seconds": elapsed,
+            "rows_per_s": round(synced / elapsed, 2) if elapsed else None,
+            "samples": samples,
+        }
+
+
+def format_curve(results):
+    lines = [f"{'queue':>7} {'synced':>7} {'left':>6} {'seconds':>8} {'rows/s':>8} {'app s':>7}"]
+    for row in results:
+        rate = "-" if row["rows_per_s"] is None else f"{row['rows_per_s']:.1f}"
+        app = "-" if row.get("app_sync_ms") is None else f"{row['app_sync_ms'] / 1000:.1f}"
+        lines.append(f"{row['queue_size']:7d} {row['synced']:7d} {row['remaining']:6d} "
+                     f"{row['seconds']:8.1f} {rate:>8} {app:>7}")
+    return "\n".join(lines)
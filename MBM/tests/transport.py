@@ -0,0 +1,134 @@
+"""
+HTTP transport tuning and command batching for the Appium client
+Every page-object step is a W3C command, and a step such as
+``send_keys`` costs three of them (findElement, clear, setValue). On a remote
+or tunnelled Appium server each one pays a round trip, so this module
+
+* builds the client config used by ``create_driver``: keep-alive connections,
+  a connection pool large enough for the background samplers that share the
+  driver (urllib3 keeps one connection per host by default and throws away
+  the extra ones, reconnecting every time), TCP keep-alive and a few connect
+  retries;
+* turns a page-object operation into one ``execute_driver`` (WebdriverIO)
+  script, so ``LoginPage.login`` is a single request. The Appium server must
+  run with ``--allow-insecure execute_driver_script``; without it the first
+  batch fails and the session falls back to one command per step.
+
+    APPIUM_KEEP_ALIVE       reuse connections to the Appium server (default true)
+    APPIUM_POOL_SIZE        connections kept per Appium server (default 4)
+    APPIUM_HTTP_TIMEOUT     seconds before a command times out (default 120)
+    APPIUM_BATCH            run page-object operations as one script (default false)
+"""
+
+import json
+import logging
+import os
+import socket
+
+from appium.webdriver.client_config import AppiumClientConfig
+from selenium.common.exceptions import WebDriverException
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+def batch_enabled():
+    return os.getenv("APPIUM_BATCH", "false").lower() == "true"
+
+
+def client_config(server_url, pool_size=None, keep_alive=None):
+    """AppiumClientConfig with a pooled keep-alive connection to ``server_url``"""
+    pool_size = int(os.getenv("APPIUM_POOL_SIZE", 4) if pool_size is None else pool_size)
+    if keep_alive is None:
+        keep_alive = os.getenv("APPIUM_KEEP_ALIVE", "true").lower() == "true"
+    socket_options = list(HTTPConnection.default_socket_options)
+    if keep_alive:
+        socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    return AppiumClientConfig(
+        remote_server_addr=server_url,
+        keep_alive=keep_alive,
+        timeout=int(os.getenv("APPIUM_HTTP_TIMEOUT", 120)),
+        init_args_for_pool_manager={"init_args_for_pool_manager": {
+            "maxsize": pool_size,
+            "block": False,
+            "socket_options": socket_options,
+            # Only connection failures are retried; a command may not be idempotent
+            "retries": Retry(total=3, connect=3, read=0, status=0, redirect=0, backoff_factor=0.1),
+        }},
+    )
+
+
+# ============================================================================
+# BATCHING
+# ============================================================================
+
+def wdio_selector(by, value):
+    """WebdriverIO selector for an Appium (by, value) locator"""
+    if by == "accessibility id":
+        return f"~{value}"
+    if by == "-android uiautomator":
+        return f"android={value}"
+    if by == "id":
+        return f'android=new UiSelector().resourceId("{value}")'
+    if by == "class name":
+        return f"//{value}"
+    return value
+
+
+class Batch:
+    """Page-object steps sent to the server as one execute_driver script"""
+
+    def __init__(self, timeout_ms=10000):
+        self.timeout_ms = timeout_ms
+        self.steps = []
+
+    def type(self, locator, text):
+        self._add("type", locator, text)
+        return self
+
+    def click(self, locator):
+        self._add("click", locator)
+        return self
+
+    def _add(self, action, locator, text=None):
+        by, value = locator
+        step = {"action": action, "using": by, "value": value, "selector": wdio_selector(by, value)}
+        if text is not None:
+            step["text"] = text
+        self.steps.append(step)
+
+    def script(self):
+        return (
+            f"const steps = {json.dumps(self.steps, ensure_ascii=False)};\n"
+            "for (const step of steps) {\n"
+            "  const element = await driver.$(step.selector);\n"
+            f"  await element.waitForExist({{ timeout: {self.timeout_ms} }});\n"
+            "  if (step.action === 'type') {\n"
+            "    await element.clearValue();\n"
+            "    await element.addValue(step.text);\n"
+            "  } else {\n"
+            "    await element.click();\n"
+            "  }\n"
+            "}\n"
+            "return steps.length;\n"
+        )
+
+
+# Sessions whose server refused execute_driver
+_unsupported = set()
+
+
+def run_batch(driver, batch):
+    """Run ``batch`` in one request; False if the server cannot run scripts"""
+    if driver.session_id in _unsupported:
+        return False
+    try:
+        driver.execute_driver(batch.script(), "webdriverio", batch.timeout_ms * len(batch.steps))
+    except WebDriverException as error:
+        if "execute_driver" not in (error.msg or "") and "unknown command" not in str(error).lower():
+            raise
+        logger.info("execute_driver unavailable, sending steps one by one: %s", error.msg)
+        _unsupported.add(driver.session_id)
+        return False
+    return True
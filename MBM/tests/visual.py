@@ -0,0 +1,420 @@
+"""
+Visual regression of the page objects' screens
+``BasePage.checkpoint`` grabs a screenshot at fixed points of the LoginPage
+and RegisterPage flows; decoding, comparing and writing diff images run on a
+background worker so the test goes on while the previous screen is checked.
+
+Screens are compared with NumPy against baselines kept in one memory-mapped
+file (``images.bin`` plus ``index.json``), so a baseline is a view into the
+page cache rather than a PNG decoded again for every comparison:
+
+* a downscaled pass over every ``factor``-th pixel (the baseline's copy is
+  stored next to it) fails a clearly changed screen without touching the
+  rest of the image, estimating the changed pixels from the sample; screens
+  it cannot tell apart go on to the full comparison;
+* rows that are byte-for-byte equal are skipped with a 64-bit word compare,
+  and only the remaining rows get the per-pixel tolerance check;
+* masked regions (status bar clock, avatars, ...) are ignored, given as
+  fractions of the screen so one mask fits every resolution.
+
+Decoding the PNG screenshots needs Pillow (``pip install Pillow``).
+
+    VISUAL_REGRESSION           compare checkpoints with baselines (default false)
+    VISUAL_BASELINE_DIR         baseline store (default baselines/visual)
+    VISUAL_UPDATE_BASELINES     true to overwrite baselines with this run
+    VISUAL_TOLERANCE            allowed difference per channel, 0-255 (default 16)
+    VISUAL_MAX_DIFF_RATIO       share of pixels allowed to differ (default 0.001)
+    VISUAL_PRECHECK_FACTOR      sampling step of the downscaled pass (default 8)
+    SCREENSHOT_ON_FAILURE       save a screenshot of every failed test (default false)
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from selenium.common.exceptions import WebDriverException
+
+from reporting import lock_exclusive, read_json, report_dir, write_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines", "visual"
+)
+
+
+def enabled():
+    return os.getenv("VISUAL_REGRESSION", "false").lower() == "true"
+
+
+def screenshot_on_failure():
+    return os.getenv("SCREENSHOT_ON_FAILURE", "false").lower() == "true"
+
+
+def pillow_available():
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def decode_png(data):
+    """RGB uint8 array of PNG bytes"""
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def encode_png(image):
+    """PNG bytes of an RGB uint8 array"""
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.fromarray(np.ascontiguousarray(image)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# ============================================================================
+# MASKS
+# ============================================================================
+
+class Region:
+    """Rectangle ignored by the comparison, in fractions of the screen"""
+
+    def __init__(self, name, left, top, width, height):
+        self.name = name
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+
+    def pixels(self, shape):
+        """(row slice, column slice) of the region on an image of ``shape``"""
+        rows, columns = shape[:2]
+        top = int(self.top * rows)
+        left = int(self.left * columns)
+        bottom = int(np.ceil((self.top + self.height) * rows))
+        right = int(np.ceil((self.left + self.width) * columns))
+        return slice(top, bottom), slice(left, right)
+
+
+# Clock, notifications and battery level change between any two screenshots
+STATUS_BAR = Region("status_bar", 0.0, 0.0, 1.0, 0.04)
+DEFAULT_MASK = (STATUS_BAR,)
+
+_masks = {}
+
+
+def mask_array(shape, regions):
+    """Boolean array, True where a pixel of an image of ``shape`` is ignored"""
+    key = (shape[:2], tuple((r.left, r.top, r.width, r.height) for r in regions))
+    mask = _masks.get(key)
+    if mask is None:
+        mask = np.zeros(shape[:2], dtype=bool)
+        for region in regions:
+            mask[region.pixels(shape)] = True
+        mask.flags.writeable = False
+        _masks[key] = mask
+    return mask
+
+
+# ============================================================================
+# COMPARISON
+# ============================================================================
+
+def downscale(image, factor):
+    """Every ``factor``-th pixel of every ``factor``-th row, as a contiguous copy"""
+    return np.ascontiguousarray(image[::factor, ::factor])
+
+
+def _over_tolerance(actual, baseline, tolerance):
+    # uint8 difference without a signed copy of both images
+    delta = np.maximum(actual, baseline) - np.minimum(actual, baseline)
+    return delta.max(axis=-1) > tolerance
+
+
+def changed_rows(actual, baseline):
+    """Indices of the rows that are not byte-for-byte equal"""
+    rows = actual.shape[0]
+    flat_actual = actual.reshape(rows, -1)
+    flat_baseline = baseline.reshape(rows, -1)
+    if flat_actual.shape[1] % 8 == 0 and flat_actual.flags.c_contiguous and flat_baseline.flags.c_contiguous:
+        flat_actual = flat_actual.view(np.uint64)
+        flat_baseline = flat_baseline.view(np.uint64)
+    return np.flatnonzero((flat_actual != flat_baseline).any(axis=1))
+
+
+class VisualDiff:
+    """Outcome of comparing one screenshot with its baseline"""
+
+    def __init__(self, key, passed, changed=0, compared=0, bbox=None, precheck=False,
+                 recorded=False, reason="", elapsed_ms=0.0):
+        self.key = key
+        self.passed = passed
+        self.changed = changed
+        self.compared = compared
+        self.bbox = bbox
+        self.precheck = precheck
+        self.recorded = recorded
+        self.reason = reason
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ratio(self):
+        return self.changed / self.compared if self.compared else 0.0
+
+    @property
+    def message(self):
+        if self.reason:
+            return f"{self.key}: {self.reason}"
+        about = "about " if self.precheck else ""
+        return (f"{self.key}: {about}{self.changed} pixels ({self.ratio:.3%}) differ "
+                f"from the baseline in {self.bbox}")
+
+    def as_dict(self):
+        return {"key": self.key, "passed": self.passed, "changed": self.changed,
+                "ratio": round(self.ratio, 6), "bbox": self.bbox, "precheck": self.precheck,
+                "recorded": self.recorded, "reason": self.reason,
+                "elapsed_ms": round(self.elapsed_ms, 2)}
+
+
+def compare(key, actual, baseline, mask=DEFAULT_MASK, tolerance=16, max_ratio=0.001,
+            factor=8, baseline_small=None):
+    """Compare ``actual`` with ``baseline`` (H x W x 3 uint8 arrays)
+
+    ``baseline_small`` is ``downscale(baseline, factor)`` when the store has it.
+    """
+    started = time.perf_counter()
+
+    def result(**kwargs):
+        return VisualDiff(key, elapsed_ms=(time.perf_counter() - started) * 1000, **kwargs)
+
+    if actual.shape != baseline.shape:
+        return result(passed=False, reason=f"size {actual.shape[1::-1]} != baseline {baseline.shape[1::-1]}")
+
+    ignored = mask_array(actual.shape, mask)
+    compared = ignored.size - int(np.count_nonzero(ignored))
+    allowed = int(max_ratio * compared)
+
+    if factor > 1:
+        if baseline_small is None:
+            baseline_small = downscale(baseline, factor)
+        sampled = _over_tolerance(downscale(actual, factor), baseline_small, tolerance)
+        sampled &= ~ignored[::factor, ::factor]
+        # Each sampled pixel stands for a factor x factor block
+        found = int(np.count_nonzero(sampled)) * factor * factor
+        if found > allowed:
+            rows, columns = np.nonzero(sampled)
+            bbox = [int(columns.min()) * factor, int(rows.min()) * factor,
+                    int(columns.max()) * factor, int(rows.max()) * factor]
+            return result(passed=False, changed=found, compared=compared, bbox=bbox, precheck=True)
+
+    rows = changed_rows(actual, baseline)
+    if rows.size == 0:
+        return result(passed=True, compared=compared)
+    over = _over_tolerance(actual[rows], baseline[rows], tolerance)
+    over &= ~ignored[rows]
+    changed = int(np.count_nonzero(over))
+    bbox = None
+    if changed:
+        hit_rows, hit_columns = np.nonzero(over)
+        bbox = [int(hit_columns.min()), int(rows[hit_rows.min()]),
+                int(hit_columns.max()), int(rows[hit_rows.max()])]
+    return result(passed=changed <= allowed, changed=changed, compared=compared, bbox=bbox)
+
+
+def diff_image(actual, baseline, mask=DEFAULT_MASK, tolerance=16):
+    """``actual`` dimmed, with the pixels over the tolerance in red and masks in grey"""
+    image = (actual // 3).astype(np.uint8)
+    image[mask_array(actual.shape, mask)] = (96, 96, 96)
+    image[_over_tolerance(actual, baseline, tolerance)] = (255, 0, 0)
+    return image
+
+
+# ============================================================================
+# BASELINE STORE
+# ============================================================================
+
+class ImageStore:
+    """Baseline screenshots in one memory-mapped file
+
+    ``index.json`` maps every key to the offset and shape of its image and of
+    its downscaled copy in ``images.bin``. A baseline replaced by one of the
+    same size is rewritten in place; other images are appended.
+    """
+
+    INDEX = "index.json"
+    DATA = "images.bin"
+
+    def __init__(self, path=None, factor=None):
+        self.path = path or os.getenv("VISUAL_BASELINE_DIR", DEFAULT_BASELINE_DIR)
+        self.factor = int(os.getenv("VISUAL_PRECHECK_FACTOR", 8) if factor is None else factor)
+        os.makedirs(self.path, exist_ok=True)
+        self.index_path = os.path.join(self.path, self.INDEX)
+        self.data_path = os.path.join(self.path, self.DATA)
+        self.lock = threading.Lock()
+        self.index = read_json(self.index_path) if os.path.exists(self.index_path) else {}
+        self._data = None
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def _mapped(self):
+        if self._data is None:
+            self._data = np.memmap(self.data_path, dtype=np.uint8, mode="r")
+        return self._data
+
+    def _view(self, offset, shape):
+        size = int(np.prod(shape))
+        return self._mapped()[offset:offset + size].reshape(shape)
+
+    def get(self, key):
+        """(baseline, downscaled baseline or None) views of ``key``, or None"""
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        small = None
+        if entry["factor"] == self.factor:
+            small = self._view(entry["small_offset"], entry["small_shape"])
+        return self._view(entry["offset"], entry["shape"]), small
+
+    def put(self, key, image):
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        small = downscale(image, self.factor)
+        with self.lock, open(self.index_path + ".lock", "w") as lock_file:
+            # Other xdist workers share the store
+            lock_exclusive(lock_file)
+            if os.path.exists(self.index_path):
+                self.index = read_json(self.index_path)
+            entry = self.index.get(key)
+            self._data = None
+            with open(self.data_path, "r+b" if os.path.exists(self.data_path) else "w+b") as data:
+                if entry is not None and entry["shape"] == list(image.shape) \
+                        and entry["small_shape"] == list(small.shape):
+                    offset, small_offset = entry["offset"], entry["small_offset"]
+                else:
+                    offset = data.seek(0, os.SEEK_END)
+                    small_offset = offset + image.nbytes
+                data.seek(offset)
+                data.write(image.tobytes())
+                data.seek(small_offset)
+                data.write(small.tobytes())
+            self.index[key] = {
+                "offset": offset, "shape": list(image.shape),
+                "small_offset": small_offset, "small_shape": list(small.shape),
+                "factor": self.factor, "recorded": datetime.now().isoformat(),
+            }
+            write_json(self.index_path, self.index)
+
+
+# ============================================================================
+# CHECKPOINTS
+# ============================================================================
+
+class VisualChecker:
+    """Compares checkpoint screenshots with the store on a background worker"""
+
+    def __init__(self, store, device, update=None, tolerance=None, max_ratio=None, workers=1):
+        self.store = store
+        self.device = device
+        if update is None:
+            update = os.getenv("VISUAL_UPDATE_BASELINES", "false").lower() == "true"
+        self.update = update
+        self.tolerance = int(os.getenv("VISUAL_TOLERANCE", 16) if tolerance is None else tolerance)
+        self.max_ratio = float(os.getenv("VISUAL_MAX_DIFF_RATIO", 0.001) if max_ratio is None else max_ratio)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="visual")
+        self.pending = []
+        self.test = "session"
+        self.unavailable = False
+
+    def begin(self, test):
+        self.test = test
+        self.pending = []
+
+    def capture(self, driver, name, mask=()):
+        """Screenshot the current screen and queue its comparison
+
+        Only the screenshot request runs on the calling thread, since it has
+        to see the screen the checkpoint is about.
+        """
+        if self.unavailable:
+            return None
+        try:
+            png = driver.get_screenshot_as_png()
+        except WebDriverException as error:
+            logger.warning("Screenshots unavailable, visual checkpoints disabled: %s", error.msg)
+            self.unavailable = True
+            return None
+        future = self.executor.submit(self._check_png, name, png, DEFAULT_MASK + tuple(mask), self.test)
+        self.pending.append(future)
+        return future
+
+    def _check_png(self, name, png, mask, test):
+        return self.check(name, decode_png(png), mask, test, png)
+
+    def check(self, name, image, mask=DEFAULT_MASK, test=None, png=None):
+        """Compare ``image`` with the baseline of ``name``, recording it if there is none"""
+        key = f"{self.device}:{name}"
+        stored = self.store.get(key)
+        if stored is None or self.update:
+            self.store.put(key, image)
+            return VisualDiff(key, passed=True, recorded=True)
+        baseline, small = stored
+        result = compare(key, image, baseline, mask, self.tolerance, self.max_ratio,
+                         self.store.factor, small)
+        if not result.passed and test is not None:
+            self._write_artifacts(test, name, image, baseline, mask, png)
+        return result
+
+    def _write_artifacts(self, test, name, image, baseline, mask, png):
+        directory = report_dir("visual", test)
+        with open(os.path.join(directory, f"{name}-actual.png"), "wb") as handle:
+            handle.write(png if png is not None else encode_png(image))
+        if image.shape == baseline.shape:
+            with open(os.path.join(directory, f"{name}-diff.png"), "wb") as handle:
+                handle.write(encode_png(diff_image(image, baseline, mask, self.tolerance)))
+
+    def collect(self):
+        """Results of the checkpoints queued since ``begin``"""
+        results = [future.result() for future in self.pending]
+        self.pending = []
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+_checker = None
+
+
+def install(checker):
+    """Make ``checker`` receive the page objects' checkpoints (None to stop)"""
+    global _checker
+    _checker = checker
+
+
+def checkpoint(driver, name, mask=()):
+    if _checker is None:
+        return None
+    return _checker.capture(driver, name, mask)
+
+
+def save_screenshot(driver, name):
+    """Write the current screen to reports/screenshots/<name>.png; the path or None"""
+    try:
+        png = driver.get_screenshot_as_png()
+    except WebDriverException as error:
+        logger.debug("No screenshot of %s: %s", name, error.msg)
+        return None
+    path = os.path.join(report_dir("screenshots"), f"{name}.png")
+    with open(path, "wb") as handle:
+        handle.write(png)
+    return path
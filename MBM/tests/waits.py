@@ -0,0 +1,186 @@
+"""
+Condition-driven waits for the MásBosque Manu Appium suite
+Polls the device with an adaptive back-off until a condition holds, gives up
+on a per-condition timeout budget and records how long every wait really took.
+"""
+
+import time
+
+from selenium.common.exceptions import (
+    NoAlertPresentException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.common.by import By
+
+
+# Seconds each kind of condition may take before the wait gives up
+DEFAULT_BUDGETS = {
+    "screen": 10,
+    "value": 5,
+    "alert": 5,
+    "navigation": 15,
+    # An alert that may legitimately never show up
+    "optional_alert": 1,
+}
+
+# Native Android dialog/toast used by React Native's Alert.alert and ToastAndroid
+ANDROID_ALERT_MESSAGE = (By.XPATH, "//*[@resource-id='android:id/message']")
+ANDROID_ALERT_BUTTON = (By.XPATH, "//*[@resource-id='android:id/button1']")
+ANDROID_TOAST = (By.XPATH, "//android.widget.Toast")
+
+IGNORED_EXCEPTIONS = (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    NoAlertPresentException,
+)
+
+
+# ============================================================================
+# CONDITIONS
+# ============================================================================
+
+class Condition:
+    """A named check evaluated against the driver
+
+    ``check`` returns a truthy value once the condition holds.
+    """
+
+    def __init__(self, kind, description, check):
+        self.kind = kind
+        self.description = description
+        self.check = check
+
+    def __call__(self, driver):
+        return self.check(driver)
+
+    def __repr__(self):
+        return f"<Condition {self.kind}: {self.description}>"
+
+
+def screen_visible(locator):
+    """Element identifying a screen is displayed"""
+    def check(driver):
+        element = driver.find_element(*locator)
+        return element if element.is_displayed() else False
+    return Condition("screen", f"{locator[1]} visible", check)
+
+
+def screen_gone(locator):
+    """Element identifying a screen is no longer present"""
+    def check(driver):
+        return not driver.find_elements(*locator)
+    return Condition("navigation", f"{locator[1]} gone", check)
+
+
+def input_has_value(locator, value):
+    """Input contains ``value``"""
+    def check(driver):
+        element = driver.find_element(*locator)
+        current = element.get_attribute("text") or element.text or ""
+        return element if value in current else False
+    return Condition("value", f"{locator[1]} has {value!r}", check)
+
+
+def alert_shown():
+    """A native alert dialog or toast is on screen"""
+    def check(driver):
+        try:
+            return driver.switch_to.alert.text or True
+        except (NoAlertPresentException, WebDriverException):
+            pass
+        for locator in (ANDROID_ALERT_MESSAGE, ANDROID_TOAST):
+            elements = driver.find_elements(*locator)
+            if elements:
+                return elements[0].text or True
+        return False
+    return Condition("alert", "alert or toast shown", check)
+
+
+def navigation_finished(locator):
+    """Target screen is visible and the view hierarchy stopped changing"""
+    state = {"source": None}
+
+    def check(driver):
+        if not driver.find_elements(*locator):
+            state["source"] = None
+            return False
+        source = driver.page_source
+        settled = source == state["source"]
+        state["source"] = source
+        return settled
+    return Condition("navigation", f"navigation to {locator[1]} finished", check)
+
+
+# ============================================================================
+# WAIT ENGINE
+# ============================================================================
+
+class WaitRecord:
+    """Outcome of one wait"""
+
+    def __init__(self, condition, elapsed, polls, satisfied):
+        self.kind = condition.kind
+        self.description = condition.description
+        self.elapsed = elapsed
+        self.polls = polls
+        self.satisfied = satisfied
+
+    def __repr__(self):
+        status = "ok" if self.satisfied else "timeout"
+        return (f"{self.kind:<10} {self.elapsed * 1000:8.0f} ms "
+                f"{self.polls:3d} polls {status:<7} {self.description}")
+
+
+class WaitEngine:
+    """Adaptive polling wait with per-condition budgets"""
+
+    def __init__(self, driver, budgets=None, initial_interval=0.05,
+                 max_interval=1.0, backoff=1.5):
+        self.driver = driver
+        self.budgets = dict(DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.records = []
+
+    def until(self, condition, timeout=None, raise_on_timeout=True):
+        """Poll ``condition`` until it holds or its budget runs out"""
+        if timeout is None:
+            timeout = self.budgets.get(condition.kind, 10)
+        interval = self.initial_interval
+        polls = 0
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            polls += 1
+            try:
+                value = condition(self.driver)
+            except IGNORED_EXCEPTIONS:
+                value = False
+            now = time.monotonic()
+            if value:
+                self.records.append(WaitRecord(condition, now - start, polls, True))
+                return value
+            if now >= deadline:
+                break
+            time.sleep(min(interval, deadline - now))
+            interval = min(interval * self.backoff, self.max_interval)
+
+        self.records.append(WaitRecord(condition, now - start, polls, False))
+        if raise_on_timeout:
+            raise TimeoutException(
+                f"Timed out after {timeout}s waiting for {condition.description}"
+            )
+        return False
+
+    def summary(self):
+        """Table of every wait recorded so far"""
+        total = sum(record.elapsed for record in self.records)
+        lines = [f"Waits: {len(self.records)} conditions, {total:.2f}s total"]
+        lines.extend(f"  {record!r}" for record in self.records)
+        return "\n".join(lines)